@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+接続プールの効果測定
+
+プール無効時と有効時で get_video() の1呼び出しあたりのレイテンシを比較します。
+
+使用方法:
+    python benchmarks/bench_connection_pool.py [--calls 5000]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import datawarehouse as dwh
+from datawarehouse import connection
+
+SCHEMA_PATH = Path(__file__).parent.parent / "docs" / "specification" / "schema.sql"
+
+
+def _create_database(db_path: str) -> int:
+    """ベンチマーク用のデータベースを作成し、ビデオIDを返す"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    conn.commit()
+    conn.close()
+
+    subject_id = dwh.create_subject("bench", db_path=db_path)
+    return dwh.create_video("bench/video.mp4", subject_id, "2025-01-01", 60, db_path=db_path)
+
+
+def _measure(video_id: int, db_path: str, calls: int) -> float:
+    """get_video() の平均レイテンシ（マイクロ秒）を返す"""
+    started = time.perf_counter()
+    for _ in range(calls):
+        dwh.get_video(video_id, db_path=db_path)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="接続プールのレイテンシ比較")
+    parser.add_argument("--calls", type=int, default=5000, help="計測する呼び出し回数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        video_id = _create_database(db_path)
+
+        connection.POOLING_ENABLED = False
+        unpooled = _measure(video_id, db_path, args.calls)
+
+        connection.POOLING_ENABLED = True
+        connection.get_pool(db_path, mode=connection.MODE_READ_ONLY).reset_stats()
+        pooled = _measure(video_id, db_path, args.calls)
+        stats = connection.get_pool_stats(db_path, mode=connection.MODE_READ_ONLY)
+        connection.close_all_pools()
+
+    print(f"calls: {args.calls}")
+    print(f"プールなし: {unpooled:8.1f} us/call")
+    print(f"プールあり: {pooled:8.1f} us/call  (x{unpooled / pooled:.1f})")
+    print(f"プール統計: created={stats['created']} reused={stats['reused']} "
+          f"acquire_ms_avg={stats['acquire_ms_avg']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+行の表現（row_format）ごとのメモリ使用量と取得時間の比較
+
+search_task_executions() と get_video_tags() の結果を row_format ごとに取得し、
+結果が保持するメモリ（100万行あたりに換算）と取得時間を表示します。
+
+使用方法:
+    python benchmarks/bench_row_formats.py [--rows 200000]
+"""
+
+import argparse
+import gc
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import datawarehouse as dwh
+
+SCHEMA_PATH = Path(__file__).parent.parent / "docs" / "specification" / "schema.sql"
+
+
+def _create_database(db_path: str, rows: int) -> int:
+    """rows 件のタグを持つベンチマーク用のデータベースを作成し、タグを持つビデオIDを返す"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    conn.execute("INSERT INTO subject_table (subject_name) VALUES ('bench')")
+    conn.executemany(
+        "INSERT INTO task_table (task_set, task_name, task_describe) VALUES (?, ?, ?)",
+        [(i % 4, f"task_{i}", f"task {i} description") for i in range(20)]
+    )
+    videos = max(1, rows // 1000)
+    conn.executemany(
+        "INSERT INTO video_table (video_dir, subject_ID, video_date, video_length) VALUES (?, 1, ?, 3600)",
+        [(f"bench/video_{i:06d}.mp4", f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}") for i in range(videos)]
+    )
+    conn.executemany(
+        "INSERT INTO tag_table (video_ID, task_ID, start, end) VALUES (?, ?, ?, ?)",
+        ((i % videos + 1, i % 20 + 1, i * 10, i * 10 + 5) for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+    return 1
+
+
+def _measure(func, *args, **kwargs):
+    """結果の行数、保持するメモリ（バイト）、取得時間（秒）を返す"""
+    gc.collect()
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - started
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(*args, **kwargs)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    rows = result.row_count if isinstance(result, dwh.DWHColumns) else len(result)
+    return rows, retained, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="row_format ごとのメモリ使用量と取得時間の比較")
+    parser.add_argument("--rows", type=int, default=200000, help="タグ（search_task_executions の結果）の行数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        video_id = _create_database(db_path, args.rows)
+
+        for label, func, func_args in [
+            ("search_task_executions", dwh.search_task_executions, ()),
+            ("get_video_tags", dwh.get_video_tags, (video_id,)),
+        ]:
+            print(f"{label}:")
+            baseline = None
+            for row_format in dwh.ROW_FORMATS:
+                rows, retained, elapsed = _measure(func, *func_args, row_format=row_format, db_path=db_path)
+                per_million = retained / rows * 1e6 / 2 ** 20
+                baseline = baseline or per_million
+                print(f"  {row_format:10s} rows={rows:8d}  {per_million:8.1f} MiB/百万行 "
+                      f"(x{per_million / baseline:.2f})  {elapsed * 1e3:8.1f} ms")
+
+        dwh.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,58 @@ DataWareHouse API ライブラリ
 """
 
 # 接続管理
-from .connection import DWHConnection, get_connection
+from .connection import (
+    DWHConnection,
+    DWHSession,
+    DWHBulkLoadSession,
+    DWHWriter,
+    get_connection,
+    CONNECTION_PROFILES,
+    get_connection_settings,
+    ConnectionPool,
+    get_pool,
+    configure_pool,
+    get_pool_stats,
+    close_all_pools,
+    configure_lock_retry,
+    get_lock_stats,
+    reset_lock_stats,
+    enable_query_stats,
+    disable_query_stats,
+    get_query_stats,
+    reset_query_stats,
+    enable_slow_query_log,
+    disable_slow_query_log
+)
+
+# 名前付きSQL文
+from .queries import (
+    DWHPage,
+    DWHBatchResult,
+    get_statement_cache_stats,
+    reset_statement_cache_stats
+)
+
+# 行の表現（row_format）
+from .records import (
+    ROW_FORMATS,
+    DWHColumns,
+    Task,
+    Subject,
+    Video,
+    Tag,
+    CoreLibVersion,
+    CoreLibOutput,
+    AlgorithmVersion,
+    AlgorithmOutput,
+    EvaluationResult,
+    EvaluationData,
+    AnalysisResult,
+    Problem,
+    AnalysisData,
+    TaskExecution,
+    namedtuple_type
+)
 
 # 例外クラス
 from .exceptions import (
@@ -15,7 +66,10 @@ from .exceptions import (
     DWHNotFoundError,
     DWHValidationError,
     DWHConnectionError,
-    DWHUniqueConstraintError
+    DWHUniqueConstraintError,
+    DWHBusyError,
+    DWHForeignKeyViolationError,
+    DWHMergeConflictError
 )
 
 # API関数
@@ -24,7 +78,8 @@ from .task_api import (
     get_task,
     list_tasks,
     update_task,
-    delete_task
+    delete_task,
+    get_or_create_tasks
 )
 
 from .subject_api import (
@@ -33,13 +88,17 @@ from .subject_api import (
     list_subjects,
     update_subject,
     delete_subject,
-    find_subject_by_name
+    find_subject_by_name,
+    get_or_create_subjects
 )
 
 from .video_api import (
     create_video,
+    create_videos_bulk,
     get_video,
+    get_videos,
     list_videos,
+    iter_videos,
     get_videos_by_subject,
     update_video,
     delete_video
@@ -47,10 +106,13 @@ from .video_api import (
 
 from .tag_api import (
     create_tag,
+    create_tags_bulk,
     get_tag,
+    get_tags,
     get_video_tags,
     get_task_tags,
     list_tags,
+    iter_tags,
     update_tag,
     delete_tag,
     get_tag_duration
@@ -63,8 +125,12 @@ from .core_lib_api import (
     get_core_lib_version_history,
     find_core_lib_by_version,
     find_core_lib_by_commit_hash,
+    upsert_core_lib_version,
+    upsert_core_lib_versions,
     create_core_lib_output,
+    fan_out_core_lib_outputs,
     get_core_lib_output,
+    get_core_lib_outputs,
     list_core_lib_outputs
 )
 
@@ -75,14 +141,19 @@ from .algorithm_api import (
     get_algorithm_version_history,
     find_algorithm_by_version,
     find_algorithm_by_commit_hash,
+    upsert_algorithm_version,
+    upsert_algorithm_versions,
     create_algorithm_output,
+    fan_out_algorithm_outputs,
     get_algorithm_output,
+    get_algorithm_outputs,
     list_algorithm_outputs,
     get_latest_algorithm_version
 )
 
 from .analytics_api import (
     search_task_executions,
+    iter_task_executions,
     get_version_history,
     get_table_statistics,
     check_data_integrity,
@@ -95,7 +166,9 @@ from .evaluation_api import (
     get_evaluation_result,
     list_evaluation_results,
     create_evaluation_data,
+    load_evaluation_data,
     list_evaluation_data,
+    iter_evaluation_data,
     get_evaluation_overview,
 )
 
@@ -108,6 +181,22 @@ from .analysis_api import (
     list_problems,
     create_analysis_data,
     list_analysis_data,
+    iter_analysis_data,
+)
+
+# インポート
+from .importer import (
+    import_file
+)
+
+# 課題分析データの一括登録
+from .analysis_ingest import (
+    ingest_analysis_data_dirs
+)
+
+# シャード統合
+from .merge import (
+    merge_shards
 )
 
 # 検証モジュール
@@ -115,6 +204,7 @@ from .validation import (
     validate_database_schema,
     get_schema_validation_report,
     check_database_compatibility,
+    create_missing_indexes,
     SchemaValidator
 )
 
@@ -128,7 +218,49 @@ __version__ = "0.1.0"
 __all__ = [
     # 接続管理
     "DWHConnection",
+    "DWHSession",
+    "DWHBulkLoadSession",
+    "DWHWriter",
     "get_connection",
+    "CONNECTION_PROFILES",
+    "get_connection_settings",
+    "ConnectionPool",
+    "get_pool",
+    "configure_pool",
+    "get_pool_stats",
+    "close_all_pools",
+    "configure_lock_retry",
+    "get_lock_stats",
+    "reset_lock_stats",
+    "enable_query_stats",
+    "disable_query_stats",
+    "get_query_stats",
+    "reset_query_stats",
+    "enable_slow_query_log",
+    "disable_slow_query_log",
+    "DWHPage",
+    "DWHBatchResult",
+    "get_statement_cache_stats",
+    "reset_statement_cache_stats",
+    
+    # 行の表現（row_format）
+    "ROW_FORMATS",
+    "DWHColumns",
+    "Task",
+    "Subject",
+    "Video",
+    "Tag",
+    "CoreLibVersion",
+    "CoreLibOutput",
+    "AlgorithmVersion",
+    "AlgorithmOutput",
+    "EvaluationResult",
+    "EvaluationData",
+    "AnalysisResult",
+    "Problem",
+    "AnalysisData",
+    "TaskExecution",
+    "namedtuple_type",
     
     # 例外クラス
     "DWHError",
@@ -137,6 +269,9 @@ __all__ = [
     "DWHValidationError",
     "DWHConnectionError",
     "DWHUniqueConstraintError",
+    "DWHBusyError",
+    "DWHForeignKeyViolationError",
+    "DWHMergeConflictError",
     
     # タスク管理
     "create_task",
@@ -144,6 +279,7 @@ __all__ = [
     "list_tasks",
     "update_task",
     "delete_task",
+    "get_or_create_tasks",
     
     # 被験者管理
     "create_subject",
@@ -152,21 +288,28 @@ __all__ = [
     "update_subject",
     "delete_subject",
     "find_subject_by_name",
+    "get_or_create_subjects",
     
     # ビデオ管理
     "create_video",
+    "create_videos_bulk",
     "get_video",
+    "get_videos",
     "list_videos",
+    "iter_videos",
     "get_videos_by_subject",
     "update_video",
     "delete_video",
     
     # タグ管理
     "create_tag",
+    "create_tags_bulk",
     "get_tag",
+    "get_tags",
     "get_video_tags",
     "get_task_tags",
     "list_tags",
+    "iter_tags",
     "update_tag",
     "delete_tag",
     "get_tag_duration",
@@ -178,8 +321,12 @@ __all__ = [
     "get_core_lib_version_history",
     "find_core_lib_by_version",
     "find_core_lib_by_commit_hash",
+    "upsert_core_lib_version",
+    "upsert_core_lib_versions",
     "create_core_lib_output",
+    "fan_out_core_lib_outputs",
     "get_core_lib_output",
+    "get_core_lib_outputs",
     "list_core_lib_outputs",
     
     # アルゴリズム管理
@@ -189,13 +336,18 @@ __all__ = [
     "get_algorithm_version_history",
     "find_algorithm_by_version",
     "find_algorithm_by_commit_hash",
+    "upsert_algorithm_version",
+    "upsert_algorithm_versions",
     "create_algorithm_output",
+    "fan_out_algorithm_outputs",
     "get_algorithm_output",
+    "get_algorithm_outputs",
     "list_algorithm_outputs",
     "get_latest_algorithm_version",
     
     # 検索・分析
     "search_task_executions",
+    "iter_task_executions",
     "get_version_history",
     "get_table_statistics",
     "check_data_integrity",
@@ -207,7 +359,9 @@ __all__ = [
     "get_evaluation_result",
     "list_evaluation_results",
     "create_evaluation_data",
+    "load_evaluation_data",
     "list_evaluation_data",
+    "iter_evaluation_data",
     "get_evaluation_overview",
 
     # 課題分析管理
@@ -219,11 +373,22 @@ __all__ = [
     "list_problems",
     "create_analysis_data",
     "list_analysis_data",
+    "iter_analysis_data",
+
+    # インポート
+    "import_file",
+
+    # 課題分析データの一括登録
+    "ingest_analysis_data_dirs",
+
+    # シャード統合
+    "merge_shards",
 
     # スキーマ検証
     "validate_database_schema",
     "get_schema_validation_report",
     "check_database_compatibility",
+    "create_missing_indexes",
     "SchemaValidator",
 ]
 
@@ -0,0 +1,169 @@
+"""
+asyncio 対応API
+
+datawarehouse パッケージの公開API関数を、イベントループをブロックしない
+コルーチンとして提供します。各呼び出しは上限付きのスレッドプールで実行され、
+接続はスレッドごとに接続プール（get_connection）から取得されます。
+iter_* などのジェネレータ関数は非同期イテレータとして提供します。ジェネレータは接続を保持したまま
+反復するため、非同期イテレータごとに専用のスレッドを1つ使い、開始から close() まで同じスレッドで実行します
+（プールされていない接続は作成したスレッド以外では使えないため）。session を渡す場合も同様に、
+そのセッションの接続が実行スレッドで使えること（プールされた接続であること）が必要です。
+
+使用例:
+    from datawarehouse import aio
+
+    async def main():
+        video_id = await aio.create_video("/data/v1", subject_id, "2025-01-01", 120)
+        videos = await aio.list_videos()
+        results = await asyncio.gather(*(aio.get_video(v["video_ID"]) for v in videos))
+        async for tag in aio.iter_tags(video_id=video_id):
+            ...
+"""
+
+import asyncio
+import functools
+import inspect
+import itertools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
+
+import datawarehouse as _package
+from .connection import DEFAULT_POOL_SIZE
+from .queries import DEFAULT_FETCH_CHUNK_SIZE
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("DWH_AIO_MAX_WORKERS", str(DEFAULT_POOL_SIZE)))
+
+# 非同期化しない関数（接続・プール管理は同期的に扱う）
+_EXCLUDED = frozenset({
+    "get_connection",
+    "get_connection_settings",
+    "get_pool",
+    "configure_pool",
+    "get_pool_stats",
+    "close_all_pools",
+    "configure_lock_retry",
+    "get_lock_stats",
+    "reset_lock_stats",
+    "enable_query_stats",
+    "disable_query_stats",
+    "get_query_stats",
+    "reset_query_stats",
+    "enable_slow_query_log",
+    "disable_slow_query_log",
+    "get_statement_cache_stats",
+    "reset_statement_cache_stats",
+})
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_max_workers = DEFAULT_MAX_WORKERS
+
+
+def configure(max_workers: Optional[int] = None) -> None:
+    """
+    非同期APIが使用するスレッドプールを設定
+
+    実行中のスレッドプールは完了を待たずに破棄され、次の呼び出しで新しい設定で作成されます。
+
+    Args:
+        max_workers: 同時に実行するAPI呼び出しの上限（デフォルト: DWH_AIO_MAX_WORKERS または接続プール上限）
+    """
+    global _executor, _max_workers
+    with _executor_lock:
+        if max_workers is not None:
+            if max_workers < 1:
+                raise ValueError("max_workers must be >= 1")
+            _max_workers = max_workers
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def shutdown(wait: bool = True) -> None:
+    """
+    非同期APIのスレッドプールを停止
+
+    Args:
+        wait: 実行中の呼び出しの完了を待つかどうか
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="dwh-aio")
+        return _executor
+
+
+async def run(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    任意の同期関数を非同期APIのスレッドプールで実行
+
+    Args:
+        func: 実行する関数
+        *args, **kwargs: func に渡す引数
+
+    Returns:
+        func の戻り値
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def _make_async(func: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def _next_items(iterator: Iterator) -> List:
+    return list(itertools.islice(iterator, DEFAULT_FETCH_CHUNK_SIZE))
+
+
+def _make_async_iter(func: Callable[..., Iterator]) -> Callable[..., AsyncIterator]:
+    # 専用スレッドへの1回の依頼で DEFAULT_FETCH_CHUNK_SIZE 行ずつ取得する
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dwh-aio-iter")
+        iterator = func(*args, **kwargs)
+        try:
+            while True:
+                items = await loop.run_in_executor(executor, _next_items, iterator)
+                for item in items:
+                    yield item
+                if len(items) < DEFAULT_FETCH_CHUNK_SIZE:
+                    return
+        finally:
+            # 途中で反復をやめた場合も同じスレッドでジェネレータを閉じて接続を返却する
+            try:
+                await loop.run_in_executor(executor, iterator.close)
+            finally:
+                executor.shutdown(wait=False)
+
+    return wrapper
+
+
+__all__ = ["configure", "shutdown", "run"]
+
+for _name in _package.__all__:
+    _func = getattr(_package, _name)
+    if _name in _EXCLUDED or not inspect.isfunction(_func):
+        continue
+    if inspect.isgeneratorfunction(_func):
+        globals()[_name] = _make_async_iter(_func)
+    else:
+        globals()[_name] = _make_async(_func)
+    __all__.append(_name)
+
+del _name, _func
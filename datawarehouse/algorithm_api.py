@@ -4,9 +4,23 @@
 
 import sqlite3
 import re
-from typing import List, Dict, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
 from .exceptions import DWHNotFoundError, DWHConstraintError, DWHValidationError, DWHUniqueConstraintError
-from .connection import get_connection
+from .connection import DWHSession, get_connection
+from .queries import (SUPPORTS_RETURNING, DWHBatchResult, compile_path_template, execute_query, fetch_by_ids,
+                      fetch_list)
+from .records import DWHColumns
+
+# fan_out_algorithm_outputs の output_dir_template で使用できる置換フィールド
+ALGORITHM_OUTPUT_TEMPLATE_FIELDS = {
+    "algorithm_id": "a.algorithm_ID",
+    "algorithm_version": "a.algorithm_version",
+    "core_lib_id": "co.core_lib_ID",
+    "core_lib_output_id": "co.core_lib_output_ID",
+    "core_lib_output_dir": "co.core_lib_output_dir",
+    "video_id": "co.video_ID",
+    "video_dir": "v.video_dir",
+}
 
 
 def _validate_commit_hash(commit_hash: str) -> None:
@@ -21,7 +35,8 @@ def _validate_commit_hash(commit_hash: str) -> None:
 
 def create_algorithm_version(version: str, update_info: str, commit_hash: str, 
                            base_version_id: Optional[int] = None,
-                           db_path: str = "database.db") -> int:
+                           db_path: str = "database.db",
+                             session: Optional[DWHSession] = None) -> int:
     """
     新しいアルゴリズムバージョンを登録
     
@@ -31,6 +46,7 @@ def create_algorithm_version(version: str, update_info: str, commit_hash: str,
         commit_hash: Gitコミットハッシュ（40文字）
         base_version_id: ベースバージョンのID（新規の場合はNone）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         algorithm_ID: 作成されたアルゴリズムのID
@@ -43,7 +59,7 @@ def create_algorithm_version(version: str, update_info: str, commit_hash: str,
     # コミットハッシュの形式検証
     _validate_commit_hash(commit_hash)
     
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -74,13 +90,15 @@ def create_algorithm_version(version: str, update_info: str, commit_hash: str,
             raise DWHConstraintError(f"Failed to create algorithm version: {e}", table_name="algorithm_table") from e
 
 
-def get_algorithm_version(algorithm_id: int, db_path: str = "database.db") -> Dict:
+def get_algorithm_version(algorithm_id: int, db_path: str = "database.db",
+                          session: Optional[DWHSession] = None) -> Dict:
     """
     アルゴリズムIDでバージョン情報を取得
     
     Args:
         algorithm_id: アルゴリズムID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: アルゴリズム情報
@@ -88,17 +106,8 @@ def get_algorithm_version(algorithm_id: int, db_path: str = "database.db") -> Di
     Raises:
         DWHNotFoundError: アルゴリズムが見つからない場合
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT algorithm_ID, algorithm_version, algorithm_update_information, 
-                   algorithm_base_version_ID, algorithm_commit_hash
-            FROM algorithm_table
-            WHERE algorithm_ID = ?
-            """,
-            (algorithm_id,)
-        )
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_algorithm_version", (algorithm_id,))
         
         row = cursor.fetchone()
         if row is None:
@@ -111,42 +120,41 @@ def get_algorithm_version(algorithm_id: int, db_path: str = "database.db") -> Di
         return dict(row)
 
 
-def list_algorithm_versions(db_path: str = "database.db") -> List[Dict]:
+def list_algorithm_versions(db_path: str = "database.db",
+                            session: Optional[DWHSession] = None, *, limit: Optional[int] = None,
+                            after: Optional[str] = None, row_format: str = "dict") -> Union[List[Any], DWHColumns]:
     """
     アルゴリズムバージョン一覧を取得
     
     Args:
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        limit: 1ページの行数（指定時は keyset ページングで DWHPage を返す）
+        after: 前のページの next_after（続きのページを取得する場合）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"。records を参照）
     
     Returns:
-        List[dict]: アルゴリズム情報のリスト
+        List[Any] or DWHColumns: アルゴリズム情報のリスト（limit 指定時は DWHPage）。
+            row_format に応じて dict / tuple / namedtuple / record の行、"columns" の場合は DWHColumns
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT algorithm_ID, algorithm_version, algorithm_update_information, 
-                   algorithm_base_version_ID, algorithm_commit_hash
-            FROM algorithm_table
-            ORDER BY algorithm_ID
-            """
-        )
-        
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_algorithm_versions", limit=limit, after=after, row_format=row_format)
 
 
-def get_algorithm_version_history(algorithm_id: int, db_path: str = "database.db") -> List[Dict]:
+def get_algorithm_version_history(algorithm_id: int, db_path: str = "database.db",
+                                  session: Optional[DWHSession] = None) -> List[Dict]:
     """
     アルゴリズムのバージョン履歴を取得（自己参照をたどる）
     
     Args:
         algorithm_id: 現在のアルゴリズムID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         List[dict]: バージョン履歴のリスト（古い順）
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         
         # 再帰的にバージョン履歴を取得
@@ -175,18 +183,20 @@ def get_algorithm_version_history(algorithm_id: int, db_path: str = "database.db
         return list(reversed(history))
 
 
-def find_algorithm_by_version(version: str, db_path: str = "database.db") -> Optional[Dict]:
+def find_algorithm_by_version(version: str, db_path: str = "database.db",
+                              session: Optional[DWHSession] = None) -> Optional[Dict]:
     """
     バージョン文字列でアルゴリズムを検索
     
     Args:
         version: バージョン文字列
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict or None: アルゴリズム情報（見つからない場合はNone）
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -202,18 +212,20 @@ def find_algorithm_by_version(version: str, db_path: str = "database.db") -> Opt
         return dict(row) if row else None
 
 
-def find_algorithm_by_commit_hash(commit_hash: str, db_path: str = "database.db") -> Optional[Dict]:
+def find_algorithm_by_commit_hash(commit_hash: str, db_path: str = "database.db",
+                                  session: Optional[DWHSession] = None) -> Optional[Dict]:
     """
     コミットハッシュでアルゴリズムを検索
     
     Args:
         commit_hash: コミットハッシュ
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict or None: アルゴリズム情報（見つからない場合はNone）
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -229,8 +241,161 @@ def find_algorithm_by_commit_hash(commit_hash: str, db_path: str = "database.db"
         return dict(row) if row else None
 
 
+def _upsert_algorithm_row(conn: sqlite3.Connection, version: str, update_info: str, commit_hash: str,
+                          base_version_id: Optional[int]) -> int:
+    """
+    コミットハッシュをキーに1行を登録し、既存または新規のアルゴリズムIDを返す
+
+    Raises:
+        DWHConstraintError: ベースバージョンが存在しない場合
+    """
+    values = (version, update_info, base_version_id, commit_hash)
+    try:
+        # 登録済みの場合は書き込みを行わない（競合した INSERT でも AUTOINCREMENT の番号が消費されるため）
+        row = conn.execute(
+            "SELECT algorithm_ID FROM algorithm_table WHERE algorithm_commit_hash = ?",
+            (commit_hash,)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        if SUPPORTS_RETURNING:
+            # 並列実行で競合した場合も RETURNING で既存行のIDを返すため、値を変えない DO UPDATE にする
+            cursor = conn.execute(
+                """
+                INSERT INTO algorithm_table
+                (algorithm_version, algorithm_update_information, algorithm_base_version_ID, algorithm_commit_hash)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(algorithm_commit_hash) DO UPDATE SET algorithm_commit_hash = excluded.algorithm_commit_hash
+                RETURNING algorithm_ID
+                """,
+                values
+            )
+        else:
+            conn.execute(
+                """
+                INSERT INTO algorithm_table
+                (algorithm_version, algorithm_update_information, algorithm_base_version_ID, algorithm_commit_hash)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(algorithm_commit_hash) DO NOTHING
+                """,
+                values
+            )
+            cursor = conn.execute(
+                "SELECT algorithm_ID FROM algorithm_table WHERE algorithm_commit_hash = ?",
+                (commit_hash,)
+            )
+        (algorithm_id,), = cursor.fetchall()
+        return algorithm_id
+    except sqlite3.IntegrityError as e:
+        if "FOREIGN KEY constraint failed" in str(e):
+            raise DWHConstraintError(
+                f"Base version not found: algorithm_ID={base_version_id}",
+                table_name="algorithm_table",
+                constraint_name="FK_base_version"
+            ) from e
+        raise DWHConstraintError(f"Failed to upsert algorithm version: {e}", table_name="algorithm_table") from e
+    except sqlite3.Error as e:
+        raise DWHConstraintError(f"Failed to upsert algorithm version: {e}", table_name="algorithm_table") from e
+
+
+def upsert_algorithm_version(version: str, update_info: str, commit_hash: str,
+                             base_version_id: Optional[int] = None,
+                             db_path: str = "database.db",
+                             session: Optional[DWHSession] = None) -> int:
+    """
+    コミットハッシュをキーにアルゴリズムバージョンを冪等に登録
+
+    INSERT ... ON CONFLICT(algorithm_commit_hash) により1文で登録と既存IDの取得を行うため、
+    並列に実行しても UNIQUE 制約違反になりません。既存の行は更新しません。
+
+    Args:
+        version: バージョン文字列（例: 1.0.0）
+        update_info: 更新内容の説明
+        commit_hash: Gitコミットハッシュ（40文字）
+        base_version_id: ベースバージョンのID（新規の場合はNone）
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+
+    Returns:
+        algorithm_ID: 既存または新規のアルゴリズムのID
+
+    Raises:
+        DWHValidationError: コミットハッシュの形式が不正な場合
+        DWHConstraintError: ベースバージョンが存在しない場合
+    """
+    _validate_commit_hash(commit_hash)
+
+    with get_connection(db_path, session) as conn:
+        return _upsert_algorithm_row(conn, version, update_info, commit_hash, base_version_id)
+
+
+def upsert_algorithm_versions(versions: Iterable[Mapping[str, Any]], db_path: str = "database.db",
+                              session: Optional[DWHSession] = None) -> List[int]:
+    """
+    複数のアルゴリズムバージョンを1トランザクションで冪等に登録（履歴の一括登録用）
+
+    各要素は version, commit_hash と、任意で update_info, base_version_id または base_commit_hash を持つ辞書です。
+    base_commit_hash は同じバッチ内の先行する要素、または登録済みのバージョンを参照できるため、
+    古い順に並べた履歴をそのまま登録できます。いずれかの要素が失敗した場合はバッチ全体をロールバックします。
+
+    Args:
+        versions: 登録するバージョンの辞書のイテラブル
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+
+    Returns:
+        List[int]: 入力順のアルゴリズムID
+
+    Raises:
+        DWHValidationError: 必須キーがない、またはコミットハッシュの形式が不正な場合
+        DWHConstraintError: ベースバージョンが存在しない場合
+    """
+    versions = list(versions)
+    for entry in versions:
+        if "version" not in entry or "commit_hash" not in entry:
+            raise DWHValidationError(
+                f"version and commit_hash are required: {entry!r}",
+                field_name="version/commit_hash",
+                field_value=entry
+            )
+        _validate_commit_hash(entry["commit_hash"])
+        if entry.get("base_commit_hash") is not None:
+            _validate_commit_hash(entry["base_commit_hash"])
+
+    ids: List[int] = []
+    if not versions:
+        return ids
+
+    with get_connection(db_path, session) as conn:
+        known: Dict[str, int] = {}
+        for entry in versions:
+            base_version_id = entry.get("base_version_id")
+            base_commit_hash = entry.get("base_commit_hash")
+            if base_commit_hash is not None:
+                base_version_id = known.get(base_commit_hash)
+                if base_version_id is None:
+                    row = conn.execute(
+                        "SELECT algorithm_ID FROM algorithm_table WHERE algorithm_commit_hash = ?",
+                        (base_commit_hash,)
+                    ).fetchone()
+                    if row is None:
+                        raise DWHConstraintError(
+                            f"Base version not found: algorithm_commit_hash={base_commit_hash}",
+                            table_name="algorithm_table",
+                            constraint_name="FK_base_version"
+                        )
+                    base_version_id = row[0]
+            algorithm_id = _upsert_algorithm_row(
+                conn, entry["version"], entry.get("update_info", ""), entry["commit_hash"], base_version_id
+            )
+            known[entry["commit_hash"]] = algorithm_id
+            ids.append(algorithm_id)
+    return ids
+
+
 def create_algorithm_output(algorithm_id: int, core_lib_output_id: int, output_dir: str,
-                           db_path: str = "database.db") -> int:
+                           db_path: str = "database.db",
+                            session: Optional[DWHSession] = None) -> int:
     """
     アルゴリズムの評価結果を登録
     
@@ -239,6 +404,7 @@ def create_algorithm_output(algorithm_id: int, core_lib_output_id: int, output_d
         core_lib_output_id: コアライブラリ出力ID
         output_dir: 出力ディレクトリパス
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         algorithm_output_ID: 作成された出力のID
@@ -246,7 +412,7 @@ def create_algorithm_output(algorithm_id: int, core_lib_output_id: int, output_d
     Raises:
         DWHConstraintError: アルゴリズムまたはコアライブラリ出力が存在しない場合
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -270,13 +436,87 @@ def create_algorithm_output(algorithm_id: int, core_lib_output_id: int, output_d
             raise DWHConstraintError(f"Failed to create algorithm output: {e}", table_name="algorithm_output_table") from e
 
 
-def get_algorithm_output(output_id: int, db_path: str = "database.db") -> Dict:
+def fan_out_algorithm_outputs(algorithm_id: int, core_lib_id: int, output_dir_template: str,
+                              skip_existing: bool = True, db_path: str = "database.db",
+                              session: Optional[DWHSession] = None) -> Dict:
+    """
+    指定したコアライブラリバージョンの全出力に対してアルゴリズム出力を1回の INSERT ... SELECT で一括登録
+
+    出力ディレクトリは output_dir_template の置換フィールド（{algorithm_id}, {algorithm_version},
+    {core_lib_id}, {core_lib_output_id}, {core_lib_output_dir}, {video_id}, {video_dir}）を
+    SQL側で展開して組み立てます。
+
+    Args:
+        algorithm_id: アルゴリズムID
+        core_lib_id: 対象とするコアライブラリID
+        output_dir_template: 出力ディレクトリのテンプレート（例: "algorithm/{algorithm_version}/{video_id}"）
+        skip_existing: 同じアルゴリズムの出力が既にあるコアライブラリ出力を除外する
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+
+    Returns:
+        dict: inserted（登録した件数）, skipped（既存の出力があり除外した件数）
+
+    Raises:
+        DWHNotFoundError: アルゴリズムまたはコアライブラリが見つからない場合
+        DWHValidationError: テンプレートに未知の置換フィールドがある場合
+        DWHConstraintError: 一括登録に失敗した場合
+    """
+    dir_expr, dir_values = compile_path_template(output_dir_template, ALGORITHM_OUTPUT_TEMPLATE_FIELDS)
+
+    with get_connection(db_path, session) as conn:
+        if conn.execute("SELECT 1 FROM algorithm_table WHERE algorithm_ID = ?", (algorithm_id,)).fetchone() is None:
+            raise DWHNotFoundError(
+                f"Algorithm not found: algorithm_ID={algorithm_id}",
+                table_name="algorithm_table",
+                record_id=algorithm_id
+            )
+        if conn.execute("SELECT 1 FROM core_lib_table WHERE core_lib_ID = ?", (core_lib_id,)).fetchone() is None:
+            raise DWHNotFoundError(
+                f"Core library not found: core_lib_ID={core_lib_id}",
+                table_name="core_lib_table",
+                record_id=core_lib_id
+            )
+
+        selected = conn.execute(
+            "SELECT COUNT(*) FROM core_lib_output_table WHERE core_lib_ID = ?",
+            (core_lib_id,)
+        ).fetchone()[0]
+
+        existing_filter = ""
+        if skip_existing:
+            existing_filter = (
+                "AND NOT EXISTS (SELECT 1 FROM algorithm_output_table ao"
+                " WHERE ao.algorithm_ID = a.algorithm_ID AND ao.core_lib_output_ID = co.core_lib_output_ID)"
+            )
+        try:
+            cursor = conn.execute(
+                f"""
+                INSERT INTO algorithm_output_table (algorithm_ID, core_lib_output_ID, algorithm_output_dir)
+                SELECT a.algorithm_ID, co.core_lib_output_ID, {dir_expr}
+                FROM core_lib_output_table co
+                JOIN algorithm_table a ON a.algorithm_ID = ?
+                LEFT JOIN video_table v ON co.video_ID = v.video_ID
+                WHERE co.core_lib_ID = ? {existing_filter}
+                ORDER BY co.core_lib_output_ID
+                """,
+                dir_values + [algorithm_id, core_lib_id]
+            )
+        except sqlite3.Error as e:
+            raise DWHConstraintError(f"Failed to fan out algorithm outputs: {e}", table_name="algorithm_output_table") from e
+
+        return {"inserted": cursor.rowcount, "skipped": selected - cursor.rowcount}
+
+
+def get_algorithm_output(output_id: int, db_path: str = "database.db",
+                         session: Optional[DWHSession] = None) -> Dict:
     """
     アルゴリズム出力IDで出力情報を取得
     
     Args:
         output_id: 出力ID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: 出力情報
@@ -284,23 +524,8 @@ def get_algorithm_output(output_id: int, db_path: str = "database.db") -> Dict:
     Raises:
         DWHNotFoundError: 出力が見つからない場合
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT ao.algorithm_output_ID, ao.algorithm_ID, ao.core_lib_output_ID, ao.algorithm_output_dir,
-                   al.algorithm_version, al.algorithm_commit_hash,
-                   co.core_lib_output_dir, cl.core_lib_version,
-                   v.video_dir, v.video_date
-            FROM algorithm_output_table ao
-            JOIN algorithm_table al ON ao.algorithm_ID = al.algorithm_ID
-            JOIN core_lib_output_table co ON ao.core_lib_output_ID = co.core_lib_output_ID
-            JOIN core_lib_table cl ON co.core_lib_ID = cl.core_lib_ID
-            JOIN video_table v ON co.video_ID = v.video_ID
-            WHERE ao.algorithm_output_ID = ?
-            """,
-            (output_id,)
-        )
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_algorithm_output", (output_id,))
         
         row = cursor.fetchone()
         if row is None:
@@ -313,8 +538,29 @@ def get_algorithm_output(output_id: int, db_path: str = "database.db") -> Dict:
         return dict(row)
 
 
+def get_algorithm_outputs(output_ids: Iterable[int], db_path: str = "database.db",
+                          session: Optional[DWHSession] = None, *, row_format: str = "dict") -> DWHBatchResult:
+    """
+    複数のアルゴリズム出力IDで出力情報をまとめて取得
+    
+    Args:
+        output_ids: 出力IDのリスト
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record"。records を参照）
+    
+    Returns:
+        DWHBatchResult: 出力ID -> 出力情報（要求した順。見つからなかったIDは missing）
+    """
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_by_ids(conn, "get_algorithm_outputs", "ao.algorithm_output_ID", "algorithm_output_table",
+                            output_ids, row_format)
+
+
 def list_algorithm_outputs(algorithm_id: Optional[int] = None, core_lib_output_id: Optional[int] = None,
-                          db_path: str = "database.db") -> List[Dict]:
+                           db_path: str = "database.db",
+                           session: Optional[DWHSession] = None, *, limit: Optional[int] = None,
+                           after: Optional[str] = None, row_format: str = "dict") -> Union[List[Any], DWHColumns]:
     """
     アルゴリズム出力一覧を取得
     
@@ -322,58 +568,33 @@ def list_algorithm_outputs(algorithm_id: Optional[int] = None, core_lib_output_i
         algorithm_id: アルゴリズムID（指定時はそのバージョンのみ）
         core_lib_output_id: コアライブラリ出力ID（指定時はその出力ベースのみ）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        limit: 1ページの行数（指定時は keyset ページングで DWHPage を返す）
+        after: 前のページの next_after（続きのページを取得する場合）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"。records を参照）
     
     Returns:
-        List[dict]: 出力情報のリスト
+        List[Any] or DWHColumns: 出力情報のリスト（limit 指定時は DWHPage）。
+            row_format に応じて dict / tuple / namedtuple / record の行、"columns" の場合は DWHColumns
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        
-        # 条件の構築
-        conditions = []
-        params = []
-        
-        if algorithm_id is not None:
-            conditions.append("ao.algorithm_ID = ?")
-            params.append(algorithm_id)
-        
-        if core_lib_output_id is not None:
-            conditions.append("ao.core_lib_output_ID = ?")
-            params.append(core_lib_output_id)
-        
-        # SQL構築
-        sql = """
-            SELECT ao.algorithm_output_ID, ao.algorithm_ID, ao.core_lib_output_ID, ao.algorithm_output_dir,
-                   al.algorithm_version, al.algorithm_commit_hash,
-                   co.core_lib_output_dir, cl.core_lib_version,
-                   v.video_dir, v.video_date
-            FROM algorithm_output_table ao
-            JOIN algorithm_table al ON ao.algorithm_ID = al.algorithm_ID
-            JOIN core_lib_output_table co ON ao.core_lib_output_ID = co.core_lib_output_ID
-            JOIN core_lib_table cl ON co.core_lib_ID = cl.core_lib_ID
-            JOIN video_table v ON co.video_ID = v.video_ID
-        """
-        
-        if conditions:
-            sql += " WHERE " + " AND ".join(conditions)
-        
-        sql += " ORDER BY v.video_date, al.algorithm_ID"
-        
-        cursor.execute(sql, params)
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_algorithm_outputs", limit=limit, after=after, row_format=row_format,
+                          algorithm_id=algorithm_id, core_lib_output_id=core_lib_output_id)
 
 
-def get_latest_algorithm_version(db_path: str = "database.db") -> Optional[Dict]:
+def get_latest_algorithm_version(db_path: str = "database.db",
+                                 session: Optional[DWHSession] = None) -> Optional[Dict]:
     """
     最新のアルゴリズムバージョンを取得
     
     Args:
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict or None: 最新のアルゴリズム情報（レコードがない場合はNone）
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -12,7 +12,7 @@
 """
 
 import sqlite3
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional, Union
 from datetime import datetime
 
 from .exceptions import (
@@ -20,7 +20,9 @@ from .exceptions import (
     DWHConstraintError,
     DWHValidationError,
 )
-from .connection import get_connection
+from .connection import DWHSession, get_connection
+from .queries import DEFAULT_FETCH_CHUNK_SIZE, execute_query, fetch_list, iter_query
+from .records import DWHColumns
 
 
 def _validate_timestamp_format(timestamp_text: Optional[str]) -> None:
@@ -44,6 +46,7 @@ def create_analysis_result(
     evaluation_result_id: int,
     analysis_timestamp: Optional[str] = None,
     db_path: str = "database.db",
+    session: Optional[DWHSession] = None,
 ) -> int:
     """
     課題分析結果（1実行あたり1レコード）を登録。
@@ -52,7 +55,7 @@ def create_analysis_result(
     """
     _validate_timestamp_format(analysis_timestamp)
 
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -77,17 +80,10 @@ def create_analysis_result(
             ) from e
 
 
-def get_analysis_result(analysis_result_id: int, db_path: str = "database.db") -> Dict:
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT analysis_result_ID, analysis_result_dir, analysis_timestamp, evaluation_result_ID
-            FROM analysis_result_table
-            WHERE analysis_result_ID = ?
-            """,
-            (analysis_result_id,),
-        )
+def get_analysis_result(analysis_result_id: int, db_path: str = "database.db",
+                        session: Optional[DWHSession] = None) -> Dict:
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_analysis_result", (analysis_result_id,))
         row = cursor.fetchone()
         if row is None:
             raise DWHNotFoundError(
@@ -99,29 +95,13 @@ def get_analysis_result(analysis_result_id: int, db_path: str = "database.db") -
 
 
 def list_analysis_results(
-    evaluation_result_id: Optional[int] = None, db_path: str = "database.db"
-) -> List[Dict]:
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        if evaluation_result_id is None:
-            cursor.execute(
-                """
-                SELECT analysis_result_ID, analysis_result_dir, analysis_timestamp, evaluation_result_ID
-                FROM analysis_result_table
-                ORDER BY analysis_result_ID DESC
-                """
-            )
-            return [dict(r) for r in cursor.fetchall()]
-        cursor.execute(
-            """
-            SELECT analysis_result_ID, analysis_result_dir, analysis_timestamp, evaluation_result_ID
-            FROM analysis_result_table
-            WHERE evaluation_result_ID = ?
-            ORDER BY analysis_result_ID DESC
-            """,
-            (evaluation_result_id,),
-        )
-        return [dict(r) for r in cursor.fetchall()]
+    evaluation_result_id: Optional[int] = None, db_path: str = "database.db",
+                          session: Optional[DWHSession] = None, *, limit: Optional[int] = None,
+                          after: Optional[str] = None, row_format: str = "dict"
+) -> Union[List[Any], DWHColumns]:
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_analysis_results", limit=limit, after=after, row_format=row_format,
+                          evaluation_result_id=evaluation_result_id)
 
 
 # =============== problem_table ===============
@@ -132,8 +112,9 @@ def create_problem(
     problem_status: str,
     analysis_result_id: int,
     db_path: str = "database.db",
+    session: Optional[DWHSession] = None,
 ) -> int:
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -158,17 +139,10 @@ def create_problem(
             ) from e
 
 
-def get_problem(problem_id: int, db_path: str = "database.db") -> Dict:
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT problem_ID, problem_name, problem_description, problem_status, analysis_result_ID
-            FROM problem_table
-            WHERE problem_ID = ?
-            """,
-            (problem_id,),
-        )
+def get_problem(problem_id: int, db_path: str = "database.db",
+                session: Optional[DWHSession] = None) -> Dict:
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_problem", (problem_id,))
         row = cursor.fetchone()
         if row is None:
             raise DWHNotFoundError(
@@ -180,29 +154,13 @@ def get_problem(problem_id: int, db_path: str = "database.db") -> Dict:
 
 
 def list_problems(
-    analysis_result_id: Optional[int] = None, db_path: str = "database.db"
-) -> List[Dict]:
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        if analysis_result_id is None:
-            cursor.execute(
-                """
-                SELECT problem_ID, problem_name, problem_description, problem_status, analysis_result_ID
-                FROM problem_table
-                ORDER BY problem_ID DESC
-                """
-            )
-            return [dict(r) for r in cursor.fetchall()]
-        cursor.execute(
-            """
-            SELECT problem_ID, problem_name, problem_description, problem_status, analysis_result_ID
-            FROM problem_table
-            WHERE analysis_result_ID = ?
-            ORDER BY problem_ID DESC
-            """,
-            (analysis_result_id,),
-        )
-        return [dict(r) for r in cursor.fetchall()]
+    analysis_result_id: Optional[int] = None, db_path: str = "database.db",
+                  session: Optional[DWHSession] = None, *, limit: Optional[int] = None,
+                  after: Optional[str] = None, row_format: str = "dict"
+) -> Union[List[Any], DWHColumns]:
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_problems", limit=limit, after=after, row_format=row_format,
+                          analysis_result_id=analysis_result_id)
 
 
 # =============== analysis_data_table ===============
@@ -215,6 +173,7 @@ def create_analysis_data(
     analysis_data_description: str,
     problem_id: Optional[int] = None,
     db_path: str = "database.db",
+    session: Optional[DWHSession] = None,
 ) -> int:
     """
     課題分析データの登録。
@@ -235,7 +194,7 @@ def create_analysis_data(
             field_value=problem_id,
         )
 
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -274,31 +233,30 @@ def list_analysis_data(
     analysis_result_id: Optional[int] = None,
     evaluation_data_id: Optional[int] = None,
     db_path: str = "database.db",
-) -> List[Dict]:
-    """分析データの一覧取得（任意フィルタ）"""
-    where = []
-    params: List = []
-    if analysis_result_id is not None:
-        where.append("ad.analysis_result_ID = ?")
-        params.append(analysis_result_id)
-    if evaluation_data_id is not None:
-        where.append("ad.evaluation_data_ID = ?")
-        params.append(evaluation_data_id)
+    session: Optional[DWHSession] = None,
+    *,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    row_format: str = "dict",
+) -> Union[List[Any], DWHColumns]:
+    """分析データの一覧取得（任意フィルタ。limit 指定時は keyset ページングで DWHPage を返す。行の形式は row_format で選択）"""
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_analysis_data", limit=limit, after=after, row_format=row_format,
+                          analysis_result_id=analysis_result_id, evaluation_data_id=evaluation_data_id)
 
-    sql = (
-        """
-        SELECT ad.analysis_data_ID, ad.evaluation_data_ID, ad.analysis_result_ID, ad.problem_ID,
-               ad.analysis_data_isproblem, ad.analysis_data_dir, ad.analysis_data_description
-        FROM analysis_data_table ad
-        """
-    )
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY ad.analysis_data_ID DESC"
 
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql, params)
-        return [dict(r) for r in cursor.fetchall()]
+def iter_analysis_data(
+    analysis_result_id: Optional[int] = None,
+    evaluation_data_id: Optional[int] = None,
+    chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE,
+    db_path: str = "database.db",
+    session: Optional[DWHSession] = None,
+    *,
+    row_format: str = "dict",
+) -> Iterator[Any]:
+    """分析データを1行ずつ返すジェネレータ（list_analysis_data のストリーミング版。接続は読み終えたとき・close() 時に返却）"""
+    with get_connection(db_path, session, read_only=True) as conn:
+        yield from iter_query(conn, "list_analysis_data", chunk_size=chunk_size, row_format=row_format,
+                              analysis_result_id=analysis_result_id, evaluation_data_id=evaluation_data_id)
 
 
@@ -0,0 +1,293 @@
+"""
+課題分析データディレクトリの一括登録
+
+評価データごとに作成された課題分析データのディレクトリをルートから探索し、各ディレクトリのメタデータ
+（analysis.json）をプロセスプールで並列に解析します。解析した行は batch_size 件ごとに DWHWriter の
+単一の書き込み接続へ送り、executemany でまとめて analysis_data_table に登録します。
+
+解析中・書き込み待ちのバッチ数には上限があり、書き込みが追いつかない場合は探索と解析の投入を止めます
+（バックプレッシャー）。そのためディレクトリ数によらずメモリ使用量は一定です。
+
+analysis.json の形式（キーは analysis_data_table の列名。大文字小文字は区別しない）:
+    {
+        "evaluation_data_ID": 123,
+        "analysis_data_isproblem": 1,
+        "problem_ID": 4,
+        "analysis_data_description": "..."
+    }
+"""
+
+import collections
+import itertools
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from .analysis_api import get_analysis_result
+from .connection import DWHSession, DWHWriter, get_connection
+from .exceptions import DWHConstraintError, DWHValidationError
+from .queries import fetch_existing_ids
+
+# 課題分析データのディレクトリに置くメタデータファイル名
+ANALYSIS_METADATA_FILE = "analysis.json"
+
+# 1回の書き込み（executemany）あたりのディレクトリ数
+DEFAULT_ANALYSIS_BATCH_SIZE = 500
+
+# 解析値の行: (evaluation_data_ID, problem_ID, analysis_data_isproblem, analysis_data_description)
+AnalysisRow = Tuple[int, Optional[int], int, Optional[str]]
+
+
+def _require_int(key: str, value: Any) -> int:
+    """整数値（bool は除く）であることを検証"""
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise DWHValidationError(
+            f"{key} must be an integer: {value!r}",
+            field_name=key,
+            field_value=value
+        )
+    return value
+
+
+def parse_analysis_data_dir(directory: Union[str, Path]) -> AnalysisRow:
+    """
+    課題分析データのディレクトリの analysis.json を解析
+
+    プロセスプールのワーカーで実行されます。独自の形式を解析する場合は、同じ戻り値を返す
+    モジュールレベルの関数（pickle 可能なもの）を ingest_analysis_data_dirs() の parser に指定します。
+
+    Args:
+        directory: 課題分析データのディレクトリ
+
+    Returns:
+        tuple: (evaluation_data_ID, problem_ID, analysis_data_isproblem, analysis_data_description)
+
+    Raises:
+        DWHValidationError: ファイルが読めない・形式が不正・値が不正な場合
+    """
+    path = Path(directory) / ANALYSIS_METADATA_FILE
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            record = json.load(f)
+    except (OSError, ValueError) as e:
+        raise DWHValidationError(
+            f"Cannot read {path}: {e}",
+            field_name="analysis_data_dir",
+            field_value=str(directory)
+        ) from e
+    if not isinstance(record, dict):
+        raise DWHValidationError(
+            f"{path}: expected a JSON object",
+            field_name="analysis_data_dir",
+            field_value=str(directory)
+        )
+    values = {key.lower(): value for key, value in record.items()}
+
+    evaluation_data_id = _require_int("evaluation_data_ID", values.get("evaluation_data_id"))
+    isproblem = values.get("analysis_data_isproblem", 0)
+    if isinstance(isproblem, bool):
+        isproblem = int(isproblem)
+    if isproblem not in (0, 1):
+        raise DWHValidationError(
+            f"analysis_data_isproblem must be 0 or 1: {isproblem!r}",
+            field_name="analysis_data_isproblem",
+            field_value=isproblem
+        )
+    problem_id = values.get("problem_id")
+    if problem_id is not None:
+        problem_id = _require_int("problem_ID", problem_id)
+    if isproblem == 1 and not problem_id:
+        raise DWHValidationError(
+            "problem_ID is required when analysis_data_isproblem == 1",
+            field_name="problem_ID",
+            field_value=problem_id
+        )
+    description = values.get("analysis_data_description")
+    if description is not None and not isinstance(description, str):
+        raise DWHValidationError(
+            f"analysis_data_description must be a string: {description!r}",
+            field_name="analysis_data_description",
+            field_value=description
+        )
+    return evaluation_data_id, problem_id, isproblem, description
+
+
+def _parse_directories(directories: List[str],
+                       parser: Callable[[str], AnalysisRow]) -> List[Tuple[str, Optional[AnalysisRow], Optional[str]]]:
+    """ワーカーで1バッチ分のディレクトリを解析（例外は pickle できない場合があるため文字列で返す）"""
+    parsed = []
+    for directory in directories:
+        try:
+            parsed.append((directory, parser(directory), None))
+        except Exception as e:
+            parsed.append((directory, None, str(e)))
+    return parsed
+
+
+def _find_analysis_dirs(root: Path) -> Iterator[str]:
+    """メタデータファイルを持つディレクトリをパス順に列挙"""
+    for current, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if ANALYSIS_METADATA_FILE in filenames:
+            yield current
+
+
+def _insert_analysis_rows(analysis_result_id: int, rows: List[Tuple[str, AnalysisRow]],
+                          session: Optional[DWHSession] = None) -> Tuple[int, List[Dict]]:
+    """
+    DWHWriter 上で1バッチ分の行の参照先をまとめて確認し、executemany で登録
+
+    Returns:
+        tuple: (登録した件数, 登録できなかった行のリスト)
+    """
+    failures: List[Dict] = []
+    with get_connection(session=session) as conn:
+        evaluation_data_ids = fetch_existing_ids(conn, "evaluation_data_table", "evaluation_data_ID",
+                                                 {values[0] for _, values in rows})
+        problem_ids = fetch_existing_ids(conn, "problem_table", "problem_ID",
+                                         {values[1] for _, values in rows if values[1] is not None})
+        valid = []
+        for directory, (evaluation_data_id, problem_id, isproblem, description) in rows:
+            if evaluation_data_id in evaluation_data_ids and (problem_id is None or problem_id in problem_ids):
+                valid.append((evaluation_data_id, analysis_result_id, problem_id, isproblem, directory, description))
+                continue
+            failures.append({
+                "path": directory,
+                "error": DWHConstraintError(
+                    f"FK not found: evaluation_data_ID={evaluation_data_id}, problem_ID={problem_id}",
+                    table_name="analysis_data_table",
+                    constraint_name="FKs_analysis_data"
+                ),
+            })
+        if valid:
+            try:
+                conn.executemany(
+                    """
+                    INSERT INTO analysis_data_table
+                    (evaluation_data_ID, analysis_result_ID, problem_ID, analysis_data_isproblem,
+                     analysis_data_dir, analysis_data_description)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    valid
+                )
+            except sqlite3.Error as e:
+                raise DWHConstraintError(
+                    f"Failed to create analysis data: {e}",
+                    table_name="analysis_data_table"
+                ) from e
+    return len(valid), failures
+
+
+def ingest_analysis_data_dirs(root: Union[str, Path], analysis_result_id: int,
+                              parser: Callable[[str], AnalysisRow] = parse_analysis_data_dir,
+                              max_workers: Optional[int] = None,
+                              batch_size: int = DEFAULT_ANALYSIS_BATCH_SIZE,
+                              max_pending_batches: Optional[int] = None,
+                              profile: Optional[str] = None,
+                              progress: Optional[Callable[[int, float], None]] = None,
+                              db_path: str = "database.db") -> Dict:
+    """
+    ルート以下の課題分析データのディレクトリをプロセスプールで解析し、単一の書き込み接続で一括登録
+
+    analysis.json を持つディレクトリを課題分析データ1件とし、analysis_data_dir には
+    データベースファイルのあるディレクトリからの相対パスを登録します。
+    書き込みはバッチごとにコミットするため、途中で失敗した場合もそれまでのバッチは登録されたままです。
+
+    Args:
+        root: 課題分析データのディレクトリを探索するルート
+        analysis_result_id: 登録する課題分析データが属する課題分析結果ID
+        parser: ディレクトリを解析する関数（ワーカープロセスで実行。既定は parse_analysis_data_dir）
+        max_workers: 解析に使うプロセス数（None の場合は CPU 数）
+        batch_size: 1回の解析タスク・書き込みあたりのディレクトリ数
+        max_pending_batches: 解析中・書き込み待ちのそれぞれで保持するバッチ数の上限（None の場合はプロセス数の2倍）
+        profile: 書き込み接続の接続プロファイル名（大量登録には "ingest" を推奨）
+        progress: バッチの書き込みごとに (処理済みディレクトリ数, 経過秒) で呼ばれるコールバック
+        db_path: データベースファイルのパス
+
+    Returns:
+        dict: inserted, failed, failures（path: ディレクトリ, error: DWHValidationError または
+              DWHConstraintError）, batches, elapsed_sec, rows_per_sec
+
+    Raises:
+        DWHNotFoundError: 課題分析結果が存在しない場合
+        DWHValidationError: ルートや引数が不正な場合
+        DWHConstraintError: バッチの挿入そのものが失敗した場合
+    """
+    root = Path(root)
+    if not root.is_dir():
+        raise DWHValidationError(
+            f"Directory not found: {root}",
+            field_name="root",
+            field_value=str(root)
+        )
+    if batch_size <= 0:
+        raise DWHValidationError(
+            f"batch_size must be positive: {batch_size}",
+            field_name="batch_size",
+            field_value=batch_size
+        )
+    get_analysis_result(analysis_result_id, db_path=db_path)
+
+    base_dir = Path(db_path).resolve().parent
+    started = time.perf_counter()
+    totals = {"inserted": 0, "failed": 0, "batches": 0}
+    failures: List[Dict] = []
+    parsing: Deque[Future] = collections.deque()
+    writing: Deque[Future] = collections.deque()
+
+    def finish_write(future: Future) -> None:
+        inserted, batch_failures = future.result()
+        totals["inserted"] += inserted
+        totals["failed"] += len(batch_failures)
+        totals["batches"] += 1
+        failures.extend(batch_failures)
+        if progress is not None:
+            progress(totals["inserted"] + totals["failed"], time.perf_counter() - started)
+
+    def hand_off(future: Future, writer: DWHWriter, limit: int) -> None:
+        rows = []
+        for directory, values, error in future.result():
+            relative = Path(os.path.relpath(directory, base_dir)).as_posix()
+            if error is None:
+                rows.append((relative, values))
+                continue
+            totals["failed"] += 1
+            failures.append({
+                "path": relative,
+                "error": DWHValidationError(error, field_name="analysis_data_dir", field_value=relative),
+            })
+        if rows:
+            writing.append(writer.submit(_insert_analysis_rows, analysis_result_id, rows))
+        while len(writing) > limit:
+            finish_write(writing.popleft())
+
+    workers = max_workers or os.cpu_count() or 1
+    limit = max_pending_batches or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool, DWHWriter(db_path, profile=profile) as writer:
+        directories = _find_analysis_dirs(root.resolve())
+        while True:
+            batch = list(itertools.islice(directories, batch_size))
+            if not batch:
+                break
+            parsing.append(pool.submit(_parse_directories, batch, parser))
+            if len(parsing) >= limit:
+                hand_off(parsing.popleft(), writer, limit)
+        while parsing:
+            hand_off(parsing.popleft(), writer, limit)
+        while writing:
+            finish_write(writing.popleft())
+
+    failures.sort(key=lambda failure: failure["path"])
+    elapsed = time.perf_counter() - started
+    return {
+        "inserted": totals["inserted"],
+        "failed": totals["failed"],
+        "failures": failures,
+        "batches": totals["batches"],
+        "elapsed_sec": elapsed,
+        "rows_per_sec": (totals["inserted"] / elapsed) if elapsed > 0 else 0.0,
+    }
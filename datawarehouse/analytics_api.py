@@ -3,14 +3,18 @@
 """
 
 import sqlite3
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional, Union
 from .exceptions import DWHConstraintError
-from .connection import get_connection
+from .connection import DWHSession, get_connection
+from .queries import DEFAULT_FETCH_CHUNK_SIZE, execute_query, fetch_list, iter_query
+from .records import DWHColumns
 
 
 def search_task_executions(task_set: Optional[int] = None, subject_id: Optional[int] = None,
                           date_from: Optional[str] = None, date_to: Optional[str] = None,
-                          db_path: str = "database.db") -> List[Dict]:
+                          db_path: str = "database.db",
+                           session: Optional[DWHSession] = None, *,
+                           row_format: str = "dict") -> Union[List[Any], DWHColumns]:
     """
     タスク実行状況を検索
     
@@ -20,57 +24,48 @@ def search_task_executions(task_set: Optional[int] = None, subject_id: Optional[
         date_from: 開始日（YYYY-MM-DD）
         date_to: 終了日（YYYY-MM-DD）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"。records を参照）
     
     Returns:
-        List[dict]: タスク実行情報のリスト
+        List[Any] or DWHColumns: タスク実行情報のリスト。row_format に応じて dict / tuple / TaskExecutionRow /
+            TaskExecution の行、"columns" の場合は DWHColumns
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        
-        # 条件の構築
-        conditions = []
-        params = []
-        
-        if task_set is not None:
-            conditions.append("tk.task_set = ?")
-            params.append(task_set)
-        
-        if subject_id is not None:
-            conditions.append("s.subject_ID = ?")
-            params.append(subject_id)
-        
-        if date_from is not None:
-            conditions.append("v.video_date >= ?")
-            params.append(date_from)
-        
-        if date_to is not None:
-            conditions.append("v.video_date <= ?")
-            params.append(date_to)
-        
-        # SQL構築
-        sql = """
-            SELECT t.tag_ID, 
-                   tk.task_ID, tk.task_set, tk.task_name, tk.task_describe,
-                   s.subject_ID, s.subject_name,
-                   v.video_ID, v.video_dir, v.video_date, v.video_length,
-                   t.start, t.end,
-                   (t.end - t.start) as frame_count
-            FROM tag_table t
-            JOIN task_table tk ON t.task_ID = tk.task_ID
-            JOIN video_table v ON t.video_ID = v.video_ID
-            JOIN subject_table s ON v.subject_ID = s.subject_ID
-        """
-        
-        if conditions:
-            sql += " WHERE " + " AND ".join(conditions)
-        
-        sql += " ORDER BY v.video_date, tk.task_set, tk.task_ID, t.start"
-        
-        cursor.execute(sql, params)
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "search_task_executions", row_format=row_format, task_set=task_set,
+                          subject_id=subject_id, date_from=date_from, date_to=date_to)
+
+
+def iter_task_executions(task_set: Optional[int] = None, subject_id: Optional[int] = None,
+                         date_from: Optional[str] = None, date_to: Optional[str] = None,
+                         chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE, db_path: str = "database.db",
+                         session: Optional[DWHSession] = None, *, row_format: str = "dict") -> Iterator[Any]:
+    """
+    タスク実行状況の検索結果を1行ずつ返すジェネレータ（search_task_executions のストリーミング版）
 
+    接続は最後まで読み終えたとき、または close() されたときに返却されます。途中で読むのをやめる場合は
+    contextlib.closing() で囲むか close() を呼んでください。
 
-def get_version_history(table_name: str, current_id: int, db_path: str = "database.db") -> List[Dict]:
+    Args:
+        task_set: タスクセット番号
+        subject_id: 被験者ID
+        date_from: 開始日（YYYY-MM-DD）
+        date_to: 終了日（YYYY-MM-DD）
+        chunk_size: fetchmany で1回に取得する行数
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record"。records を参照）
+
+    Yields:
+        Any: タスク実行情報（row_format に応じて dict / tuple / TaskExecutionRow / TaskExecution）
+    """
+    with get_connection(db_path, session, read_only=True) as conn:
+        yield from iter_query(conn, "search_task_executions", chunk_size=chunk_size, row_format=row_format,
+                              task_set=task_set, subject_id=subject_id, date_from=date_from, date_to=date_to)
+
+
+def get_version_history(table_name: str, current_id: int, db_path: str = "database.db",
+                        session: Optional[DWHSession] = None) -> List[Dict]:
     """
     バージョン履歴を取得（自己参照テーブル用）
     
@@ -78,6 +73,7 @@ def get_version_history(table_name: str, current_id: int, db_path: str = "databa
         table_name: テーブル名（'core_lib_table' または 'algorithm_table'）
         current_id: 現在のバージョンID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         List[dict]: バージョン履歴のリスト
@@ -87,10 +83,10 @@ def get_version_history(table_name: str, current_id: int, db_path: str = "databa
     """
     if table_name == "core_lib_table":
         from .core_lib_api import get_core_lib_version_history
-        return get_core_lib_version_history(current_id, db_path)
+        return get_core_lib_version_history(current_id, db_path, session)
     elif table_name == "algorithm_table":
         from .algorithm_api import get_algorithm_version_history
-        return get_algorithm_version_history(current_id, db_path)
+        return get_algorithm_version_history(current_id, db_path, session)
     else:
         raise DWHConstraintError(
             f"Invalid table name: {table_name}. Expected 'core_lib_table' or 'algorithm_table'.",
@@ -98,17 +94,19 @@ def get_version_history(table_name: str, current_id: int, db_path: str = "databa
         )
 
 
-def get_table_statistics(db_path: str = "database.db") -> Dict[str, int]:
+def get_table_statistics(db_path: str = "database.db",
+                         session: Optional[DWHSession] = None) -> Dict[str, int]:
     """
     全テーブルの件数統計を取得
     
     Args:
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: テーブル名と件数の辞書
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         
         # テーブル一覧を取得
@@ -131,17 +129,19 @@ def get_table_statistics(db_path: str = "database.db") -> Dict[str, int]:
         return statistics
 
 
-def check_data_integrity(db_path: str = "database.db") -> Dict[str, any]:
+def check_data_integrity(db_path: str = "database.db",
+                         session: Optional[DWHSession] = None) -> Dict[str, any]:
     """
     データ整合性をチェック
     
     Args:
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: 整合性チェック結果
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         
         result = {
@@ -220,62 +220,37 @@ def check_data_integrity(db_path: str = "database.db") -> Dict[str, any]:
 
 
 def get_processing_pipeline_summary(video_id: Optional[int] = None, 
-                                   db_path: str = "database.db") -> List[Dict]:
+                                   db_path: str = "database.db",
+                                    session: Optional[DWHSession] = None) -> List[Dict]:
     """
     処理パイプラインの概要を取得
     
     Args:
         video_id: ビデオID（指定時はそのビデオのみ）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         List[dict]: パイプライン情報のリスト
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        
-        # 条件の構築
-        where_clause = ""
-        params = []
-        
-        if video_id is not None:
-            where_clause = "WHERE v.video_ID = ?"
-            params.append(video_id)
-        
-        # SQL実行
-        sql = f"""
-            SELECT v.video_ID, v.video_dir, v.video_date,
-                   s.subject_name,
-                   co.core_lib_output_ID, cl.core_lib_version,
-                   ao.algorithm_output_ID, al.algorithm_version,
-                   COUNT(t.tag_ID) as tag_count
-            FROM video_table v
-            JOIN subject_table s ON v.subject_ID = s.subject_ID
-            LEFT JOIN core_lib_output_table co ON v.video_ID = co.video_ID
-            LEFT JOIN core_lib_table cl ON co.core_lib_ID = cl.core_lib_ID
-            LEFT JOIN algorithm_output_table ao ON co.core_lib_output_ID = ao.core_lib_output_ID
-            LEFT JOIN algorithm_table al ON ao.algorithm_ID = al.algorithm_ID
-            LEFT JOIN tag_table t ON v.video_ID = t.video_ID
-            {where_clause}
-            GROUP BY v.video_ID, co.core_lib_output_ID, ao.algorithm_output_ID
-            ORDER BY v.video_date, v.video_ID
-        """
-        
-        cursor.execute(sql, params)
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_processing_pipeline_summary", video_id=video_id)
         return [dict(row) for row in cursor.fetchall()]
 
 
-def get_performance_metrics(db_path: str = "database.db") -> Dict[str, any]:
+def get_performance_metrics(db_path: str = "database.db",
+                            session: Optional[DWHSession] = None) -> Dict[str, any]:
     """
     パフォーマンスメトリクスを取得
     
     Args:
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: パフォーマンス情報
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         
         metrics = {}
@@ -8,11 +8,16 @@ DataWareHouse CLI - コマンドラインインターフェース
 import argparse
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
-from .connection import DWHConnection
+from .connection import CONNECTION_PROFILES, DWHConnection, get_connection_settings
 from . import exceptions
-from .validation import get_schema_validation_report, check_database_compatibility
+from .algorithm_api import fan_out_algorithm_outputs
+from .analysis_ingest import DEFAULT_ANALYSIS_BATCH_SIZE, ingest_analysis_data_dirs
+from .core_lib_api import fan_out_core_lib_outputs
+from .importer import DEFAULT_IMPORT_BATCH_SIZE, IMPORT_FORMATS, import_file
+from .merge import merge_shards
+from .validation import SchemaValidator, get_schema_validation_report, check_database_compatibility, create_missing_indexes
 
 
 def create_database(db_path: str, schema_path: Optional[str] = None) -> None:
@@ -55,15 +60,19 @@ def create_database(db_path: str, schema_path: Optional[str] = None) -> None:
         sys.exit(1)
 
 
-def show_database_info(db_path: str) -> None:
+def show_database_info(db_path: str, profile: Optional[str] = None) -> None:
     """
     データベースの構造情報を表示する
 
+    読み取り専用接続で開くため、プロファイルの journal_mode はデータベースファイルに適用しません。
+
     Args:
         db_path: データベースファイルのパス
+        profile: 接続プロファイル名（省略時は DWH_CONNECTION_PROFILE または "safe"）
     """
     try:
-        with DWHConnection(db_path) as conn:
+        dwh_connection = DWHConnection(db_path, profile=profile, read_only=True)
+        with dwh_connection as conn:
             # テーブル一覧を取得
             cursor = conn.execute("""
                 SELECT name FROM sqlite_master
@@ -79,6 +88,16 @@ def show_database_info(db_path: str) -> None:
 
             print("=== DataWareHouse データベース構造 ===")
             print(f"データベース: {db_path}")
+            print(f"接続プロファイル: {dwh_connection.profile}")
+            profile_settings = CONNECTION_PROFILES[dwh_connection.profile]
+            print("  設定: " + ", ".join(f"{name}={value}" for name, value in profile_settings.items()))
+            settings = get_connection_settings(conn)
+            print("  現在の値: " + ", ".join(f"{name}={value}" for name, value in settings.items()))
+            journal_mode = str(settings["journal_mode"]).upper()
+            if "journal_mode" in profile_settings and journal_mode != profile_settings["journal_mode"]:
+                print(f"  ※ journal_mode は書き込み接続を開いたときに {profile_settings['journal_mode']} に切り替わります")
+            elif "journal_mode" not in profile_settings and journal_mode == "WAL":
+                print("  ※ このプロファイルは WAL のデータベースを元のジャーナルモードに戻しません")
             print()
 
             for table_row in tables:
@@ -151,6 +170,203 @@ def validate_schema(db_path: str) -> None:
         sys.exit(1)
 
 
+def migrate_database(db_path: str) -> None:
+    """
+    既存のデータベースに不足している推奨インデックスを追加する
+
+    Args:
+        db_path: データベースファイルのパス
+    """
+    try:
+        if not Path(db_path).exists():
+            print(f"エラー: データベースファイルが見つかりません: {db_path}")
+            sys.exit(1)
+
+        created = create_missing_indexes(db_path)
+        if created:
+            for index_name in created:
+                print(f"  インデックスを作成しました: {index_name}")
+        else:
+            print("追加が必要なインデックスはありません")
+
+    except exceptions.DWHError as e:
+        print(f"DataWareHouseエラー: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"予期せぬエラー: {e}")
+        sys.exit(1)
+
+
+def fan_out_core_lib(db_path: str, core_lib_id: int, output_dir_template: str,
+                     subject_id: Optional[int] = None, date_from: Optional[str] = None,
+                     date_to: Optional[str] = None, skip_existing: bool = True) -> None:
+    """
+    選択したビデオ全体にコアライブラリ出力を一括登録する
+
+    Args:
+        db_path: データベースファイルのパス
+        core_lib_id: コアライブラリID
+        output_dir_template: 出力ディレクトリのテンプレート
+        subject_id: 被験者IDで絞り込む
+        date_from: 取得日の下限
+        date_to: 取得日の上限
+        skip_existing: 既存の出力があるビデオを除外する
+    """
+    try:
+        if not Path(db_path).exists():
+            print(f"エラー: データベースファイルが見つかりません: {db_path}")
+            sys.exit(1)
+
+        result = fan_out_core_lib_outputs(
+            core_lib_id, output_dir_template, subject_id=subject_id,
+            date_from=date_from, date_to=date_to, skip_existing=skip_existing, db_path=db_path
+        )
+        print(f"コアライブラリ出力を登録しました: {result['inserted']}件（既存のため除外: {result['skipped']}件）")
+
+    except exceptions.DWHError as e:
+        print(f"DataWareHouseエラー: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"予期せぬエラー: {e}")
+        sys.exit(1)
+
+
+def fan_out_algorithm(db_path: str, algorithm_id: int, core_lib_id: int, output_dir_template: str,
+                      skip_existing: bool = True) -> None:
+    """
+    コアライブラリバージョンの全出力にアルゴリズム出力を一括登録する
+
+    Args:
+        db_path: データベースファイルのパス
+        algorithm_id: アルゴリズムID
+        core_lib_id: 対象とするコアライブラリID
+        output_dir_template: 出力ディレクトリのテンプレート
+        skip_existing: 既存の出力があるコアライブラリ出力を除外する
+    """
+    try:
+        if not Path(db_path).exists():
+            print(f"エラー: データベースファイルが見つかりません: {db_path}")
+            sys.exit(1)
+
+        result = fan_out_algorithm_outputs(
+            algorithm_id, core_lib_id, output_dir_template, skip_existing=skip_existing, db_path=db_path
+        )
+        print(f"アルゴリズム出力を登録しました: {result['inserted']}件（既存のため除外: {result['skipped']}件）")
+
+    except exceptions.DWHError as e:
+        print(f"DataWareHouseエラー: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"予期せぬエラー: {e}")
+        sys.exit(1)
+
+
+def import_table(db_path: str, table_name: str, file_path: str, file_format: Optional[str] = None,
+                 batch_size: int = DEFAULT_IMPORT_BATCH_SIZE, profile: Optional[str] = None) -> None:
+    """
+    CSV / JSONL ファイルをテーブルにインポートする
+
+    Args:
+        db_path: データベースファイルのパス
+        table_name: インポート先のテーブル名
+        file_path: インポートするファイルのパス（.gz 可）
+        file_format: "csv" または "jsonl"（省略時は拡張子から判定）
+        batch_size: 1トランザクションあたりの行数
+        profile: 接続プロファイル名
+    """
+    try:
+        if not Path(db_path).exists():
+            print(f"エラー: データベースファイルが見つかりません: {db_path}")
+            sys.exit(1)
+
+        def report(rows: int, elapsed: float) -> None:
+            print(f"  {rows:,}行 ({rows / elapsed if elapsed > 0 else 0.0:,.0f} rows/s)", file=sys.stderr)
+
+        result = import_file(table_name, file_path, file_format=file_format, batch_size=batch_size,
+                             profile=profile, progress=report, db_path=db_path)
+        print(f"{table_name} に {result['inserted']:,}行をインポートしました "
+              f"({result['elapsed_sec']:.2f}秒, {result['rows_per_sec']:,.0f} rows/s, "
+              f"{result['batches']}トランザクション)")
+
+    except exceptions.DWHError as e:
+        print(f"DataWareHouseエラー: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"予期せぬエラー: {e}")
+        sys.exit(1)
+
+
+def ingest_analysis(db_path: str, root: str, analysis_result_id: int, workers: Optional[int] = None,
+                    batch_size: int = DEFAULT_ANALYSIS_BATCH_SIZE, profile: Optional[str] = None) -> None:
+    """
+    課題分析データのディレクトリを並列に解析して一括登録する
+
+    Args:
+        db_path: データベースファイルのパス
+        root: 課題分析データのディレクトリを探索するルート
+        analysis_result_id: 課題分析結果ID
+        workers: 解析に使うプロセス数
+        batch_size: 1回の書き込みあたりのディレクトリ数
+        profile: 書き込み接続の接続プロファイル名
+    """
+    try:
+        if not Path(db_path).exists():
+            print(f"エラー: データベースファイルが見つかりません: {db_path}")
+            sys.exit(1)
+
+        def report(count: int, elapsed: float) -> None:
+            print(f"  {count:,}件 ({count / elapsed if elapsed > 0 else 0.0:,.0f} dirs/s)", file=sys.stderr)
+
+        result = ingest_analysis_data_dirs(root, analysis_result_id, max_workers=workers, batch_size=batch_size,
+                                           profile=profile, progress=report, db_path=db_path)
+        for failure in result['failures']:
+            print(f"  失敗: {failure['path']}: {failure['error']}")
+        print(f"課題分析データを {result['inserted']:,}件登録しました (失敗: {result['failed']:,}件, "
+              f"{result['elapsed_sec']:.2f}秒, {result['rows_per_sec']:,.0f} rows/s)")
+
+    except exceptions.DWHError as e:
+        print(f"DataWareHouseエラー: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"予期せぬエラー: {e}")
+        sys.exit(1)
+
+
+def merge_shard_databases(db_path: str, shard_paths: List[str], profile: Optional[str] = None) -> None:
+    """
+    ワーカーごとのシャードデータベースを中央のデータベースに統合する
+
+    Args:
+        db_path: 統合先（中央）のデータベースファイルのパス
+        shard_paths: シャードのデータベースファイルのパスのリスト
+        profile: 接続プロファイル名
+    """
+    try:
+        if not Path(db_path).exists():
+            print(f"エラー: データベースファイルが見つかりません: {db_path}")
+            sys.exit(1)
+
+        result = merge_shards(shard_paths, db_path=db_path, profile=profile)
+        for shard in result['shards']:
+            added = ", ".join(f"{table}: {count:,}" for table, count in shard['inserted'].items() if count)
+            print(f"  {shard['shard']}: {added or '追加なし'}")
+        print(f"{len(result['shards'])}個のシャードを統合しました "
+              f"({sum(result['inserted'].values()):,}行追加, {result['elapsed_sec']:.2f}秒)")
+
+    except exceptions.DWHMergeConflictError as e:
+        print(f"コミットハッシュの衝突: {e}")
+        for conflict in e.conflicts:
+            print(f"  {conflict['commit_hash']}: シャード={conflict['shard_version']} "
+                  f"中央={conflict['central_version']}")
+        sys.exit(1)
+    except exceptions.DWHError as e:
+        print(f"DataWareHouseエラー: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"予期せぬエラー: {e}")
+        sys.exit(1)
+
+
 def main() -> None:
     """メインエントリーポイント"""
     parser = argparse.ArgumentParser(
@@ -164,9 +380,28 @@ def main() -> None:
   # データベース構造の表示
   dwh-cli info database.db
 
+  # 接続プロファイルを指定して表示
+  dwh-cli info database.db --profile analytics
+
   # データベーススキーマ検証
   dwh-cli validate database.db
 
+  # CSV / JSONL（gzip可）をテーブルにインポート
+  dwh-cli import video_table videos.csv --db database.db
+  dwh-cli import evaluation_data_table eval.jsonl.gz --db database.db --profile ingest
+
+  # コアライブラリ出力を全ビデオに一括登録
+  dwh-cli fan-out-core-lib database.db 3 "core_lib/{core_lib_version}/{video_id}"
+
+  # コアライブラリ3の全出力にアルゴリズム出力を一括登録
+  dwh-cli fan-out-algorithm database.db 5 3 "algorithm/{algorithm_version}/{video_id}"
+
+  # 課題分析データのディレクトリを並列に解析して一括登録
+  dwh-cli ingest-analysis database.db analysis/run_01 12 --workers 8 --profile ingest
+
+  # ワーカーごとのシャードを中央のデータベースに統合
+  dwh-cli merge database.db shard_worker1.db shard_worker2.db --profile ingest
+
   # ヘルプ表示
   dwh-cli --help
         """
@@ -203,6 +438,11 @@ def main() -> None:
         'db_path',
         help='確認するデータベースファイルのパス'
     )
+    info_parser.add_argument(
+        '--profile',
+        choices=sorted(CONNECTION_PROFILES),
+        help='接続プロファイル（デフォルト: 環境変数 DWH_CONNECTION_PROFILE または safe）'
+    )
 
     # validate コマンド
     validate_parser = subparsers.add_parser(
@@ -214,6 +454,115 @@ def main() -> None:
         help='検証するデータベースファイルのパス'
     )
 
+    # migrate コマンド
+    migrate_parser = subparsers.add_parser(
+        'migrate',
+        help='既存のデータベースに不足している推奨インデックスを追加する'
+    )
+    migrate_parser.add_argument(
+        'db_path',
+        help='移行するデータベースファイルのパス'
+    )
+
+    # fan-out-core-lib コマンド
+    fan_out_core_lib_parser = subparsers.add_parser(
+        'fan-out-core-lib',
+        help='選択したビデオ全体にコアライブラリ出力を一括登録する'
+    )
+    fan_out_core_lib_parser.add_argument('db_path', help='データベースファイルのパス')
+    fan_out_core_lib_parser.add_argument('core_lib_id', type=int, help='コアライブラリID')
+    fan_out_core_lib_parser.add_argument(
+        'output_dir_template',
+        help='出力ディレクトリのテンプレート（{video_id}, {video_dir}, {video_date}, {subject_id}, '
+             '{core_lib_id}, {core_lib_version} を置換）'
+    )
+    fan_out_core_lib_parser.add_argument('--subject-id', type=int, help='被験者IDで絞り込む')
+    fan_out_core_lib_parser.add_argument('--date-from', help='取得日の下限（YYYY-MM-DD）')
+    fan_out_core_lib_parser.add_argument('--date-to', help='取得日の上限（YYYY-MM-DD）')
+    fan_out_core_lib_parser.add_argument(
+        '--include-existing',
+        action='store_true',
+        help='既に同じコアライブラリの出力があるビデオも登録する'
+    )
+
+    # fan-out-algorithm コマンド
+    fan_out_algorithm_parser = subparsers.add_parser(
+        'fan-out-algorithm',
+        help='コアライブラリバージョンの全出力にアルゴリズム出力を一括登録する'
+    )
+    fan_out_algorithm_parser.add_argument('db_path', help='データベースファイルのパス')
+    fan_out_algorithm_parser.add_argument('algorithm_id', type=int, help='アルゴリズムID')
+    fan_out_algorithm_parser.add_argument('core_lib_id', type=int, help='対象とするコアライブラリID')
+    fan_out_algorithm_parser.add_argument(
+        'output_dir_template',
+        help='出力ディレクトリのテンプレート（{algorithm_id}, {algorithm_version}, {core_lib_id}, '
+             '{core_lib_output_id}, {core_lib_output_dir}, {video_id}, {video_dir} を置換）'
+    )
+    fan_out_algorithm_parser.add_argument(
+        '--include-existing',
+        action='store_true',
+        help='既に同じアルゴリズムの出力があるコアライブラリ出力も登録する'
+    )
+
+    # import コマンド
+    import_parser = subparsers.add_parser(
+        'import',
+        help='CSV / JSONL（gzip可）ファイルをテーブルにインポートする'
+    )
+    import_parser.add_argument(
+        'table',
+        choices=sorted(SchemaValidator.EXPECTED_TABLES),
+        help='インポート先のテーブル名'
+    )
+    import_parser.add_argument('file', help='インポートするファイルのパス（.csv / .jsonl、.gz 可）')
+    import_parser.add_argument('--db', default='database.db', help='データベースファイルのパス（デフォルト: database.db）')
+    import_parser.add_argument('--format', choices=IMPORT_FORMATS, help='ファイル形式（デフォルト: 拡張子から判定）')
+    import_parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=DEFAULT_IMPORT_BATCH_SIZE,
+        help=f'1トランザクションあたりの行数（デフォルト: {DEFAULT_IMPORT_BATCH_SIZE}）'
+    )
+    import_parser.add_argument(
+        '--profile',
+        choices=sorted(CONNECTION_PROFILES),
+        help='接続プロファイル（大量インポートには ingest を推奨）'
+    )
+
+    # ingest-analysis コマンド
+    ingest_analysis_parser = subparsers.add_parser(
+        'ingest-analysis',
+        help='課題分析データのディレクトリ（analysis.json）を並列に解析して一括登録する'
+    )
+    ingest_analysis_parser.add_argument('db_path', help='データベースファイルのパス')
+    ingest_analysis_parser.add_argument('root', help='課題分析データのディレクトリを探索するルート')
+    ingest_analysis_parser.add_argument('analysis_result_id', type=int, help='課題分析結果ID')
+    ingest_analysis_parser.add_argument('--workers', type=int, help='解析に使うプロセス数（デフォルト: CPU数）')
+    ingest_analysis_parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=DEFAULT_ANALYSIS_BATCH_SIZE,
+        help=f'1回の書き込みあたりのディレクトリ数（デフォルト: {DEFAULT_ANALYSIS_BATCH_SIZE}）'
+    )
+    ingest_analysis_parser.add_argument(
+        '--profile',
+        choices=sorted(CONNECTION_PROFILES),
+        help='接続プロファイル（大量登録には ingest を推奨）'
+    )
+
+    # merge コマンド
+    merge_parser = subparsers.add_parser(
+        'merge',
+        help='ワーカーごとのシャードデータベースを中央のデータベースに統合する'
+    )
+    merge_parser.add_argument('db_path', help='統合先（中央）のデータベースファイルのパス')
+    merge_parser.add_argument('shards', nargs='+', help='シャードのデータベースファイルのパス')
+    merge_parser.add_argument(
+        '--profile',
+        choices=sorted(CONNECTION_PROFILES),
+        help='接続プロファイル（大量の統合には ingest を推奨）'
+    )
+
     args = parser.parse_args()
 
     if args.command is None:
@@ -223,9 +572,23 @@ def main() -> None:
     if args.command == 'create-db':
         create_database(args.db_path, args.schema)
     elif args.command == 'info':
-        show_database_info(args.db_path)
+        show_database_info(args.db_path, args.profile)
     elif args.command == 'validate':
         validate_schema(args.db_path)
+    elif args.command == 'migrate':
+        migrate_database(args.db_path)
+    elif args.command == 'import':
+        import_table(args.db, args.table, args.file, args.format, args.batch_size, args.profile)
+    elif args.command == 'ingest-analysis':
+        ingest_analysis(args.db_path, args.root, args.analysis_result_id, args.workers, args.batch_size, args.profile)
+    elif args.command == 'merge':
+        merge_shard_databases(args.db_path, args.shards, args.profile)
+    elif args.command == 'fan-out-core-lib':
+        fan_out_core_lib(args.db_path, args.core_lib_id, args.output_dir_template,
+                         args.subject_id, args.date_from, args.date_to, not args.include_existing)
+    elif args.command == 'fan-out-algorithm':
+        fan_out_algorithm(args.db_path, args.algorithm_id, args.core_lib_id, args.output_dir_template,
+                          not args.include_existing)
     else:
         parser.print_help()
 
@@ -2,74 +2,1531 @@
 DataWareHouse データベース接続管理
 """
 
+import atexit
+import json
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import random
+import re
 import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
-from .exceptions import DWHConnectionError
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from .exceptions import (
+    DWHBusyError,
+    DWHConnectionError,
+    DWHError,
+    DWHForeignKeyViolationError,
+    DWHValidationError,
+)
+
+
+# プール設定のデフォルト値（環境変数で上書き可能）
+DEFAULT_POOL_SIZE = int(os.environ.get("DWH_POOL_SIZE", "8"))
+DEFAULT_IDLE_TIMEOUT = float(os.environ.get("DWH_POOL_IDLE_TIMEOUT", "300"))
+DEFAULT_HEALTH_CHECK_INTERVAL = float(os.environ.get("DWH_POOL_HEALTH_CHECK_INTERVAL", "30"))
+POOLING_ENABLED = os.environ.get("DWH_POOL_DISABLED", "") not in ("1", "true", "yes")
+
+# 接続ごとにコンパイル済みで保持するSQL文の数（queries.py の全バリエーションが収まる大きさ）
+DEFAULT_STATEMENT_CACHE_SIZE = int(os.environ.get("DWH_STATEMENT_CACHE_SIZE", "256"))
+
+# ロック競合時の待機・再試行設定のデフォルト値（環境変数で上書き可能）
+DEFAULT_BUSY_TIMEOUT_MS = int(os.environ.get("DWH_BUSY_TIMEOUT_MS", "5000"))
+DEFAULT_LOCK_RETRIES = int(os.environ.get("DWH_LOCK_RETRIES", "5"))
+DEFAULT_LOCK_RETRY_BASE_DELAY = float(os.environ.get("DWH_LOCK_RETRY_BASE_DELAY", "0.05"))
+DEFAULT_LOCK_RETRY_MAX_DELAY = float(os.environ.get("DWH_LOCK_RETRY_MAX_DELAY", "2.0"))
+
+# クエリ統計（レイテンシ分位点は呼び出しごとの標本を最大この件数だけ保持して算出）
+QUERY_STATS_SAMPLE_SIZE = 1024
+
+# スロークエリログのデフォルト値（DWH_SLOW_QUERY_LOG にファイルパスを設定するとインポート時に有効化）
+DEFAULT_SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("DWH_SLOW_QUERY_MS", "100"))
+DEFAULT_SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_SLOW_QUERY_LOG_BACKUP_COUNT = 5
+
+# 接続モード
+MODE_READ_WRITE = "rw"
+MODE_READ_ONLY = "ro"
+MODE_IMMUTABLE = "immutable"
+
+# 接続プロファイル（接続ごとに適用する PRAGMA 設定）
+# - safe: 従来どおりのジャーナルモードのまま、コミットごとに確実に同期する
+# - ingest: WAL で読み取りを書き込みと並行させ、同期を NORMAL に緩めて取り込みを高速化
+# - analytics: WAL + 大きめのページキャッシュと mmap で読み取り中心の処理を高速化
+# journal_mode=WAL はデータベースファイルに永続化される点に注意（safe は WAL のファイルを元に戻さない）
+CONNECTION_PROFILES: Dict[str, Dict[str, Union[str, int]]] = {
+    "safe": {
+        "synchronous": "FULL",
+    },
+    "ingest": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,        # 64 MiB
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,      # 256 MiB
+    },
+    "analytics": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -262144,       # 256 MiB
+        "temp_store": "MEMORY",
+        "mmap_size": 1073741824,     # 1 GiB
+    },
+}
+DEFAULT_PROFILE = "safe"
+
+
+def resolve_profile(profile: Optional[str] = None) -> str:
+    """
+    使用する接続プロファイル名を決定
+
+    Args:
+        profile: プロファイル名（None の場合は環境変数 DWH_CONNECTION_PROFILE、未設定なら "safe"）
+
+    Returns:
+        str: プロファイル名
+
+    Raises:
+        DWHValidationError: 未知のプロファイル名の場合
+    """
+    name = profile or os.environ.get("DWH_CONNECTION_PROFILE") or DEFAULT_PROFILE
+    if name not in CONNECTION_PROFILES:
+        raise DWHValidationError(
+            f"Unknown connection profile: {name}. Expected one of {sorted(CONNECTION_PROFILES)}",
+            field_name="profile",
+            field_value=name
+        )
+    return name
+
+
+def resolve_mode(read_only: bool = False, immutable: Optional[bool] = None) -> str:
+    """
+    接続モードを決定
+
+    Args:
+        read_only: 読み取り専用で開くかどうか
+        immutable: 読み取り専用時に immutable=1 で開くかどうか（None の場合は環境変数
+                   DWH_READ_IMMUTABLE に従う。True を指定すると read_only も有効になる）
+
+    Returns:
+        str: MODE_READ_WRITE, MODE_READ_ONLY, MODE_IMMUTABLE のいずれか
+    """
+    if immutable:
+        return MODE_IMMUTABLE
+    if not read_only:
+        return MODE_READ_WRITE
+    if immutable is None and os.environ.get("DWH_READ_IMMUTABLE", "") in ("1", "true", "yes"):
+        return MODE_IMMUTABLE
+    return MODE_READ_ONLY
+
+
+def _connect_database(db_path: str, mode: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """接続モードに応じて sqlite3 接続を作成"""
+    if mode == MODE_READ_WRITE:
+        return sqlite3.connect(db_path, check_same_thread=check_same_thread,
+                               factory=_InstrumentedConnection,
+                               cached_statements=DEFAULT_STATEMENT_CACHE_SIZE)
+    # 読み取り専用は URI で開く（immutable はファイルが変更されない前提でロックも取らない）
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    if mode == MODE_IMMUTABLE:
+        uri += "&immutable=1"
+    return sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread,
+                           factory=_InstrumentedConnection,
+                           cached_statements=DEFAULT_STATEMENT_CACHE_SIZE)
+
+
+def apply_profile(conn: sqlite3.Connection, profile: str, mode: str = MODE_READ_WRITE) -> None:
+    """
+    接続にプロファイルの PRAGMA 設定を適用
+
+    Args:
+        conn: 対象の接続
+        profile: resolve_profile() で決定したプロファイル名
+        mode: 接続モード（読み取り専用接続では journal_mode を変更しない）
+    """
+    settings = CONNECTION_PROFILES[profile]
+    # journal_mode は他の設定より先に切り替える
+    if "journal_mode" in settings and mode == MODE_READ_WRITE:
+        conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}").fetchone()
+    for name, value in settings.items():
+        if name != "journal_mode":
+            conn.execute(f"PRAGMA {name} = {value}")
+
+
+def get_connection_settings(conn: sqlite3.Connection) -> Dict[str, Union[str, int]]:
+    """
+    接続に実際に適用されている性能関連の PRAGMA 値を取得
+
+    Args:
+        conn: 対象の接続
+
+    Returns:
+        dict: journal_mode, synchronous, cache_size, temp_store, mmap_size, foreign_keys の値
+    """
+    settings = {}
+    for name in ("journal_mode", "synchronous", "cache_size", "temp_store", "mmap_size", "foreign_keys"):
+        row = conn.execute(f"PRAGMA {name}").fetchone()
+        settings[name] = row[0] if row is not None else None
+    return settings
+
+
+class _LatencyStats:
+    """呼び出し回数・取得行数・レイテンシ（標本から p50/p99 を算出）の集計"""
+
+    __slots__ = ("calls", "rows", "total", "max", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+
+    def add(self, elapsed: float, rows: int) -> None:
+        self.calls += 1
+        self.rows += rows
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        # リザーバサンプリングで全期間から一様に標本を保持
+        if len(self.samples) < QUERY_STATS_SAMPLE_SIZE:
+            self.samples.append(elapsed)
+        else:
+            index = random.randrange(self.calls)
+            if index < QUERY_STATS_SAMPLE_SIZE:
+                self.samples[index] = elapsed
+
+    def to_dict(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, max(math.ceil(p / 100.0 * len(ordered)) - 1, 0))] * 1000.0
+
+        return {
+            "calls": self.calls,
+            "rows": self.rows,
+            "total_ms": self.total * 1000.0,
+            "avg_ms": (self.total / self.calls * 1000.0) if self.calls else 0.0,
+            "p50_ms": percentile(50),
+            "p99_ms": percentile(99),
+            "max_ms": self.max * 1000.0,
+        }
+
+
+_query_stats_enabled = os.environ.get("DWH_QUERY_STATS", "") in ("1", "true", "yes")
+_query_stats_lock = threading.Lock()
+_statement_stats: Dict[str, _LatencyStats] = {}
+_api_stats: Dict[str, _LatencyStats] = {}
+_api_calls = threading.local()
+
+
+_slow_query_log: Optional[Dict[str, Any]] = None
+_slow_query_logger = logging.getLogger("datawarehouse.slow_query")
+_slow_query_logger.propagate = False
+_instrumented = _query_stats_enabled
+
+_EXPLAINABLE_SQL = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b", re.IGNORECASE)
+
+
+def _update_instrumentation() -> None:
+    """クエリ統計またはスロークエリログが有効なら計測用カーソルを使用"""
+    global _instrumented
+    _instrumented = _query_stats_enabled or _slow_query_log is not None
+
+
+def enable_query_stats() -> None:
+    """SQL文ごと・API関数ごとのクエリ統計の記録を開始"""
+    global _query_stats_enabled
+    _query_stats_enabled = True
+    _update_instrumentation()
+
+
+def disable_query_stats() -> None:
+    """クエリ統計の記録を停止（記録済みの統計は保持）"""
+    global _query_stats_enabled
+    _query_stats_enabled = False
+    _update_instrumentation()
+
+
+def reset_query_stats() -> None:
+    """記録済みのクエリ統計を破棄"""
+    with _query_stats_lock:
+        _statement_stats.clear()
+        _api_stats.clear()
+
+
+def get_query_stats() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    クエリ統計を取得
+
+    Returns:
+        dict: {"statements": {SQL文: 統計}, "api": {API関数名: 統計}}
+              統計は calls, rows, total_ms, avg_ms, p50_ms, p99_ms, max_ms
+              （API関数の統計は get_connection() のブロック単位）
+    """
+    with _query_stats_lock:
+        return {
+            "statements": {sql: stats.to_dict() for sql, stats in _statement_stats.items()},
+            "api": {name: stats.to_dict() for name, stats in _api_stats.items()},
+        }
+
+
+def enable_slow_query_log(path: str = "dwh_slow_queries.jsonl",
+                          threshold_ms: float = DEFAULT_SLOW_QUERY_THRESHOLD_MS,
+                          max_bytes: int = DEFAULT_SLOW_QUERY_LOG_MAX_BYTES,
+                          backup_count: int = DEFAULT_SLOW_QUERY_LOG_BACKUP_COUNT) -> None:
+    """
+    スロークエリログを有効化
+
+    実行・取得にかかった時間が閾値以上のSQL文について、SQL、パラメータの型、所要時間、
+    取得行数、呼び出し元のAPI関数名、EXPLAIN QUERY PLAN の結果を1行1レコードのJSONで記録します。
+
+    Args:
+        path: ログファイルのパス
+        threshold_ms: 記録する所要時間の閾値（ミリ秒）
+        max_bytes: ログファイルをローテーションするサイズ（バイト）
+        backup_count: 保持するローテーション済みファイル数
+    """
+    global _slow_query_log
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    disable_slow_query_log()
+    _slow_query_logger.addHandler(handler)
+    _slow_query_logger.setLevel(logging.INFO)
+    _slow_query_log = {"path": path, "threshold": threshold_ms / 1000.0, "handler": handler}
+    _update_instrumentation()
+
+
+def disable_slow_query_log() -> None:
+    """スロークエリログを無効化してログファイルを閉じる"""
+    global _slow_query_log
+    slow_log, _slow_query_log = _slow_query_log, None
+    _update_instrumentation()
+    if slow_log is not None:
+        _slow_query_logger.removeHandler(slow_log["handler"])
+        slow_log["handler"].close()
+
+
+def _describe_parameters(parameters) -> Union[str, List[str], Dict[str, str]]:
+    """パラメータの値は記録せず、型の並びだけを返す"""
+    if isinstance(parameters, str):
+        return parameters
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    try:
+        return [type(value).__name__ for value in parameters]
+    except TypeError:
+        return type(parameters).__name__
+
+
+def _explain_query_plan(conn: sqlite3.Connection, sql: str, parameters) -> Optional[List[Dict]]:
+    if not _EXPLAINABLE_SQL.match(sql) or isinstance(parameters, str):
+        return None
+    try:
+        # 計測用の execute を経由しないよう基底クラスのメソッドで実行
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    except sqlite3.Error as e:
+        return [{"error": str(e)}]
+    return [{"id": row[0], "parent": row[1], "detail": row[3]} for row in rows]
+
+
+def _log_slow_query(conn: sqlite3.Connection, sql: str, parameters, elapsed: float,
+                    rows: int, api_name: Optional[str]) -> None:
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+        "api": api_name,
+        "sql": " ".join(sql.split()),
+        "params": _describe_parameters(parameters),
+        "duration_ms": round(elapsed * 1000.0, 3),
+        "rows": rows,
+        "plan": _explain_query_plan(conn, sql, parameters),
+    }
+    _slow_query_logger.info(json.dumps(record, ensure_ascii=False))
+
+
+def _current_api_call() -> Optional[List]:
+    stack = getattr(_api_calls, "stack", None)
+    return stack[-1] if stack else None
+
+
+def _record_statement(sql: str, elapsed: float, rows: int) -> None:
+    key = " ".join(sql.split())
+    with _query_stats_lock:
+        stats = _statement_stats.get(key)
+        if stats is None:
+            stats = _statement_stats[key] = _LatencyStats()
+        stats.add(elapsed, rows)
+
+
+class _InstrumentedCursor(sqlite3.Cursor):
+    """実行・取得にかかった時間と取得行数を記録するカーソル（クエリ統計・スロークエリログの有効時のみ使用）"""
+
+    _statement: Optional[List] = None
+    _api_call: Optional[List] = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        self._statement = [sql, 0.0, 0, parameters]
+        self._api_call = _current_api_call()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._statement[1] += time.perf_counter() - started
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        self._statement = [sql, 0.0, 0, "executemany"]
+        self._api_call = _current_api_call()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._statement[1] += time.perf_counter() - started
+            self._finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._track(started, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._track(started, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._track(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._track(started, 0, True)
+            raise
+        self._track(started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+    def _track(self, started: float, rows: int, exhausted: bool) -> None:
+        statement = self._statement
+        if statement is None:
+            return
+        statement[1] += time.perf_counter() - started
+        statement[2] += rows
+        if self._api_call is not None:
+            self._api_call[1] += rows
+        if exhausted:
+            self._finish()
+
+    def _finish(self) -> None:
+        statement, self._statement = self._statement, None
+        api_call, self._api_call = self._api_call, None
+        if statement is None:
+            return
+        sql, elapsed, rows, parameters = statement
+        if _query_stats_enabled:
+            _record_statement(sql, elapsed, rows)
+        slow_log = _slow_query_log
+        if slow_log is not None and elapsed >= slow_log["threshold"]:
+            _log_slow_query(self.connection, sql, parameters, elapsed, rows,
+                            api_call[0] if api_call is not None else None)
+
+
+class _InstrumentedConnection(sqlite3.Connection):
+    """クエリ統計・スロークエリログの有効時に _InstrumentedCursor を使用する接続"""
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = _InstrumentedCursor if _instrumented else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        if _instrumented:
+            return self.cursor().execute(sql, parameters)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if _instrumented:
+            return self.cursor().executemany(sql, seq_of_parameters)
+        return super().executemany(sql, seq_of_parameters)
+
+
+if os.environ.get("DWH_SLOW_QUERY_LOG"):
+    enable_slow_query_log(os.environ["DWH_SLOW_QUERY_LOG"])
+
+
+class _ApiCallScope:
+    """get_connection() のブロックをAPI関数の1回の呼び出しとして計測するラッパー"""
+
+    def __init__(self, scope, api_name: str):
+        self.scope = scope
+        self.api_name = api_name
+        self._call: Optional[List] = None
+        self._stack: List[List] = []
+        self._started = 0.0
+
+    def __enter__(self) -> sqlite3.Connection:
+        stack = getattr(_api_calls, "stack", None)
+        if stack is None:
+            stack = _api_calls.stack = []
+        self._call = [self.api_name, 0]
+        self._stack = stack
+        stack.append(self._call)
+        self._started = time.perf_counter()
+        try:
+            return self.scope.__enter__()
+        except BaseException:
+            stack.pop()
+            raise
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            return self.scope.__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            elapsed = time.perf_counter() - self._started
+            # iter_* のジェネレータは yield をまたいでスコープを保持するため、終了順が入れ子にならないことがある
+            stack = self._stack
+            for index in range(len(stack) - 1, -1, -1):
+                if stack[index] is self._call:
+                    del stack[index]
+                    break
+            name, rows = self._call
+            if _query_stats_enabled:
+                with _query_stats_lock:
+                    stats = _api_stats.get(name)
+                    if stats is None:
+                        stats = _api_stats[name] = _LatencyStats()
+                    stats.add(elapsed, rows)
+
+
+_lock_policy: Dict[str, float] = {
+    "busy_timeout_ms": DEFAULT_BUSY_TIMEOUT_MS,
+    "max_retries": DEFAULT_LOCK_RETRIES,
+    "base_delay": DEFAULT_LOCK_RETRY_BASE_DELAY,
+    "max_delay": DEFAULT_LOCK_RETRY_MAX_DELAY,
+}
+_lock_stats_lock = threading.Lock()
+
+
+def _empty_lock_stats() -> Dict:
+    return {
+        "begins": 0,
+        "commits": 0,
+        "retries": 0,
+        "busy_errors": 0,
+        "lock_wait_time_total": 0.0,
+        "lock_wait_time_max": 0.0,
+    }
+
+
+_lock_stats = _empty_lock_stats()
+
+
+def configure_lock_retry(busy_timeout_ms: Optional[int] = None, max_retries: Optional[int] = None,
+                         base_delay: Optional[float] = None,
+                         max_delay: Optional[float] = None) -> Dict[str, float]:
+    """
+    書き込みロック競合時の待機・再試行ポリシーを変更
+
+    Args:
+        busy_timeout_ms: 各接続の busy_timeout（ミリ秒。SQLite内部でロック解放を待つ時間）
+        max_retries: busy_timeout 経過後に BEGIN IMMEDIATE / COMMIT を再試行する最大回数
+        base_delay: 再試行間隔の基準秒数（試行ごとに倍増し、0〜その値の範囲でランダム化）
+        max_delay: 再試行間隔の上限秒数
+
+    Returns:
+        dict: 変更後のポリシー
+    """
+    if busy_timeout_ms is not None:
+        _lock_policy["busy_timeout_ms"] = busy_timeout_ms
+    if max_retries is not None:
+        _lock_policy["max_retries"] = max_retries
+    if base_delay is not None:
+        _lock_policy["base_delay"] = base_delay
+    if max_delay is not None:
+        _lock_policy["max_delay"] = max_delay
+    return dict(_lock_policy)
+
+
+def get_lock_stats() -> Dict:
+    """
+    書き込みロック競合の統計を取得
+
+    Returns:
+        dict: begins, commits, retries, busy_errors, lock_wait_ms_total, lock_wait_ms_avg, lock_wait_ms_max
+    """
+    with _lock_stats_lock:
+        stats = dict(_lock_stats)
+    operations = stats["begins"] + stats["commits"]
+    total = stats.pop("lock_wait_time_total")
+    stats["lock_wait_ms_total"] = total * 1000.0
+    stats["lock_wait_ms_avg"] = (total / operations * 1000.0) if operations else 0.0
+    stats["lock_wait_ms_max"] = stats.pop("lock_wait_time_max") * 1000.0
+    return stats
+
+
+def reset_lock_stats() -> None:
+    """書き込みロック競合の統計をリセット"""
+    global _lock_stats
+    with _lock_stats_lock:
+        _lock_stats = _empty_lock_stats()
+
+
+def _apply_busy_timeout(conn: sqlite3.Connection) -> None:
+    timeout_ms = int(_lock_policy["busy_timeout_ms"])
+    # プールから再利用する接続は設定が変わったときだけ PRAGMA を発行
+    if getattr(conn, "_busy_timeout_ms", None) != timeout_ms:
+        conn.execute(f"PRAGMA busy_timeout = {timeout_ms}")
+        conn._busy_timeout_ms = timeout_ms
+
+
+def _is_lock_error(error: sqlite3.OperationalError) -> bool:
+    # sqlite_errorcode は Python 3.11 以降（拡張エラーコードの下位8ビットが基本コード）
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return (code & 0xFF) in (5, 6)  # SQLITE_BUSY, SQLITE_LOCKED
+    message = str(error)
+    return "database is locked" in message or "database is busy" in message
+
+
+def _with_lock_retry(operation: Callable[[], Any], kind: str, db_path: str) -> None:
+    """
+    ロック競合（SQLITE_BUSY / SQLITE_LOCKED）時に指数バックオフ＋ジッターで再試行
+
+    Args:
+        operation: 実行する処理（BEGIN IMMEDIATE または COMMIT）
+        kind: 統計上の種別（"begins" または "commits"）
+        db_path: エラーメッセージ用のデータベースファイルのパス
+
+    Raises:
+        DWHBusyError: 再試行回数を使い切ってもロックを取得できなかった場合
+    """
+    started = time.perf_counter()
+    retries = 0
+    busy_error = None
+    while True:
+        try:
+            operation()
+            break
+        except sqlite3.OperationalError as e:
+            if not _is_lock_error(e):
+                raise
+            if retries >= _lock_policy["max_retries"]:
+                busy_error = e
+                break
+            retries += 1
+            delay = min(_lock_policy["max_delay"], _lock_policy["base_delay"] * 2 ** (retries - 1))
+            time.sleep(random.uniform(0, delay))
+
+    waited = time.perf_counter() - started
+    with _lock_stats_lock:
+        _lock_stats[kind] += 1
+        _lock_stats["retries"] += retries
+        _lock_stats["lock_wait_time_total"] += waited
+        _lock_stats["lock_wait_time_max"] = max(_lock_stats["lock_wait_time_max"], waited)
+        if busy_error is not None:
+            _lock_stats["busy_errors"] += 1
+    if busy_error is not None:
+        raise DWHBusyError(
+            f"Database is locked after {retries} retries ({waited:.2f}s): {busy_error}",
+            db_path=db_path,
+            retries=retries
+        ) from busy_error
+
+
+def _begin_transaction(conn: sqlite3.Connection, mode: str, db_path: str) -> None:
+    """書き込み接続は BEGIN IMMEDIATE で最初に書き込みロックを取得し、読み取り接続は BEGIN"""
+    if mode != MODE_READ_WRITE:
+        conn.execute("BEGIN")
+        return
+    _with_lock_retry(lambda: conn.execute("BEGIN IMMEDIATE"), "begins", db_path)
+
+
+def _commit_transaction(conn: sqlite3.Connection, db_path: str) -> None:
+    """COMMIT を実行（読み取り中の接続がありロックを昇格できない場合は再試行）"""
+    if conn.in_transaction:
+        _with_lock_retry(conn.commit, "commits", db_path)
+
+
+class ConnectionPool:
+    """
+    db_path単位で sqlite3.Connection を再利用する接続プール
+
+    - 保持する接続数は max_size まで（超過分は返却時にクローズ）
+    - idle_timeout 秒以上使われていない接続は破棄
+    - health_check_interval 秒以上アイドルだった接続は貸し出し前に SELECT 1 で検査
+    """
+
+    def __init__(self, db_path: str, max_size: int = DEFAULT_POOL_SIZE,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+                 profile: str = DEFAULT_PROFILE, mode: str = MODE_READ_WRITE):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルのパス
+            profile: 新規接続に適用する接続プロファイル名
+            mode: 接続モード（MODE_READ_WRITE, MODE_READ_ONLY, MODE_IMMUTABLE）
+            max_size: プールに保持する最大接続数
+            idle_timeout: アイドル接続を破棄するまでの秒数
+            health_check_interval: 貸し出し前に死活確認を行うアイドル秒数
+        """
+        self.db_path = db_path
+        self.profile = profile
+        self.mode = mode
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._idle: Deque[Tuple[sqlite3.Connection, float]] = deque()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._in_use = 0
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {
+            "acquired": 0,
+            "created": 0,
+            "reused": 0,
+            "overflow_closed": 0,
+            "evicted": 0,
+            "health_check_failures": 0,
+            "acquire_time_total": 0.0,
+            "acquire_time_max": 0.0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """新しい接続を作成"""
+        if not Path(self.db_path).exists():
+            raise DWHConnectionError(
+                f"Database file not found: {self.db_path}",
+                db_path=self.db_path
+            )
+        # プールされた接続は別スレッドへ貸し出されることがあるため check_same_thread を無効化
+        conn = _connect_database(self.db_path, self.mode, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA foreign_keys = ON;")
+            apply_profile(conn, self.profile, self.mode)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _evict_idle_locked(self, now: float) -> None:
+        """idle_timeout を超えたアイドル接続を破棄（ロック保持中に呼ぶこと）"""
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._stats["evicted"] += 1
+            conn.close()
+
+    def _check_fork_locked(self) -> None:
+        """fork後の子プロセスでは親の接続を使わない"""
+        if self._pid != os.getpid():
+            self._idle.clear()
+            self._in_use = 0
+            self._pid = os.getpid()
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        接続を取得
+
+        Returns:
+            sqlite3.Connection: 再利用または新規作成された接続
+
+        Raises:
+            DWHConnectionError: 接続に失敗した場合
+        """
+        started = time.perf_counter()
+        conn = None
+        with self._lock:
+            self._check_fork_locked()
+            now = time.monotonic()
+            self._evict_idle_locked(now)
+            while self._idle:
+                # 最も新しく返却された接続から使う（LIFO）
+                candidate, last_used = self._idle.pop()
+                if now - last_used > self.health_check_interval and not self._is_healthy(candidate):
+                    self._stats["health_check_failures"] += 1
+                    candidate.close()
+                    continue
+                conn = candidate
+                self._stats["reused"] += 1
+                break
+            self._in_use += 1
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except BaseException:
+                with self._lock:
+                    self._in_use -= 1
+                raise
+            with self._lock:
+                self._stats["created"] += 1
+
+        # 利用者ごとに変更されうる設定を初期化
+        conn.row_factory = sqlite3.Row
+        _apply_busy_timeout(conn)
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["acquired"] += 1
+            self._stats["acquire_time_total"] += elapsed
+            self._stats["acquire_time_max"] = max(self._stats["acquire_time_max"], elapsed)
+        return conn
+
+    def release(self, conn: sqlite3.Connection, discard: bool = False) -> None:
+        """
+        接続を返却
+
+        Args:
+            conn: acquire() で取得した接続
+            discard: True の場合は再利用せずにクローズ
+        """
+        if not discard and conn.in_transaction:
+            # 未確定のトランザクションを持ち越さない
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._in_use = max(self._in_use - 1, 0)
+            if not discard and len(self._idle) < self.max_size:
+                self._idle.append((conn, time.monotonic()))
+                return
+            if not discard:
+                self._stats["overflow_closed"] += 1
+        conn.close()
+
+    def close(self) -> None:
+        """アイドル接続をすべてクローズ"""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            conn.close()
+
+    def get_stats(self) -> Dict:
+        """
+        プール統計を取得
+
+        Returns:
+            dict: 取得回数、新規作成数、再利用数、平均/最大取得時間（ミリ秒）など
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._in_use
+        acquired = stats["acquired"]
+        stats["acquire_ms_avg"] = (stats["acquire_time_total"] / acquired * 1000.0) if acquired else 0.0
+        stats["acquire_ms_max"] = stats.pop("acquire_time_max") * 1000.0
+        stats["acquire_ms_total"] = stats.pop("acquire_time_total") * 1000.0
+        return stats
+
+    def reset_stats(self) -> None:
+        """プール統計をリセット"""
+        with self._lock:
+            self._stats = self._empty_stats()
+
+
+_pools: Dict[Tuple[str, str, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(db_path: str, profile: str, mode: str) -> Tuple[str, str, str]:
+    return (os.path.abspath(db_path), profile, mode)
+
+
+def get_pool(db_path: str = "database.db", profile: Optional[str] = None,
+             mode: str = MODE_READ_WRITE) -> ConnectionPool:
+    """
+    db_path・接続プロファイル・接続モードに対応する接続プールを取得（存在しなければ作成）
+
+    Args:
+        db_path: データベースファイルのパス
+        profile: 接続プロファイル名（None の場合は既定のプロファイル）
+        mode: 接続モード（MODE_READ_WRITE, MODE_READ_ONLY, MODE_IMMUTABLE）
+
+    Returns:
+        ConnectionPool: 接続プール
+    """
+    profile = resolve_profile(profile)
+    key = _pool_key(db_path, profile, mode)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, profile=profile, mode=mode)
+            _pools[key] = pool
+        return pool
+
+
+def configure_pool(db_path: str = "database.db", max_size: Optional[int] = None,
+                   idle_timeout: Optional[float] = None,
+                   health_check_interval: Optional[float] = None,
+                   profile: Optional[str] = None, mode: str = MODE_READ_WRITE) -> ConnectionPool:
+    """
+    接続プールの設定を変更
+
+    Args:
+        db_path: データベースファイルのパス
+        profile: 接続プロファイル名（None の場合は既定のプロファイル）
+        mode: 接続モード（MODE_READ_WRITE, MODE_READ_ONLY, MODE_IMMUTABLE）
+        max_size: プールに保持する最大接続数
+        idle_timeout: アイドル接続を破棄するまでの秒数
+        health_check_interval: 貸し出し前に死活確認を行うアイドル秒数
+
+    Returns:
+        ConnectionPool: 設定後の接続プール
+    """
+    pool = get_pool(db_path, profile, mode)
+    if max_size is not None:
+        pool.max_size = max_size
+    if idle_timeout is not None:
+        pool.idle_timeout = idle_timeout
+    if health_check_interval is not None:
+        pool.health_check_interval = health_check_interval
+    return pool
+
+
+def get_pool_stats(db_path: Optional[str] = None, profile: Optional[str] = None,
+                   mode: str = MODE_READ_WRITE) -> Dict:
+    """
+    接続プールの統計を取得
+
+    Args:
+        db_path: データベースファイルのパス（省略時は全プール）
+        profile: 接続プロファイル名（None の場合は既定のプロファイル）
+        mode: 接続モード（MODE_READ_WRITE, MODE_READ_ONLY, MODE_IMMUTABLE）
+
+    Returns:
+        dict: db_path指定時はそのプールの統計、省略時は {"絶対パス[プロファイル:モード]": 統計}
+    """
+    if db_path is not None:
+        return get_pool(db_path, profile, mode).get_stats()
+    with _pools_lock:
+        pools = dict(_pools)
+    return {f"{path}[{name}:{pool_mode}]": pool.get_stats()
+            for (path, name, pool_mode), pool in pools.items()}
+
+
+def close_all_pools() -> None:
+    """すべての接続プールのアイドル接続をクローズし、プールを破棄"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all_pools)
 
 
 class DWHConnection:
     """DataWareHouseへの接続を管理するクラス"""
-    
-    def __init__(self, db_path: str = "database.db"):
+
+    def __init__(self, db_path: str = "database.db", pooled: Optional[bool] = None,
+                 profile: Optional[str] = None, read_only: bool = False,
+                 immutable: Optional[bool] = None, begin: Optional[bool] = None):
         """
         初期化
-        
+
         Args:
             db_path: データベースファイルのパス
+            pooled: 接続プールを使用するかどうか（None の場合は POOLING_ENABLED に従う）
+            profile: 接続プロファイル名（"safe", "ingest", "analytics"。None の場合は
+                     環境変数 DWH_CONNECTION_PROFILE、未設定なら "safe"）
+            read_only: 読み取り専用（URI mode=ro）で開くかどうか
+            immutable: 変更されないスナップショットとして immutable=1 で開くかどうか
+                       （None の場合は read_only 時に環境変数 DWH_READ_IMMUTABLE に従う）
+            begin: 書き込み接続で開始時に BEGIN IMMEDIATE を実行し、書き込みロックを
+                   先に取得するかどうか（ロック競合時は configure_lock_retry() の設定で再試行）。
+                   None の場合は最初の INSERT / UPDATE / DELETE の直前に BEGIN IMMEDIATE を実行し、
+                   読み取りだけのブロックでは書き込みロックを取得しない。False の場合は sqlite3 の既定の動作
         """
         self.db_path = db_path
+        self.pooled = POOLING_ENABLED if pooled is None else pooled
+        self.profile = resolve_profile(profile)
+        self.mode = resolve_mode(read_only, immutable)
+        self.begin = begin
         self.connection: Optional[sqlite3.Connection] = None
-    
+        self._pool: Optional[ConnectionPool] = None
+
     def __enter__(self) -> sqlite3.Connection:
         """コンテキストマネージャー開始"""
         try:
-            # データベースファイルの存在確認
-            if not Path(self.db_path).exists():
-                raise DWHConnectionError(
-                    f"Database file not found: {self.db_path}",
-                    db_path=self.db_path
-                )
-            
-            # 接続を作成
-            self.connection = sqlite3.connect(self.db_path)
-            
-            # 外部キー制約を有効化
-            self.connection.execute("PRAGMA foreign_keys = ON;")
-            
-            # Row factory設定（辞書形式でアクセス可能）
-            self.connection.row_factory = sqlite3.Row
-            
+            if self.pooled:
+                self._pool = get_pool(self.db_path, self.profile, self.mode)
+                self.connection = self._pool.acquire()
+            else:
+                # データベースファイルの存在確認
+                if not Path(self.db_path).exists():
+                    raise DWHConnectionError(
+                        f"Database file not found: {self.db_path}",
+                        db_path=self.db_path
+                    )
+
+                # 接続を作成
+                self.connection = _connect_database(self.db_path, self.mode)
+
+                # 外部キー制約を有効化
+                self.connection.execute("PRAGMA foreign_keys = ON;")
+
+                # 接続プロファイルを適用
+                apply_profile(self.connection, self.profile, self.mode)
+
+                # ロック解放を待つ時間を設定
+                _apply_busy_timeout(self.connection)
+
+                # Row factory設定（辞書形式でアクセス可能）
+                self.connection.row_factory = sqlite3.Row
+
+            if self.begin and self.mode == MODE_READ_WRITE:
+                # 書き込みロックを先に取得し、途中の文でロック競合が起きないようにする
+                _begin_transaction(self.connection, self.mode, self.db_path)
+            elif self.begin is None and self.mode == MODE_READ_WRITE:
+                # 書き込み文を実行するまでロックを取らない（sqlite3 が暗黙の BEGIN IMMEDIATE を発行）
+                self.connection.isolation_level = "IMMEDIATE"
+
             return self.connection
-            
-        except sqlite3.Error as e:
+
+        except (sqlite3.Error, DWHBusyError) as e:
+            if self.connection is not None:
+                connection, self.connection = self.connection, None
+                if self._pool is not None:
+                    self._pool.release(connection)
+                    self._pool = None
+                else:
+                    connection.close()
+            if isinstance(e, DWHBusyError):
+                raise
             raise DWHConnectionError(
                 f"Failed to connect to database: {e}",
                 db_path=self.db_path
             ) from e
-    
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         """コンテキストマネージャー終了"""
         if self.connection:
-            if exc_type is None:
-                # 正常終了時はコミット
-                self.connection.commit()
-            else:
-                # 例外発生時はロールバック
-                self.connection.rollback()
-            
-            self.connection.close()
-            self.connection = None
+            connection, self.connection = self.connection, None
+            try:
+                if exc_type is None and self.mode == MODE_READ_WRITE:
+                    # 正常終了時はコミット
+                    _commit_transaction(connection, self.db_path)
+                elif exc_type is None:
+                    # 読み取り専用接続は読み取りトランザクションを終了するだけ
+                    connection.rollback()
+                else:
+                    # 例外発生時はロールバック
+                    connection.rollback()
+            finally:
+                if self.begin is None and self.mode == MODE_READ_WRITE:
+                    connection.isolation_level = ""
+                if self._pool is not None:
+                    # 未確定のトランザクションは返却時にロールバックされる
+                    self._pool.release(connection)
+                    self._pool = None
+                else:
+                    connection.close()
+
+
+class DWHSession:
+    """
+    複数のAPI呼び出しを1つの接続・1つのトランザクションで実行するセッション
+
+    各API関数に session を渡すと、その関数は新しい接続を開かずにセッションの接続を使用します。
+    個々の呼び出しはセーブポイントで囲まれるため、失敗した呼び出しの変更だけが取り消されます。
+    トランザクションは最初のAPI呼び出しで開始され（書き込みセッションは BEGIN IMMEDIATE）、
+    セッション終了時に正常終了ならコミット、例外発生時はロールバックします。
+
+    使用例:
+        with DWHSession("database.db") as session:
+            for start, end in intervals:
+                create_tag(video_id, task_id, start, end, session=session)
+    """
+
+    def __init__(self, db_path: str = "database.db", pooled: Optional[bool] = None,
+                 profile: Optional[str] = None, read_only: bool = False,
+                 immutable: Optional[bool] = None):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルのパス
+            pooled: 接続プールを使用するかどうか（None の場合は POOLING_ENABLED に従う）
+            profile: 接続プロファイル名（None の場合は既定のプロファイル）
+            read_only: 読み取り専用セッションにするかどうか（一貫したスナップショットで読み取る）
+            immutable: immutable=1 で開くかどうか（DWHConnection と同じ）
+        """
+        self.db_path = db_path
+        self._dwh_connection = DWHConnection(db_path, pooled=pooled, profile=profile,
+                                             read_only=read_only, immutable=immutable,
+                                             begin=False)
+        self.profile = self._dwh_connection.profile
+        self.mode = self._dwh_connection.mode
+        self.connection: Optional[sqlite3.Connection] = None
+
+    def __enter__(self) -> "DWHSession":
+        """セッション開始（接続を取得。トランザクションは最初のAPI呼び出しで開始）"""
+        self.connection = self._dwh_connection.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """セッション終了（コミットまたはロールバックして接続を返却）"""
+        self.connection = None
+        return self._dwh_connection.__exit__(exc_type, exc_val, exc_tb)
+
+    def _ensure_transaction(self) -> sqlite3.Connection:
+        """トランザクションが開始されていなければ開始"""
+        conn = self._require_connection()
+        if not conn.in_transaction:
+            try:
+                _begin_transaction(conn, self.mode, self.db_path)
+            except sqlite3.Error as e:
+                raise DWHConnectionError(
+                    f"Failed to begin transaction: {e}",
+                    db_path=self.db_path
+                ) from e
+        return conn
+
+    def _require_connection(self) -> sqlite3.Connection:
+        if self.connection is None:
+            raise DWHConnectionError(
+                "Session is not active. Use 'with DWHSession(...) as session:'",
+                db_path=self.db_path
+            )
+        return self.connection
+
+    def commit(self) -> None:
+        """ここまでの変更をコミット（次のAPI呼び出しで新しいトランザクションを開始）"""
+        conn = self._require_connection()
+        if self.mode == MODE_READ_WRITE:
+            _commit_transaction(conn, self.db_path)
+        else:
+            conn.rollback()
+
+    def rollback(self) -> None:
+        """ここまでの変更をロールバック（次のAPI呼び出しで新しいトランザクションを開始）"""
+        conn = self._require_connection()
+        conn.rollback()
 
 
-def get_connection(db_path: str = "database.db") -> DWHConnection:
+# DWHBulkLoadSession が違反の詳細を保持する件数の既定値（件数は全て数える）
+DEFAULT_MAX_FK_VIOLATIONS = 100
+
+
+def check_foreign_keys(conn: sqlite3.Connection,
+                       max_violations: int = DEFAULT_MAX_FK_VIOLATIONS) -> Tuple[int, List[Dict]]:
+    """
+    PRAGMA foreign_key_check でデータベース全体の参照先のない行をまとめて検出
+
+    Args:
+        conn: 検査する接続（未コミットの変更も検査対象）
+        max_violations: 詳細を返す違反の最大件数
+
+    Returns:
+        tuple: (違反の総数, 違反の詳細のリスト)。詳細は table, rowid, column, value, parent, parent_column
+    """
+    fk_columns: Dict[Tuple[str, int], Tuple[str, str]] = {}
+    violations: List[Dict] = []
+    total = 0
+    for table, rowid, parent, fkid in conn.execute("PRAGMA foreign_key_check").fetchall():
+        total += 1
+        if len(violations) >= max_violations:
+            continue
+        if (table, fkid) not in fk_columns:
+            for row in conn.execute(f"PRAGMA foreign_key_list({table})").fetchall():
+                # (id, seq, table, from, to, on_update, on_delete, match)
+                fk_columns[(table, row[0])] = (row[3], row[4])
+        column, parent_column = fk_columns[(table, fkid)]
+        value_row = conn.execute(f"SELECT {column} FROM {table} WHERE rowid = ?", (rowid,)).fetchone()
+        violations.append({
+            "table": table,
+            "rowid": rowid,
+            "column": column,
+            "value": value_row[0] if value_row is not None else None,
+            "parent": parent,
+            "parent_column": parent_column,
+        })
+    return total, violations
+
+
+class DWHBulkLoadSession(DWHSession):
+    """
+    外部キーの検査をロード後にまとめて行う一括ロード用セッション
+
+    セッション中は外部キーの行ごとの検査を行わずに書き込み、コミットの直前に PRAGMA foreign_key_check で
+    データベース全体を1回だけ検査します。参照先のない行があればトランザクション全体をロールバックし、
+    違反の一覧を持つ DWHForeignKeyViolationError を送出します。
+
+    使用例:
+        with DWHBulkLoadSession("database.db", profile="ingest") as session:
+            create_videos_bulk(rows, session=session)
+            create_tags_bulk(tags, session=session)
+    """
+
+    def __init__(self, db_path: str = "database.db", profile: Optional[str] = None,
+                 max_violations: int = DEFAULT_MAX_FK_VIOLATIONS):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルのパス
+            profile: 接続プロファイル名（None の場合は既定のプロファイル。大量ロードには "ingest" を推奨）
+            max_violations: 例外に含める違反の詳細の最大件数
+        """
+        # 外部キーの設定を変えた接続をプールに戻さないよう、専用の接続を使用
+        super().__init__(db_path, pooled=False, profile=profile)
+        self.max_violations = max_violations
+
+    def __enter__(self) -> "DWHBulkLoadSession":
+        """セッション開始（外部キーの行ごとの検査を無効化。トランザクション外でのみ変更できる）"""
+        super().__enter__()
+        self.connection.execute("PRAGMA foreign_keys = OFF")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """外部キーを検査してからコミット（違反があればロールバックして例外を送出）"""
+        if exc_type is None and self.connection is not None and self.connection.in_transaction:
+            try:
+                self.verify()
+            except DWHForeignKeyViolationError as e:
+                super().__exit__(type(e), e, e.__traceback__)
+                raise
+        return super().__exit__(exc_type, exc_val, exc_tb)
+
+    def verify(self) -> None:
+        """
+        ここまでの変更を含めて外部キーを検査
+
+        Raises:
+            DWHForeignKeyViolationError: 参照先のない行がある場合
+        """
+        total, violations = check_foreign_keys(self._require_connection(), self.max_violations)
+        if total:
+            summary = ", ".join(
+                f"{v['table']}.{v['column']}={v['value']} (rowid={v['rowid']}) -> {v['parent']}.{v['parent_column']}"
+                for v in violations[:5]
+            )
+            raise DWHForeignKeyViolationError(
+                f"{total} foreign key violation(s) after bulk load: {summary}"
+                + (" ..." if total > 5 else ""),
+                violations=violations,
+                total=total
+            )
+
+    def commit(self) -> None:
+        """外部キーを検査してからここまでの変更をコミット（違反があればコミットせずに例外を送出）"""
+        self.verify()
+        super().commit()
+
+
+class _SessionScope:
+    """セッションの接続を1回のAPI呼び出し分だけセーブポイントで囲むコンテキストマネージャー"""
+
+    def __init__(self, session: DWHSession):
+        self.session = session
+        self.connection: Optional[sqlite3.Connection] = None
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection = self.session._ensure_transaction()
+        self.connection.execute("SAVEPOINT dwh_call")
+        return self.connection
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        conn, self.connection = self.connection, None
+        if exc_type is not None:
+            conn.execute("ROLLBACK TO SAVEPOINT dwh_call")
+        conn.execute("RELEASE SAVEPOINT dwh_call")
+
+
+def get_connection(db_path: str = "database.db",
+                   session: Optional[DWHSession] = None,
+                   read_only: bool = False) -> Union[DWHConnection, _SessionScope, _ApiCallScope]:
     """
     データベース接続を取得
-    
+
     Args:
         db_path: データベースファイルのパス
-    
+        session: 共有セッション（指定時は db_path を無視してセッションの接続を使用）
+        read_only: 読み取りのみの処理かどうか（True の場合は読み取り専用接続を使用し、
+                   False の場合は書き込み処理として開始時に BEGIN IMMEDIATE で書き込みロックを取得）
+
     Returns:
-        DWHConnection: データベース接続オブジェクト
+        DWHConnection: データベース接続オブジェクト（session指定時はセーブポイント付きのスコープ）
+    """
+    if session is not None:
+        scope = _SessionScope(session)
+    else:
+        scope = DWHConnection(db_path, read_only=read_only, begin=not read_only)
+    if _instrumented:
+        # 呼び出し元のAPI関数名で統計・スロークエリログを記録
+        return _ApiCallScope(scope, sys._getframe(1).f_code.co_name)
+    return scope
+
+
+@contextmanager
+def ensure_session(db_path: str = "database.db",
+                   session: Optional[DWHSession] = None,
+                   read_only: bool = False) -> Iterator[DWHSession]:
+    """
+    既存のセッションを使うか、この処理のためだけのセッションを開始する
+
+    存在確認などの読み取りと更新を同じ接続・トランザクションで行うために使用します。
+
+    Args:
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はそのまま使用）
+        read_only: 新しく開始するセッションを読み取り専用にするかどうか
+
+    Yields:
+        DWHSession: 使用するセッション
+    """
+    if session is not None:
+        yield session
+        return
+    with DWHSession(db_path, read_only=read_only) as new_session:
+        yield new_session
+
+
+_WRITER_STOP = object()
+
+
+class DWHWriter:
+    """
+    単一の書き込み接続を専用スレッドで保持し、任意のスレッドからの書き込み要求を
+    キュー経由で受け付けてグループコミットするライター
+
+    submit() には session 引数を受け付けるAPI関数（create_evaluation_data など）を渡します。
+    要求は専用スレッド上で順番に実行され、まとめてコミットされた後に Future へ結果
+    （作成されたIDなど）が設定されます。個々の要求はセーブポイントで囲まれるため、
+    失敗した要求は他の要求に影響しません。
+
+    使用例:
+        with DWHWriter("database.db", profile="ingest") as writer:
+            futures = [
+                writer.submit(create_evaluation_data, result_id, output_id, 3, 5, path)
+                for output_id, path in items
+            ]
+            ids = [f.result() for f in futures]
     """
-    return DWHConnection(db_path)
+
+    def __init__(self, db_path: str = "database.db", max_batch_size: int = 500,
+                 max_batch_delay: float = 0.005, max_queue_size: int = 10000,
+                 profile: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルのパス
+            max_batch_size: 1回のコミットにまとめる最大要求数
+            max_batch_delay: 最初の要求を受け取ってから後続の要求を待つ最大秒数
+            max_queue_size: キューに溜められる最大要求数（超えると submit() が待機）
+            profile: 書き込み接続の接続プロファイル名
+        """
+        self.db_path = db_path
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.profile = resolve_profile(profile)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._startup_error: Optional[BaseException] = None
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "commits": 0}
+
+    def __enter__(self) -> "DWHWriter":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self) -> "DWHWriter":
+        """
+        ライタースレッドを開始
+
+        Returns:
+            DWHWriter: 自身
+
+        Raises:
+            DWHConnectionError: 書き込み接続を開けなかった場合
+        """
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, name="dwh-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error is not None:
+            self._thread.join()
+            self._closed = True
+            raise self._startup_error
+        return self
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        書き込み要求をキューに追加
+
+        Args:
+            func: session キーワード引数を受け付けるAPI関数
+            *args, **kwargs: func に渡す引数（session はライターが設定）
+
+        Returns:
+            Future: コミット後に func の戻り値（作成されたIDなど）が設定される
+        """
+        if self._closed or self._thread is None:
+            raise DWHConnectionError("Writer is not running", db_path=self.db_path)
+        future: Future = Future()
+        self._queue.put((future, func, args, kwargs))
+        with self._stats_lock:
+            self._stats["submitted"] += 1
+        return future
+
+    def submit_sql(self, sql: str, params: Sequence = ()) -> Future:
+        """
+        任意のSQL（INSERT等）を書き込み要求として追加
+
+        Args:
+            sql: 実行するSQL
+            params: バインドパラメータ
+
+        Returns:
+            Future: コミット後に lastrowid が設定される
+        """
+        return self.submit(_execute_sql, sql, params)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        キューに残った要求を処理してからライタースレッドを停止
+
+        Args:
+            wait: スレッドの終了を待つかどうか
+        """
+        if self._closed or self._thread is None:
+            self._closed = True
+            return
+        self._closed = True
+        self._queue.put(_WRITER_STOP)
+        if wait:
+            self._thread.join()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        ライターの統計を取得
+
+        Returns:
+            dict: submitted, completed, failed, commits, pending
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+    def _collect_batch(self, first) -> Tuple[List, bool]:
+        """最初の要求に続く要求を max_batch_size / max_batch_delay の範囲でまとめる"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_batch_delay
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _WRITER_STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        try:
+            session = DWHSession(self.db_path, pooled=False, profile=self.profile)
+            session.__enter__()
+        except BaseException as e:
+            self._startup_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        stop = False
+        try:
+            while not stop:
+                item = self._queue.get()
+                if item is _WRITER_STOP:
+                    break
+                batch, stop = self._collect_batch(item)
+                self._process_batch(session, batch)
+        finally:
+            session.__exit__(None, None, None)
+
+    def _process_batch(self, session: DWHSession, batch: List) -> None:
+        outcomes = []
+        for future, func, args, kwargs in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                outcomes.append((future, func(*args, session=session, **kwargs), None))
+            except BaseException as e:
+                outcomes.append((future, None, e))
+
+        try:
+            session.commit()
+        except (sqlite3.Error, DWHBusyError) as e:
+            session.rollback()
+            commit_error = DWHError(f"Group commit failed: {e}")
+            outcomes = [(future, None, error or commit_error) for future, _, error in outcomes]
+
+        completed = failed = 0
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+                completed += 1
+            else:
+                future.set_exception(error)
+                failed += 1
+        with self._stats_lock:
+            self._stats["completed"] += completed
+            self._stats["failed"] += failed
+            self._stats["commits"] += 1
+
+
+def _execute_sql(sql: str, params: Sequence = (), session: Optional[DWHSession] = None) -> int:
+    """DWHWriter.submit_sql 用：セッション上でSQLを実行して lastrowid を返す"""
+    with get_connection(session=session) as conn:
+        return conn.execute(sql, params).lastrowid
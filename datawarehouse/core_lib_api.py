@@ -4,9 +4,22 @@
 
 import sqlite3
 import re
-from typing import List, Dict, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
 from .exceptions import DWHNotFoundError, DWHConstraintError, DWHValidationError, DWHUniqueConstraintError
-from .connection import get_connection
+from .connection import DWHSession, get_connection
+from .queries import (SUPPORTS_RETURNING, DWHBatchResult, compile_path_template, execute_query, fetch_by_ids,
+                      fetch_list)
+from .records import DWHColumns
+
+# fan_out_core_lib_outputs の output_dir_template で使用できる置換フィールド
+CORE_LIB_OUTPUT_TEMPLATE_FIELDS = {
+    "core_lib_id": "cl.core_lib_ID",
+    "core_lib_version": "cl.core_lib_version",
+    "video_id": "v.video_ID",
+    "video_dir": "v.video_dir",
+    "video_date": "v.video_date",
+    "subject_id": "v.subject_ID",
+}
 
 
 def _validate_commit_hash(commit_hash: str) -> None:
@@ -21,7 +34,8 @@ def _validate_commit_hash(commit_hash: str) -> None:
 
 def create_core_lib_version(version: str, update_info: str, commit_hash: str, 
                           base_version_id: Optional[int] = None,
-                          db_path: str = "database.db") -> int:
+                          db_path: str = "database.db",
+                            session: Optional[DWHSession] = None) -> int:
     """
     新しいコアライブラリバージョンを登録
     
@@ -31,6 +45,7 @@ def create_core_lib_version(version: str, update_info: str, commit_hash: str,
         commit_hash: Gitコミットハッシュ（40文字）
         base_version_id: ベースバージョンのID（新規の場合はNone）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         core_lib_ID: 作成されたコアライブラリのID
@@ -43,7 +58,7 @@ def create_core_lib_version(version: str, update_info: str, commit_hash: str,
     # コミットハッシュの形式検証
     _validate_commit_hash(commit_hash)
     
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -74,13 +89,15 @@ def create_core_lib_version(version: str, update_info: str, commit_hash: str,
             raise DWHConstraintError(f"Failed to create core library version: {e}", table_name="core_lib_table") from e
 
 
-def get_core_lib_version(core_lib_id: int, db_path: str = "database.db") -> Dict:
+def get_core_lib_version(core_lib_id: int, db_path: str = "database.db",
+                         session: Optional[DWHSession] = None) -> Dict:
     """
     コアライブラリIDでバージョン情報を取得
     
     Args:
         core_lib_id: コアライブラリID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: コアライブラリ情報
@@ -88,17 +105,8 @@ def get_core_lib_version(core_lib_id: int, db_path: str = "database.db") -> Dict
     Raises:
         DWHNotFoundError: コアライブラリが見つからない場合
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT core_lib_ID, core_lib_version, core_lib_update_information, 
-                   core_lib_base_version_ID, core_lib_commit_hash
-            FROM core_lib_table
-            WHERE core_lib_ID = ?
-            """,
-            (core_lib_id,)
-        )
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_core_lib_version", (core_lib_id,))
         
         row = cursor.fetchone()
         if row is None:
@@ -111,42 +119,41 @@ def get_core_lib_version(core_lib_id: int, db_path: str = "database.db") -> Dict
         return dict(row)
 
 
-def list_core_lib_versions(db_path: str = "database.db") -> List[Dict]:
+def list_core_lib_versions(db_path: str = "database.db",
+                           session: Optional[DWHSession] = None, *, limit: Optional[int] = None,
+                           after: Optional[str] = None, row_format: str = "dict") -> Union[List[Any], DWHColumns]:
     """
     コアライブラリバージョン一覧を取得
     
     Args:
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        limit: 1ページの行数（指定時は keyset ページングで DWHPage を返す）
+        after: 前のページの next_after（続きのページを取得する場合）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"。records を参照）
     
     Returns:
-        List[dict]: コアライブラリ情報のリスト
+        List[Any] or DWHColumns: コアライブラリ情報のリスト（limit 指定時は DWHPage）。
+            row_format に応じて dict / tuple / namedtuple / record の行、"columns" の場合は DWHColumns
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT core_lib_ID, core_lib_version, core_lib_update_information, 
-                   core_lib_base_version_ID, core_lib_commit_hash
-            FROM core_lib_table
-            ORDER BY core_lib_ID
-            """
-        )
-        
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_core_lib_versions", limit=limit, after=after, row_format=row_format)
 
 
-def get_core_lib_version_history(core_lib_id: int, db_path: str = "database.db") -> List[Dict]:
+def get_core_lib_version_history(core_lib_id: int, db_path: str = "database.db",
+                                 session: Optional[DWHSession] = None) -> List[Dict]:
     """
     コアライブラリのバージョン履歴を取得（自己参照をたどる）
     
     Args:
         core_lib_id: 現在のコアライブラリID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         List[dict]: バージョン履歴のリスト（古い順）
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         
         # 再帰的にバージョン履歴を取得
@@ -175,18 +182,20 @@ def get_core_lib_version_history(core_lib_id: int, db_path: str = "database.db")
         return list(reversed(history))
 
 
-def find_core_lib_by_version(version: str, db_path: str = "database.db") -> Optional[Dict]:
+def find_core_lib_by_version(version: str, db_path: str = "database.db",
+                             session: Optional[DWHSession] = None) -> Optional[Dict]:
     """
     バージョン文字列でコアライブラリを検索
     
     Args:
         version: バージョン文字列
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict or None: コアライブラリ情報（見つからない場合はNone）
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -202,18 +211,20 @@ def find_core_lib_by_version(version: str, db_path: str = "database.db") -> Opti
         return dict(row) if row else None
 
 
-def find_core_lib_by_commit_hash(commit_hash: str, db_path: str = "database.db") -> Optional[Dict]:
+def find_core_lib_by_commit_hash(commit_hash: str, db_path: str = "database.db",
+                                 session: Optional[DWHSession] = None) -> Optional[Dict]:
     """
     コミットハッシュでコアライブラリを検索
     
     Args:
         commit_hash: コミットハッシュ
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict or None: コアライブラリ情報（見つからない場合はNone）
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -229,8 +240,161 @@ def find_core_lib_by_commit_hash(commit_hash: str, db_path: str = "database.db")
         return dict(row) if row else None
 
 
+def _upsert_core_lib_row(conn: sqlite3.Connection, version: str, update_info: str, commit_hash: str,
+                         base_version_id: Optional[int]) -> int:
+    """
+    コミットハッシュをキーに1行を登録し、既存または新規のコアライブラリIDを返す
+
+    Raises:
+        DWHConstraintError: ベースバージョンが存在しない場合
+    """
+    values = (version, update_info, base_version_id, commit_hash)
+    try:
+        # 登録済みの場合は書き込みを行わない（競合した INSERT でも AUTOINCREMENT の番号が消費されるため）
+        row = conn.execute(
+            "SELECT core_lib_ID FROM core_lib_table WHERE core_lib_commit_hash = ?",
+            (commit_hash,)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        if SUPPORTS_RETURNING:
+            # 並列実行で競合した場合も RETURNING で既存行のIDを返すため、値を変えない DO UPDATE にする
+            cursor = conn.execute(
+                """
+                INSERT INTO core_lib_table
+                (core_lib_version, core_lib_update_information, core_lib_base_version_ID, core_lib_commit_hash)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(core_lib_commit_hash) DO UPDATE SET core_lib_commit_hash = excluded.core_lib_commit_hash
+                RETURNING core_lib_ID
+                """,
+                values
+            )
+        else:
+            conn.execute(
+                """
+                INSERT INTO core_lib_table
+                (core_lib_version, core_lib_update_information, core_lib_base_version_ID, core_lib_commit_hash)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(core_lib_commit_hash) DO NOTHING
+                """,
+                values
+            )
+            cursor = conn.execute(
+                "SELECT core_lib_ID FROM core_lib_table WHERE core_lib_commit_hash = ?",
+                (commit_hash,)
+            )
+        (core_lib_id,), = cursor.fetchall()
+        return core_lib_id
+    except sqlite3.IntegrityError as e:
+        if "FOREIGN KEY constraint failed" in str(e):
+            raise DWHConstraintError(
+                f"Base version not found: core_lib_ID={base_version_id}",
+                table_name="core_lib_table",
+                constraint_name="FK_base_version"
+            ) from e
+        raise DWHConstraintError(f"Failed to upsert core library version: {e}", table_name="core_lib_table") from e
+    except sqlite3.Error as e:
+        raise DWHConstraintError(f"Failed to upsert core library version: {e}", table_name="core_lib_table") from e
+
+
+def upsert_core_lib_version(version: str, update_info: str, commit_hash: str,
+                            base_version_id: Optional[int] = None,
+                            db_path: str = "database.db",
+                            session: Optional[DWHSession] = None) -> int:
+    """
+    コミットハッシュをキーにコアライブラリバージョンを冪等に登録
+
+    INSERT ... ON CONFLICT(core_lib_commit_hash) により1文で登録と既存IDの取得を行うため、
+    並列に実行しても UNIQUE 制約違反になりません。既存の行は更新しません。
+
+    Args:
+        version: バージョン文字列（例: 1.0.0）
+        update_info: 更新内容の説明
+        commit_hash: Gitコミットハッシュ（40文字）
+        base_version_id: ベースバージョンのID（新規の場合はNone）
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+
+    Returns:
+        core_lib_ID: 既存または新規のコアライブラリのID
+
+    Raises:
+        DWHValidationError: コミットハッシュの形式が不正な場合
+        DWHConstraintError: ベースバージョンが存在しない場合
+    """
+    _validate_commit_hash(commit_hash)
+
+    with get_connection(db_path, session) as conn:
+        return _upsert_core_lib_row(conn, version, update_info, commit_hash, base_version_id)
+
+
+def upsert_core_lib_versions(versions: Iterable[Mapping[str, Any]], db_path: str = "database.db",
+                             session: Optional[DWHSession] = None) -> List[int]:
+    """
+    複数のコアライブラリバージョンを1トランザクションで冪等に登録（履歴の一括登録用）
+
+    各要素は version, commit_hash と、任意で update_info, base_version_id または base_commit_hash を持つ辞書です。
+    base_commit_hash は同じバッチ内の先行する要素、または登録済みのバージョンを参照できるため、
+    古い順に並べた履歴をそのまま登録できます。いずれかの要素が失敗した場合はバッチ全体をロールバックします。
+
+    Args:
+        versions: 登録するバージョンの辞書のイテラブル
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+
+    Returns:
+        List[int]: 入力順のコアライブラリID
+
+    Raises:
+        DWHValidationError: 必須キーがない、またはコミットハッシュの形式が不正な場合
+        DWHConstraintError: ベースバージョンが存在しない場合
+    """
+    versions = list(versions)
+    for entry in versions:
+        if "version" not in entry or "commit_hash" not in entry:
+            raise DWHValidationError(
+                f"version and commit_hash are required: {entry!r}",
+                field_name="version/commit_hash",
+                field_value=entry
+            )
+        _validate_commit_hash(entry["commit_hash"])
+        if entry.get("base_commit_hash") is not None:
+            _validate_commit_hash(entry["base_commit_hash"])
+
+    ids: List[int] = []
+    if not versions:
+        return ids
+
+    with get_connection(db_path, session) as conn:
+        known: Dict[str, int] = {}
+        for entry in versions:
+            base_version_id = entry.get("base_version_id")
+            base_commit_hash = entry.get("base_commit_hash")
+            if base_commit_hash is not None:
+                base_version_id = known.get(base_commit_hash)
+                if base_version_id is None:
+                    row = conn.execute(
+                        "SELECT core_lib_ID FROM core_lib_table WHERE core_lib_commit_hash = ?",
+                        (base_commit_hash,)
+                    ).fetchone()
+                    if row is None:
+                        raise DWHConstraintError(
+                            f"Base version not found: core_lib_commit_hash={base_commit_hash}",
+                            table_name="core_lib_table",
+                            constraint_name="FK_base_version"
+                        )
+                    base_version_id = row[0]
+            core_lib_id = _upsert_core_lib_row(
+                conn, entry["version"], entry.get("update_info", ""), entry["commit_hash"], base_version_id
+            )
+            known[entry["commit_hash"]] = core_lib_id
+            ids.append(core_lib_id)
+    return ids
+
+
 def create_core_lib_output(core_lib_id: int, video_id: int, output_dir: str,
-                          db_path: str = "database.db") -> int:
+                          db_path: str = "database.db",
+                           session: Optional[DWHSession] = None) -> int:
     """
     コアライブラリの評価結果を登録
     
@@ -239,6 +403,7 @@ def create_core_lib_output(core_lib_id: int, video_id: int, output_dir: str,
         video_id: ビデオID
         output_dir: 出力ディレクトリパス
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         core_lib_output_ID: 作成された出力のID
@@ -246,7 +411,7 @@ def create_core_lib_output(core_lib_id: int, video_id: int, output_dir: str,
     Raises:
         DWHConstraintError: コアライブラリまたはビデオが存在しない場合
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -270,13 +435,93 @@ def create_core_lib_output(core_lib_id: int, video_id: int, output_dir: str,
             raise DWHConstraintError(f"Failed to create core library output: {e}", table_name="core_lib_output_table") from e
 
 
-def get_core_lib_output(output_id: int, db_path: str = "database.db") -> Dict:
+def fan_out_core_lib_outputs(core_lib_id: int, output_dir_template: str,
+                             subject_id: Optional[int] = None, date_from: Optional[str] = None,
+                             date_to: Optional[str] = None, skip_existing: bool = True,
+                             db_path: str = "database.db",
+                             session: Optional[DWHSession] = None) -> Dict:
+    """
+    選択したビデオ全体に対してコアライブラリ出力を1回の INSERT ... SELECT で一括登録
+
+    出力ディレクトリは output_dir_template の置換フィールド（{video_id}, {video_dir}, {video_date},
+    {subject_id}, {core_lib_id}, {core_lib_version}）をSQL側で展開して組み立てます。
+
+    Args:
+        core_lib_id: コアライブラリID
+        output_dir_template: 出力ディレクトリのテンプレート（例: "core_lib/{core_lib_version}/{video_id}"）
+        subject_id: 被験者IDで絞り込む（省略時は全被験者）
+        date_from: 取得日の下限（YYYY-MM-DD、この日を含む）
+        date_to: 取得日の上限（YYYY-MM-DD、この日を含む）
+        skip_existing: 同じコアライブラリの出力が既にあるビデオを除外する
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+
+    Returns:
+        dict: inserted（登録した件数）, skipped（既存の出力があり除外した件数）
+
+    Raises:
+        DWHNotFoundError: コアライブラリが見つからない場合
+        DWHValidationError: テンプレートに未知の置換フィールドがある場合
+        DWHConstraintError: 一括登録に失敗した場合
+    """
+    dir_expr, dir_values = compile_path_template(output_dir_template, CORE_LIB_OUTPUT_TEMPLATE_FIELDS)
+
+    conditions = []
+    params: List = []
+    if subject_id is not None:
+        conditions.append("v.subject_ID = ?")
+        params.append(subject_id)
+    if date_from is not None:
+        conditions.append("v.video_date >= ?")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("v.video_date <= ?")
+        params.append(date_to)
+
+    with get_connection(db_path, session) as conn:
+        if conn.execute("SELECT 1 FROM core_lib_table WHERE core_lib_ID = ?", (core_lib_id,)).fetchone() is None:
+            raise DWHNotFoundError(
+                f"Core library not found: core_lib_ID={core_lib_id}",
+                table_name="core_lib_table",
+                record_id=core_lib_id
+            )
+
+        where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+        selected = conn.execute(f"SELECT COUNT(*) FROM video_table v{where}", params).fetchone()[0]
+
+        if skip_existing:
+            conditions.append(
+                "NOT EXISTS (SELECT 1 FROM core_lib_output_table co"
+                " WHERE co.core_lib_ID = cl.core_lib_ID AND co.video_ID = v.video_ID)"
+            )
+            where = " WHERE " + " AND ".join(conditions)
+        try:
+            cursor = conn.execute(
+                f"""
+                INSERT INTO core_lib_output_table (core_lib_ID, video_ID, core_lib_output_dir)
+                SELECT cl.core_lib_ID, v.video_ID, {dir_expr}
+                FROM video_table v
+                JOIN core_lib_table cl ON cl.core_lib_ID = ?
+                {where}
+                ORDER BY v.video_ID
+                """,
+                dir_values + [core_lib_id] + params
+            )
+        except sqlite3.Error as e:
+            raise DWHConstraintError(f"Failed to fan out core library outputs: {e}", table_name="core_lib_output_table") from e
+
+        return {"inserted": cursor.rowcount, "skipped": selected - cursor.rowcount}
+
+
+def get_core_lib_output(output_id: int, db_path: str = "database.db",
+                        session: Optional[DWHSession] = None) -> Dict:
     """
     コアライブラリ出力IDで出力情報を取得
     
     Args:
         output_id: 出力ID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: 出力情報
@@ -284,20 +529,8 @@ def get_core_lib_output(output_id: int, db_path: str = "database.db") -> Dict:
     Raises:
         DWHNotFoundError: 出力が見つからない場合
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT co.core_lib_output_ID, co.core_lib_ID, co.video_ID, co.core_lib_output_dir,
-                   cl.core_lib_version, cl.core_lib_commit_hash,
-                   v.video_dir, v.video_date
-            FROM core_lib_output_table co
-            JOIN core_lib_table cl ON co.core_lib_ID = cl.core_lib_ID
-            JOIN video_table v ON co.video_ID = v.video_ID
-            WHERE co.core_lib_output_ID = ?
-            """,
-            (output_id,)
-        )
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_core_lib_output", (output_id,))
         
         row = cursor.fetchone()
         if row is None:
@@ -310,8 +543,29 @@ def get_core_lib_output(output_id: int, db_path: str = "database.db") -> Dict:
         return dict(row)
 
 
+def get_core_lib_outputs(output_ids: Iterable[int], db_path: str = "database.db",
+                         session: Optional[DWHSession] = None, *, row_format: str = "dict") -> DWHBatchResult:
+    """
+    複数のコアライブラリ出力IDで出力情報をまとめて取得
+    
+    Args:
+        output_ids: 出力IDのリスト
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record"。records を参照）
+    
+    Returns:
+        DWHBatchResult: 出力ID -> 出力情報（要求した順。見つからなかったIDは missing）
+    """
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_by_ids(conn, "get_core_lib_outputs", "co.core_lib_output_ID", "core_lib_output_table",
+                            output_ids, row_format)
+
+
 def list_core_lib_outputs(core_lib_id: Optional[int] = None, video_id: Optional[int] = None,
-                         db_path: str = "database.db") -> List[Dict]:
+                          db_path: str = "database.db",
+                          session: Optional[DWHSession] = None, *, limit: Optional[int] = None,
+                          after: Optional[str] = None, row_format: str = "dict") -> Union[List[Any], DWHColumns]:
     """
     コアライブラリ出力一覧を取得
     
@@ -319,39 +573,15 @@ def list_core_lib_outputs(core_lib_id: Optional[int] = None, video_id: Optional[
         core_lib_id: コアライブラリID（指定時はそのバージョンのみ）
         video_id: ビデオID（指定時はそのビデオのみ）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        limit: 1ページの行数（指定時は keyset ページングで DWHPage を返す）
+        after: 前のページの next_after（続きのページを取得する場合）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"。records を参照）
     
     Returns:
-        List[dict]: 出力情報のリスト
+        List[Any] or DWHColumns: 出力情報のリスト（limit 指定時は DWHPage）。
+            row_format に応じて dict / tuple / namedtuple / record の行、"columns" の場合は DWHColumns
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        
-        # 条件の構築
-        conditions = []
-        params = []
-        
-        if core_lib_id is not None:
-            conditions.append("co.core_lib_ID = ?")
-            params.append(core_lib_id)
-        
-        if video_id is not None:
-            conditions.append("co.video_ID = ?")
-            params.append(video_id)
-        
-        # SQL構築
-        sql = """
-            SELECT co.core_lib_output_ID, co.core_lib_ID, co.video_ID, co.core_lib_output_dir,
-                   cl.core_lib_version, cl.core_lib_commit_hash,
-                   v.video_dir, v.video_date
-            FROM core_lib_output_table co
-            JOIN core_lib_table cl ON co.core_lib_ID = cl.core_lib_ID
-            JOIN video_table v ON co.video_ID = v.video_ID
-        """
-        
-        if conditions:
-            sql += " WHERE " + " AND ".join(conditions)
-        
-        sql += " ORDER BY v.video_date, cl.core_lib_ID"
-        
-        cursor.execute(sql, params)
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_core_lib_outputs", limit=limit, after=after, row_format=row_format,
+                          core_lib_id=core_lib_id, video_id=video_id)
@@ -2,10 +2,23 @@
 評価管理API
 """
 
+import itertools
+import operator
 import sqlite3
-from typing import List, Dict, Optional
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
 from .exceptions import DWHNotFoundError, DWHConstraintError, DWHValidationError
-from .connection import get_connection
+from .connection import DWHSession, ensure_session, get_connection
+from .queries import DEFAULT_FETCH_CHUNK_SIZE, execute_query, fetch_existing_ids, fetch_list, iter_query
+from .records import DWHColumns
+
+# load_evaluation_data の1トランザクションあたりの行数
+DEFAULT_LOAD_CHUNK_SIZE = 10000
+
+# load_evaluation_data が詳細を保持する失敗行の上限（件数は全て数える）
+DEFAULT_MAX_FAILURES = 1000
+
+_EVALUATION_DATA_FIELDS = ("algorithm_output_id", "correct_task_num", "total_task_num", "evaluation_data_path")
 
 
 def create_evaluation_result(
@@ -16,6 +29,7 @@ def create_evaluation_result(
     evaluation_result_dir: str = "",
     evaluation_timestamp: Optional[str] = None,
     db_path: str = "database.db",
+    session: Optional[DWHSession] = None,
 ) -> int:
     """
     評価結果（集計）のレコードを登録。
@@ -37,7 +51,7 @@ def create_evaluation_result(
             field_value=false_positive,
         )
 
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -67,21 +81,13 @@ def create_evaluation_result(
             ) from e
 
 
-def get_evaluation_result(evaluation_result_id: int, db_path: str = "database.db") -> Dict:
+def get_evaluation_result(evaluation_result_id: int, db_path: str = "database.db",
+                          session: Optional[DWHSession] = None) -> Dict:
     """
     評価結果の単一取得。
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT evaluation_result_ID, version, algorithm_ID, true_positive, false_positive,
-                   evaluation_result_dir, evaluation_timestamp
-            FROM evaluation_result_table
-            WHERE evaluation_result_ID = ?
-            """,
-            (evaluation_result_id,),
-        )
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_evaluation_result", (evaluation_result_id,))
         row = cursor.fetchone()
         if row is None:
             raise DWHNotFoundError(
@@ -96,32 +102,20 @@ def list_evaluation_results(
     algorithm_id: Optional[int] = None,
     version: Optional[str] = None,
     db_path: str = "database.db",
-) -> List[Dict]:
+    session: Optional[DWHSession] = None,
+    *,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    row_format: str = "dict",
+) -> Union[List[Any], DWHColumns]:
     """
     条件で評価結果を一覧取得。
+    limit を指定すると keyset ページングで DWHPage を返し、続きは after に next_after を渡して取得する。
+    row_format で行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"）を選べる。
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-
-        conditions = []
-        params = []
-        if algorithm_id is not None:
-            conditions.append("algorithm_ID = ?")
-            params.append(algorithm_id)
-        if version is not None:
-            conditions.append("version = ?")
-            params.append(version)
-
-        sql = (
-            "SELECT evaluation_result_ID, version, algorithm_ID, true_positive, false_positive, "
-            "evaluation_result_dir, evaluation_timestamp FROM evaluation_result_table"
-        )
-        if conditions:
-            sql += " WHERE " + " AND ".join(conditions)
-        sql += " ORDER BY evaluation_result_ID DESC"
-
-        cursor.execute(sql, params)
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_evaluation_results", limit=limit, after=after, row_format=row_format,
+                          algorithm_id=algorithm_id, version=version)
 
 
 def create_evaluation_data(
@@ -131,6 +125,7 @@ def create_evaluation_data(
     total_task_num: int,
     evaluation_data_path: str,
     db_path: str = "database.db",
+    session: Optional[DWHSession] = None,
 ) -> int:
     """
     個別データの評価結果を登録。
@@ -147,7 +142,7 @@ def create_evaluation_data(
             field_value=correct_task_num,
         )
 
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -186,60 +181,268 @@ def create_evaluation_data(
             ) from e
 
 
-def list_evaluation_data(evaluation_result_id: int, db_path: str = "database.db") -> List[Dict]:
+def _normalize_evaluation_row(row: Union[Mapping[str, Any], Sequence[Any]]) -> Tuple:
     """
-    指定した評価結果IDに紐づく個別評価データを一覧取得。
+    一括登録の1行を (algorithm_output_id, correct_task_num, total_task_num, evaluation_data_path) に変換
+
+    Raises:
+        DWHValidationError: 行の形式が不正な場合
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT ed.evaluation_data_ID, ed.evaluation_result_ID, ed.algorithm_output_ID,
-                   ed.correct_task_num, ed.total_task_num, ed.evaluation_data_path,
-                   ao.algorithm_ID, ao.core_lib_output_ID
-            FROM evaluation_data_table ed
-            JOIN algorithm_output_table ao ON ed.algorithm_output_ID = ao.algorithm_output_ID
-            WHERE ed.evaluation_result_ID = ?
-            ORDER BY ed.evaluation_data_ID
-            """,
-            (evaluation_result_id,),
+    if isinstance(row, Mapping):
+        missing = [field for field in _EVALUATION_DATA_FIELDS if field not in row]
+        if missing:
+            raise DWHValidationError(
+                f"Missing evaluation data fields: {', '.join(missing)}",
+                field_name="/".join(missing),
+            )
+        return tuple(row[field] for field in _EVALUATION_DATA_FIELDS)
+    values = tuple(row)
+    if len(values) != len(_EVALUATION_DATA_FIELDS):
+        raise DWHValidationError(
+            "Evaluation data row must have 4 values "
+            f"(algorithm_output_id, correct_task_num, total_task_num, evaluation_data_path): {row!r}",
+            field_name="row",
+            field_value=row
         )
-        return [dict(row) for row in cursor.fetchall()]
+    return values
 
 
-def get_evaluation_overview(evaluation_result_id: int, db_path: str = "database.db") -> Dict:
+def _validate_evaluation_chunk(chunk: List[Union[Mapping[str, Any], Sequence[Any]]], first_index: int
+                               ) -> Tuple[List[Tuple[int, Tuple]], List[Dict]]:
     """
-    評価概要（派生メトリクスを含む）を返す。
-    accuracy = total_correct / total_items （0除算は0.0）
+    チャンク内の行を列ごとにまとめて検証
+
+    Returns:
+        tuple: (検証を通過した (入力中の位置, 値) のリスト, 失敗した行のリスト)
     """
-    # ベース情報
-    result = get_evaluation_result(evaluation_result_id, db_path)
-
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(correct_task_num), 0) as total_correct,
-                   COALESCE(SUM(total_task_num), 0) as total_items
-            FROM evaluation_data_table
-            WHERE evaluation_result_ID = ?
-            """,
-            (evaluation_result_id,),
+    failures: List[Dict] = []
+    normalized: List[Tuple[int, Tuple]] = []
+    for offset, row in enumerate(chunk):
+        if type(row) is tuple and len(row) == len(_EVALUATION_DATA_FIELDS):
+            normalized.append((first_index + offset, row))
+            continue
+        try:
+            normalized.append((first_index + offset, _normalize_evaluation_row(row)))
+        except DWHValidationError as e:
+            failures.append({"index": first_index + offset, "error": e})
+    if not normalized:
+        return [], failures
+
+    # 列単位で件数の型・範囲・大小関係を判定（全行が正しければ行ごとの判定は行わない）
+    output_ids, correct, total, _ = zip(*(values for _, values in normalized))
+    if (set(map(type, output_ids + correct + total)) == {int}
+            and min(correct) >= 0 and all(map(operator.le, correct, total))):
+        return normalized, failures
+
+    typed = [type(o) is int and type(c) is int and type(t) is int
+             for o, c, t in zip(output_ids, correct, total)]
+    bad = [not ok or c < 0 or t < 0 or c > t for ok, c, t in zip(typed, correct, total)]
+
+    valid: List[Tuple[int, Tuple]] = []
+    for ok, is_bad, (index, values) in zip(typed, bad, normalized):
+        if not is_bad:
+            valid.append((index, values))
+            continue
+        _, correct_task_num, total_task_num, _ = values
+        if not ok:
+            error = DWHValidationError(
+                f"algorithm_output_id and task counts must be integers: {values[:3]!r}",
+                field_name="algorithm_output_id/correct_task_num/total_task_num",
+                field_value=values[:3]
+            )
+        elif correct_task_num < 0 or total_task_num < 0:
+            error = DWHValidationError(
+                "Counts must be >= 0",
+                field_name="correct_task_num/total_task_num",
+                field_value=f"{correct_task_num}/{total_task_num}"
+            )
+        else:
+            error = DWHValidationError(
+                "correct_task_num must be <= total_task_num",
+                field_name="correct_task_num",
+                field_value=correct_task_num
+            )
+        failures.append({"index": index, "error": error})
+    return valid, failures
+
+
+def load_evaluation_data(evaluation_result_id: int,
+                         rows: Iterable[Union[Mapping[str, Any], Sequence[Any]]],
+                         chunk_size: int = DEFAULT_LOAD_CHUNK_SIZE,
+                         max_failures: int = DEFAULT_MAX_FAILURES,
+                         db_path: str = "database.db",
+                         session: Optional[DWHSession] = None) -> Dict:
+    """
+    評価実行1回分の個別評価データをストリーミングで一括登録
+
+    rows をジェネレータとして chunk_size 行ずつ読み込み、チャンク単位で件数をまとめて検証し、
+    アルゴリズム出力の存在を確認したうえで executemany で挿入してコミットします。
+    保持するのは現在のチャンクだけなので、行数によらずメモリ使用量は一定です。
+    不正な行はロードを中断せず failures に報告します。
+
+    Args:
+        evaluation_result_id: 評価結果ID（全行に共通）
+        rows: algorithm_output_id, correct_task_num, total_task_num, evaluation_data_path を
+              キーに持つ辞書、または同じ順の並びを返すイテラブル
+        chunk_size: 1トランザクションあたりの行数
+        max_failures: failures に詳細を保持する失敗行の上限
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時は全チャンクをその接続・トランザクションで実行）
+
+    Returns:
+        dict: 登録結果
+            - inserted: 登録した件数
+            - failed: 登録できなかった件数
+            - failures: 登録できなかった行（先頭 max_failures 件。index: 入力中の位置, error: 例外）
+            - chunks: 実行したトランザクション数
+            - elapsed_sec: 所要時間（秒）
+            - rows_per_sec: 登録件数 / 所要時間
+
+    Raises:
+        DWHValidationError: chunk_size が不正な場合
+        DWHNotFoundError: 評価結果が見つからない場合
+    """
+    if chunk_size <= 0:
+        raise DWHValidationError(
+            f"chunk_size must be positive: {chunk_size}",
+            field_name="chunk_size",
+            field_value=chunk_size
         )
-        row = cursor.fetchone()
-        total_correct = int(row[0])
-        total_items = int(row[1])
 
-    accuracy = (total_correct / total_items) if total_items > 0 else 0.0
+    started = time.perf_counter()
+    with get_connection(db_path, session, read_only=True) as conn:
+        if not fetch_existing_ids(conn, "evaluation_result_table", "evaluation_result_ID", [evaluation_result_id]):
+            raise DWHNotFoundError(
+                f"Evaluation result not found: evaluation_result_ID={evaluation_result_id}",
+                table_name="evaluation_result_table",
+                record_id=evaluation_result_id
+            )
+
+    inserted = 0
+    failed = 0
+    chunks = 0
+    failures: List[Dict] = []
+    iterator = iter(rows)
+    first_index = 0
+
+    def report(chunk_failures: List[Dict]) -> None:
+        nonlocal failed
+        failed += len(chunk_failures)
+        failures.extend(chunk_failures[:max(0, max_failures - len(failures))])
+
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            break
+        valid, chunk_failures = _validate_evaluation_chunk(chunk, first_index)
+        first_index += len(chunk)
+
+        if valid:
+            try:
+                with get_connection(db_path, session) as conn:
+                    existing = fetch_existing_ids(conn, "algorithm_output_table", "algorithm_output_ID",
+                                                  {values[0] for _, values in valid})
+                    insertable = []
+                    for index, values in valid:
+                        if values[0] in existing:
+                            insertable.append((evaluation_result_id,) + values)
+                        else:
+                            chunk_failures.append({"index": index, "error": DWHConstraintError(
+                                f"Algorithm output not found: algorithm_output_ID={values[0]}",
+                                table_name="evaluation_data_table",
+                                constraint_name="FK_eval_result_or_algo_output"
+                            )})
+                    conn.executemany(
+                        """
+                        INSERT INTO evaluation_data_table
+                        (evaluation_result_ID, algorithm_output_ID, correct_task_num, total_task_num, evaluation_data_path)
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        insertable
+                    )
+                inserted += len(insertable)
+            except sqlite3.Error as e:
+                # 失敗したチャンクの検証済みの行をすべて報告し（存在確認の結果は置き換える）、後続のチャンクは続行する
+                error = DWHConstraintError(f"Failed to load evaluation data: {e}", table_name="evaluation_data_table")
+                chunk_failures = [failure for failure in chunk_failures
+                                  if isinstance(failure["error"], DWHValidationError)]
+                chunk_failures.extend({"index": index, "error": error} for index, _ in valid)
+            finally:
+                chunks += 1
+
+        chunk_failures.sort(key=lambda failure: failure["index"])
+        report(chunk_failures)
 
+    elapsed = time.perf_counter() - started
     return {
-        "version": result["version"],
-        "algorithm_ID": result["algorithm_ID"],
-        "true_positive": result["true_positive"],
-        "false_positive_per_hour": result["false_positive"],
-        "total_items": total_items,
-        "total_correct": total_correct,
-        "accuracy": accuracy,
+        "inserted": inserted,
+        "failed": failed,
+        "failures": failures,
+        "chunks": chunks,
+        "elapsed_sec": elapsed,
+        "rows_per_sec": (inserted / elapsed) if elapsed > 0 else 0.0,
     }
 
 
+def list_evaluation_data(evaluation_result_id: int,
+                         db_path: str = "database.db",
+                         session: Optional[DWHSession] = None, *, limit: Optional[int] = None,
+                         after: Optional[str] = None, row_format: str = "dict") -> Union[List[Any], DWHColumns]:
+    """
+    指定した評価結果IDに紐づく個別評価データを一覧取得。
+    limit を指定すると keyset ページングで DWHPage を返し、続きは after に next_after を渡して取得する。
+    row_format で行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"）を選べる。
+    """
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_evaluation_data", (evaluation_result_id,), limit=limit, after=after, row_format=row_format)
+
+
+def iter_evaluation_data(evaluation_result_id: int, chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE,
+                         db_path: str = "database.db", session: Optional[DWHSession] = None, *,
+                         row_format: str = "dict") -> Iterator[Any]:
+    """
+    指定した評価結果IDに紐づく個別評価データを1行ずつ返すジェネレータ（list_evaluation_data のストリーミング版）。
+    接続は最後まで読み終えたとき、または close() されたときに返却される。
+    """
+    with get_connection(db_path, session, read_only=True) as conn:
+        yield from iter_query(conn, "list_evaluation_data", (evaluation_result_id,), chunk_size, row_format)
+
+
+def get_evaluation_overview(evaluation_result_id: int, db_path: str = "database.db",
+                            session: Optional[DWHSession] = None) -> Dict:
+    """
+    評価概要（派生メトリクスを含む）を返す。
+    accuracy = total_correct / total_items （0除算は0.0）
+    """
+    with ensure_session(db_path, session, read_only=True) as session:
+        # ベース情報
+        result = get_evaluation_result(evaluation_result_id, db_path, session)
+
+        with get_connection(db_path, session, read_only=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT COALESCE(SUM(correct_task_num), 0) as total_correct,
+                       COALESCE(SUM(total_task_num), 0) as total_items
+                FROM evaluation_data_table
+                WHERE evaluation_result_ID = ?
+                """,
+                (evaluation_result_id,),
+            )
+            row = cursor.fetchone()
+            total_correct = int(row[0])
+            total_items = int(row[1])
+
+        accuracy = (total_correct / total_items) if total_items > 0 else 0.0
+
+        return {
+            "version": result["version"],
+            "algorithm_ID": result["algorithm_ID"],
+            "true_positive": result["true_positive"],
+            "false_positive_per_hour": result["false_positive"],
+            "total_items": total_items,
+            "total_correct": total_correct,
+            "accuracy": accuracy,
+        }
+
+
@@ -47,3 +47,26 @@ class DWHUniqueConstraintError(DWHError):
         super().__init__(message, "E002")
         self.table_name = table_name
         self.field_name = field_name
+
+
+class DWHForeignKeyViolationError(DWHConstraintError):
+    """一括ロード後の外部キー検査で参照先のない行が見つかったエラー"""
+    def __init__(self, message: str, violations: list = None, total: int = 0):
+        super().__init__(message, constraint_name="FOREIGN KEY")
+        self.violations = violations or []
+        self.total = total
+
+
+class DWHMergeConflictError(DWHConstraintError):
+    """シャードの統合で同じコミットハッシュに異なるバージョン情報が登録されていたエラー"""
+    def __init__(self, message: str, table_name: str = None, conflicts: list = None):
+        super().__init__(message, table_name=table_name, constraint_name="commit_hash")
+        self.conflicts = conflicts or []
+
+
+class DWHBusyError(DWHError):
+    """ロック競合により再試行しても書き込みロックを取得できなかったエラー"""
+    def __init__(self, message: str, db_path: str = None, retries: int = 0):
+        super().__init__(message, "E006")
+        self.db_path = db_path
+        self.retries = retries
@@ -0,0 +1,263 @@
+"""
+CSV / JSONL インポート
+
+CSV または JSONL（gzip 圧縮も可）のファイルを1行ずつ読み込み、SchemaValidator.EXPECTED_TABLES の
+列定義に対応付けて、batch_size 行ごとのトランザクションでテーブルに挿入します。
+保持するのは現在のバッチだけなので、ファイルの大きさによらずメモリ使用量は一定です。
+"""
+
+import csv
+import gzip
+import io
+import itertools
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .connection import DWHConnection, DWHSession, get_connection
+from .exceptions import DWHConstraintError, DWHValidationError
+from .validation import SchemaValidator
+
+# 1トランザクションあたりの行数
+DEFAULT_IMPORT_BATCH_SIZE = 50000
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+_FORMAT_SUFFIXES = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+def detect_format(path: Union[str, Path]) -> str:
+    """
+    拡張子（.gz を除く）からファイル形式を判定
+
+    Args:
+        path: ファイルパス
+
+    Returns:
+        str: "csv" または "jsonl"
+
+    Raises:
+        DWHValidationError: 拡張子から判定できない場合
+    """
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes = suffixes[:-1]
+    if suffixes and suffixes[-1] in _FORMAT_SUFFIXES:
+        return _FORMAT_SUFFIXES[suffixes[-1]]
+    raise DWHValidationError(
+        f"Cannot detect file format from extension: {path}. Expected .csv or .jsonl (optionally .gz)",
+        field_name="format",
+        field_value=str(path)
+    )
+
+
+def _open_text(path: Path) -> io.TextIOBase:
+    """gzip（先頭のマジックバイトで判定）または通常のテキストファイルとして開く"""
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    if compressed:
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8-sig", newline="")
+    return open(path, "r", encoding="utf-8-sig", newline="")
+
+
+def _map_columns(table_name: str, names: Sequence[str]) -> List[str]:
+    """
+    ファイルの列名をテーブルの列名に対応付け（大文字小文字は区別しない）
+
+    Raises:
+        DWHValidationError: テーブルに存在しない列がある場合
+    """
+    columns = {column.lower(): column for column in SchemaValidator.EXPECTED_TABLES[table_name]["columns"]}
+    unknown = [name for name in names if name.strip().lower() not in columns]
+    if unknown:
+        raise DWHValidationError(
+            f"Unknown columns for {table_name}: {', '.join(unknown)}. "
+            f"Available: {', '.join(columns.values())}",
+            field_name="columns",
+            field_value=list(names)
+        )
+    mapped = [columns[name.strip().lower()] for name in names]
+    duplicated = sorted({column for column in mapped if mapped.count(column) > 1})
+    if duplicated:
+        raise DWHValidationError(
+            f"Duplicated columns for {table_name}: {', '.join(duplicated)}",
+            field_name="columns",
+            field_value=list(names)
+        )
+    return mapped
+
+
+def _read_csv(stream: io.TextIOBase, table_name: str) -> Tuple[List[str], Iterator[Tuple]]:
+    """CSVのヘッダを列に対応付け、値の行（空文字は NULL）を返すイテレータを作成"""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return [], iter(())
+    columns = _map_columns(table_name, header)
+    width = len(columns)
+
+    def rows() -> Iterator[Tuple]:
+        for line_number, values in enumerate(reader, start=2):
+            if not values:
+                continue
+            if len(values) != width:
+                raise DWHValidationError(
+                    f"Line {line_number}: expected {width} values, got {len(values)}",
+                    field_name="row",
+                    field_value=values
+                )
+            yield tuple(value if value != "" else None for value in values)
+
+    return columns, rows()
+
+
+def _read_jsonl(stream: io.TextIOBase, table_name: str) -> Tuple[List[str], Iterator[Tuple]]:
+    """先頭のオブジェクトのキーを列に対応付け、値の行を返すイテレータを作成"""
+    lines = (
+        (line_number, line) for line_number, line in enumerate(stream, start=1) if line.strip()
+    )
+
+    def parse(line_number: int, line: str) -> Dict[str, Any]:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise DWHValidationError(
+                f"Line {line_number}: invalid JSON ({e})",
+                field_name="row",
+                field_value=line.strip()
+            ) from e
+        if not isinstance(record, dict):
+            raise DWHValidationError(
+                f"Line {line_number}: expected a JSON object",
+                field_name="row",
+                field_value=line.strip()
+            )
+        return record
+
+    first = next(lines, None)
+    if first is None:
+        return [], iter(())
+    first_record = parse(*first)
+    keys = list(first_record)
+    columns = _map_columns(table_name, keys)
+    key_set = set(keys)
+
+    def rows() -> Iterator[Tuple]:
+        yield tuple(first_record[key] for key in keys)
+        for line_number, line in lines:
+            record = parse(line_number, line)
+            if not key_set.issuperset(record):
+                extra = sorted(set(record) - key_set)
+                raise DWHValidationError(
+                    f"Line {line_number}: keys not present in the first record: {', '.join(extra)}",
+                    field_name="columns",
+                    field_value=extra
+                )
+            yield tuple(record.get(key) for key in keys)
+
+    return columns, rows()
+
+
+def import_file(table_name: str, path: Union[str, Path], file_format: Optional[str] = None,
+                batch_size: int = DEFAULT_IMPORT_BATCH_SIZE, profile: Optional[str] = None,
+                progress: Optional[Callable[[int, float], None]] = None,
+                db_path: str = "database.db", session: Optional[DWHSession] = None) -> Dict:
+    """
+    CSV / JSONL ファイルをテーブルにストリーミングでインポート
+
+    CSVは1行目をヘッダとし、空文字を NULL として扱います。JSONLは先頭のオブジェクトのキーを列とします。
+    列名はテーブルの列名に大文字小文字を区別せず対応付けます。主キー列は省略すると自動採番されます。
+    batch_size 行ごとにコミットするため、途中で失敗した場合もそれまでのバッチは登録されたままです。
+
+    Args:
+        table_name: インポート先のテーブル名
+        path: ファイルパス（.gz は自動で展開）
+        file_format: "csv" または "jsonl"（省略時は拡張子から判定）
+        batch_size: 1トランザクションあたりの行数
+        profile: 接続プロファイル名（大量インポートには "ingest" を推奨）
+        progress: バッチのコミットごとに (累計行数, 経過秒) で呼ばれるコールバック
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時は全バッチをその接続・トランザクションで実行）
+
+    Returns:
+        dict: table, columns, inserted, batches, elapsed_sec, rows_per_sec
+
+    Raises:
+        DWHValidationError: テーブル名・形式・列名・行の形式が不正な場合
+        DWHConstraintError: 挿入が制約違反などで失敗した場合
+    """
+    if table_name not in SchemaValidator.EXPECTED_TABLES:
+        raise DWHValidationError(
+            f"Unknown table: {table_name}. Available: {', '.join(SchemaValidator.EXPECTED_TABLES)}",
+            field_name="table_name",
+            field_value=table_name
+        )
+    if file_format is None:
+        file_format = detect_format(path)
+    if file_format not in IMPORT_FORMATS:
+        raise DWHValidationError(
+            f"Unknown format: {file_format}. Expected one of {', '.join(IMPORT_FORMATS)}",
+            field_name="format",
+            field_value=file_format
+        )
+    if batch_size <= 0:
+        raise DWHValidationError(
+            f"batch_size must be positive: {batch_size}",
+            field_name="batch_size",
+            field_value=batch_size
+        )
+    path = Path(path)
+    if not path.is_file():
+        raise DWHValidationError(
+            f"File not found: {path}",
+            field_name="path",
+            field_value=str(path)
+        )
+
+    started = time.perf_counter()
+    inserted = 0
+    batches = 0
+    with _open_text(path) as stream:
+        reader = _read_csv if file_format == "csv" else _read_jsonl
+        columns, rows = reader(stream, table_name)
+        if columns:
+            sql = (
+                f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})"
+            )
+        while columns:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            if session is not None:
+                scope = get_connection(db_path, session)
+            else:
+                scope = DWHConnection(db_path, profile=profile, begin=True)
+            try:
+                with scope as conn:
+                    conn.executemany(sql, batch)
+            except sqlite3.Error as e:
+                raise DWHConstraintError(
+                    f"Failed to import rows {inserted + 1}-{inserted + len(batch)} into {table_name}: {e}",
+                    table_name=table_name
+                ) from e
+            inserted += len(batch)
+            batches += 1
+            if progress is not None:
+                progress(inserted, time.perf_counter() - started)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "table": table_name,
+        "columns": columns,
+        "inserted": inserted,
+        "batches": batches,
+        "elapsed_sec": elapsed,
+        "rows_per_sec": (inserted / elapsed) if elapsed > 0 else 0.0,
+    }
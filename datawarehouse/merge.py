@@ -0,0 +1,293 @@
+"""
+シャードデータベースの統合
+
+ワーカーごとに作成したシャード（database.db と同じスキーマの SQLite ファイル）を中央のデータベースに
+ATTACH し、全シャードを1トランザクションで INSERT ... SELECT による集合演算で取り込みます。
+
+ID の対応付け:
+- core_lib_table / algorithm_table はコミットハッシュで中央の行に対応付けます。
+  同じハッシュでバージョン名が異なる場合は衝突として統合全体を中止します。
+- 上記以外（およびコミットハッシュのない行）は、同じ ID で、参照先を対応付けた後の内容が一致する行を
+  中央の既存行とみなします（シャードを中央のコピーから作成した場合のマスタデータなど）。
+- 対応する行がないものは中央の末尾に新しい ID で追加し、参照する側の外部キー列
+  （evaluation_result → evaluation_data → analysis_data など）を新しい ID に付け替えます。
+"""
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .connection import DWHBulkLoadSession, get_connection
+from .exceptions import DWHConstraintError, DWHMergeConflictError, DWHValidationError
+from .validation import SchemaValidator
+
+# コミットハッシュで中央の行に対応付けるテーブル: (コミットハッシュ列, バージョン列)
+_COMMIT_HASH_KEYS = {
+    "core_lib_table": ("core_lib_commit_hash", "core_lib_version"),
+    "algorithm_table": ("algorithm_commit_hash", "algorithm_version"),
+}
+
+# シャードの ID → 中央の ID の対応表（テーブルごと）
+_MAP_TABLE = "temp.dwh_merge_map"
+
+
+def _table_layout(table_name: str) -> Tuple[str, List[str], Dict[str, str]]:
+    """テーブルの (主キー列, 主キー以外の列, {外部キー列: 参照先テーブル}) を取得"""
+    table_info = SchemaValidator.EXPECTED_TABLES[table_name]
+    columns = table_info["columns"]
+    primary_key = next(column for column, (_, _, is_pk) in columns.items() if is_pk)
+    others = [column for column in columns if column != primary_key]
+    foreign_keys = {column: parent for column, parent, _ in table_info["foreign_keys"]}
+    return primary_key, others, foreign_keys
+
+
+def _remapped_values(columns: Sequence[str], foreign_keys: Dict[str, str]) -> List[str]:
+    """シャードの行 s の各列を選択する式（外部キー列は中央の ID に付け替える）"""
+    values = []
+    for column in columns:
+        parent = foreign_keys.get(column)
+        if parent is None:
+            values.append(f"s.{column}")
+        else:
+            values.append(
+                f"(SELECT new_id FROM {_MAP_TABLE} WHERE tbl = '{parent}' AND old_id = s.{column})"
+            )
+    return values
+
+
+def _attach_shard(conn: sqlite3.Connection, shard_path: Path, alias: str) -> None:
+    """
+    シャードを ATTACH し、テーブルの存在と外部キーの整合性を確認
+
+    Raises:
+        DWHValidationError: 必要なテーブルがない場合、または参照先のない行がある場合
+    """
+    conn.execute("ATTACH DATABASE ? AS " + alias, (str(shard_path),))
+    tables = {row[0] for row in conn.execute(f"SELECT name FROM {alias}.sqlite_master WHERE type = 'table'")}
+    missing = [table for table in SchemaValidator.EXPECTED_TABLES if table not in tables]
+    if missing:
+        raise DWHValidationError(
+            f"Shard is missing tables: {', '.join(missing)} ({shard_path})",
+            field_name="shard_path",
+            field_value=str(shard_path)
+        )
+    dangling = conn.execute(f"PRAGMA {alias}.foreign_key_check").fetchall()
+    if dangling:
+        raise DWHValidationError(
+            f"Shard has {len(dangling)} row(s) referencing missing parents "
+            f"(first: {dangling[0][0]} rowid={dangling[0][1]}) ({shard_path})",
+            field_name="shard_path",
+            field_value=str(shard_path)
+        )
+
+
+def _merge_table(conn: sqlite3.Connection, alias: str, table_name: str, existing_max_id: int) -> Tuple[int, int]:
+    """
+    1テーブル分のシャードの行を中央の行に対応付け、対応のない行を新しい ID で追加
+
+    Args:
+        conn: 統合先の接続（シャードを alias で ATTACH 済み）
+        alias: シャードの別名
+        table_name: テーブル名
+        existing_max_id: 統合開始時点の中央の最大 ID（これより後の行は同じ統合で追加した行）
+
+    Returns:
+        tuple: (既存行に対応付けた件数, 追加した件数)
+
+    Raises:
+        DWHMergeConflictError: 同じコミットハッシュでバージョン名が異なる行がある場合
+    """
+    primary_key, columns, foreign_keys = _table_layout(table_name)
+    values = _remapped_values(columns, foreign_keys)
+
+    hash_key = _COMMIT_HASH_KEYS.get(table_name)
+    if hash_key is not None:
+        hash_column, version_column = hash_key
+        conflicts = [
+            {
+                "shard_id": row[0],
+                "central_id": row[1],
+                "commit_hash": row[2],
+                "shard_version": row[3],
+                "central_version": row[4],
+            }
+            for row in conn.execute(
+                f"""
+                SELECT s.{primary_key}, m.{primary_key}, s.{hash_column}, s.{version_column}, m.{version_column}
+                FROM {alias}.{table_name} s
+                JOIN main.{table_name} m ON m.{hash_column} = s.{hash_column}
+                WHERE m.{version_column} IS NOT s.{version_column}
+                ORDER BY s.{primary_key}
+                """
+            )
+        ]
+        if conflicts:
+            summary = ", ".join(
+                f"{c['commit_hash']}: {c['shard_version']} != {c['central_version']}" for c in conflicts[:5]
+            )
+            raise DWHMergeConflictError(
+                f"{len(conflicts)} commit hash conflict(s) in {table_name}: {summary}"
+                + (" ..." if len(conflicts) > 5 else ""),
+                table_name=table_name,
+                conflicts=conflicts
+            )
+        conn.execute(
+            f"""
+            INSERT INTO {_MAP_TABLE} (tbl, old_id, new_id)
+            SELECT ?, s.{primary_key}, MIN(m.{primary_key})
+            FROM {alias}.{table_name} s
+            JOIN main.{table_name} m ON m.{hash_column} = s.{hash_column}
+            GROUP BY s.{primary_key}
+            """,
+            (table_name,)
+        )
+
+    # 統合開始前からある行と同じ ID で内容も一致する行は中央の既存行として扱う
+    # （先に統合した別シャードの行とは、同じ ID・内容でも別の行として扱う）
+    same_content = " AND ".join(f"m.{column} IS {value}" for column, value in zip(columns, values))
+    conn.execute(
+        f"""
+        INSERT INTO {_MAP_TABLE} (tbl, old_id, new_id)
+        SELECT ?, s.{primary_key}, s.{primary_key}
+        FROM {alias}.{table_name} s
+        JOIN main.{table_name} m ON m.{primary_key} = s.{primary_key}
+        WHERE s.{primary_key} <= ?
+          AND s.{primary_key} NOT IN (SELECT old_id FROM {_MAP_TABLE} WHERE tbl = ?)
+          AND {same_content}
+        """,
+        (table_name, existing_max_id, table_name)
+    )
+
+    # 残りの行には AUTOINCREMENT の次の値から連番で ID を割り当て、対応表を完成させてから挿入する
+    # （自己参照の外部キー列もこの対応表で付け替えられる）
+    start_id = conn.execute(
+        f"""
+        SELECT MAX(
+            COALESCE((SELECT seq FROM main.sqlite_sequence WHERE name = ?), 0),
+            COALESCE((SELECT MAX({primary_key}) FROM main.{table_name}), 0)
+        ) + 1
+        """,
+        (table_name,)
+    ).fetchone()[0]
+    conn.execute(
+        f"""
+        INSERT INTO {_MAP_TABLE} (tbl, old_id, new_id)
+        SELECT ?, {primary_key}, ? - 1 + ROW_NUMBER() OVER (ORDER BY {primary_key})
+        FROM {alias}.{table_name}
+        WHERE {primary_key} NOT IN (SELECT old_id FROM {_MAP_TABLE} WHERE tbl = ?)
+        """,
+        (table_name, start_id, table_name)
+    )
+    cursor = conn.execute(
+        f"""
+        INSERT INTO main.{table_name} ({primary_key}, {', '.join(columns)})
+        SELECT ids.new_id, {', '.join(values)}
+        FROM {alias}.{table_name} s
+        JOIN {_MAP_TABLE} ids ON ids.tbl = ? AND ids.old_id = s.{primary_key}
+        WHERE ids.new_id >= ?
+        ORDER BY ids.new_id
+        """,
+        (table_name, start_id)
+    )
+    inserted = cursor.rowcount
+    mapped = conn.execute(f"SELECT COUNT(*) FROM {_MAP_TABLE} WHERE tbl = ?", (table_name,)).fetchone()[0]
+    return mapped - inserted, inserted
+
+
+def merge_shards(shard_paths: Sequence[Union[str, Path]], db_path: str = "database.db",
+                 profile: Optional[str] = None) -> Dict:
+    """
+    ワーカーごとのシャードデータベースを中央のデータベースに統合
+
+    全シャードを1トランザクションで取り込むため、途中で失敗した場合は何も登録されません。
+    取り込み後に外部キーをまとめて検査します（DWHBulkLoadSession）。
+    同じシャードを2回統合すると、新しい ID で追加された行は再度追加されます。
+
+    Args:
+        shard_paths: シャードのデータベースファイルのパスのリスト（SQLite の ATTACH 上限まで）
+        db_path: 統合先（中央）のデータベースファイルのパス
+        profile: 接続プロファイル名（大量の統合には "ingest" を推奨）
+
+    Returns:
+        dict: shards（シャードごとの shard, matched, inserted。matched / inserted はテーブル名ごとの件数）,
+              inserted（全シャードのテーブル名ごとの追加件数の合計）, elapsed_sec
+
+    Raises:
+        DWHValidationError: シャードが見つからない・統合先と同じ・数が多すぎる・テーブルや参照が不完全な場合
+        DWHMergeConflictError: 同じコミットハッシュでバージョン名が異なる行がある場合
+        DWHForeignKeyViolationError: 統合後に参照先のない行がある場合
+        DWHConstraintError: 挿入が制約違反などで失敗した場合
+    """
+    shards = [Path(path) for path in shard_paths]
+    if not shards:
+        raise DWHValidationError("No shard paths given", field_name="shard_paths", field_value=[])
+    central = Path(db_path).resolve()
+    for shard in shards:
+        if not shard.is_file():
+            raise DWHValidationError(
+                f"Shard not found: {shard}",
+                field_name="shard_path",
+                field_value=str(shard)
+            )
+        if shard.resolve() == central:
+            raise DWHValidationError(
+                f"Shard is the target database itself: {shard}",
+                field_name="shard_path",
+                field_value=str(shard)
+            )
+    if len({shard.resolve() for shard in shards}) != len(shards):
+        raise DWHValidationError(
+            "Same shard is given more than once",
+            field_name="shard_paths",
+            field_value=[str(shard) for shard in shards]
+        )
+
+    started = time.perf_counter()
+    results = []
+    totals = {table: 0 for table in SchemaValidator.EXPECTED_TABLES}
+    # DETACH はトランザクション中に行えないため、全シャードを別名で ATTACH したままコミットする
+    with DWHBulkLoadSession(db_path, profile=profile) as session, get_connection(db_path, session) as conn:
+        max_attached = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(shards) > max_attached:
+            raise DWHValidationError(
+                f"Too many shards for one merge: {len(shards)} (SQLite allows {max_attached} attached databases). "
+                "Merge them in several calls",
+                field_name="shard_paths",
+                field_value=[str(shard) for shard in shards]
+            )
+        shard = None
+        try:
+            existing_max_ids = {
+                table_name: conn.execute(
+                    f"SELECT COALESCE(MAX({_table_layout(table_name)[0]}), 0) FROM main.{table_name}"
+                ).fetchone()[0]
+                for table_name in SchemaValidator.EXPECTED_TABLES
+            }
+            conn.execute(
+                f"CREATE TABLE {_MAP_TABLE} "
+                "(tbl TEXT NOT NULL, old_id INTEGER NOT NULL, new_id INTEGER NOT NULL, PRIMARY KEY (tbl, old_id)) "
+                "WITHOUT ROWID"
+            )
+            for index, shard in enumerate(shards):
+                alias = f"dwh_shard_{index}"
+                _attach_shard(conn, shard, alias)
+                conn.execute(f"DELETE FROM {_MAP_TABLE}")
+                matched: Dict[str, int] = {}
+                inserted: Dict[str, int] = {}
+                # EXPECTED_TABLES は参照先のテーブルが先に並んでいる
+                for table_name in SchemaValidator.EXPECTED_TABLES:
+                    matched[table_name], inserted[table_name] = _merge_table(
+                        conn, alias, table_name, existing_max_ids[table_name]
+                    )
+                    totals[table_name] += inserted[table_name]
+                results.append({"shard": str(shard), "matched": matched, "inserted": inserted})
+            conn.execute(f"DROP TABLE {_MAP_TABLE}")
+        except sqlite3.Error as e:
+            raise DWHConstraintError(f"Failed to merge shard {shard}: {e}") from e
+
+    return {
+        "shards": results,
+        "inserted": totals,
+        "elapsed_sec": time.perf_counter() - started,
+    }
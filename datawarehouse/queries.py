@@ -0,0 +1,1031 @@
+"""
+名前付きSQL文のレジストリ
+
+よく使われる取得・一覧・検索のSQL文をここで一元管理します。
+任意の絞り込み条件を持つ文は、指定された条件の組み合わせごとにSQL文字列を1度だけ構築して再利用するため、
+同じ組み合わせの呼び出しは常に同一のSQL文字列になり、接続ごとの文キャッシュ（cached_statements）に載ります。
+"""
+
+import base64
+import json
+import sqlite3
+import string
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from . import records
+from .connection import DEFAULT_STATEMENT_CACHE_SIZE
+from .exceptions import DWHNotFoundError, DWHValidationError
+from .records import DWHColumns, build_columns, fetch_columns, row_converter, validate_row_format
+
+
+class Statement:
+    """
+    名前付きSQL文
+
+    select に FROM/JOIN までを、where に常に適用する条件を、filters に任意の絞り込み条件
+    （引数名 -> 条件式）を指定します。filters の条件は値が None でない引数についてのみ、
+    定義順に AND で連結されます。
+
+    keyset には並び順のキー（SQL式, 結果の列名, 降順かどうか）を指定します。ORDER BY はキーから作られ、
+    キーを使った keyset ページング（fetch_list の limit / after）が可能になります。
+    最後のキーは行を一意に決める NULL にならない列（主キーなど）とし、それ以外のキーは NULL を取り得るものとして扱います。
+
+    record には row_format="record" / "namedtuple" で使う records の dataclass（フィールドが結果の列順と一致するもの）を指定します。
+    """
+
+    def __init__(self, name: str, select: str, where: Sequence[str] = (),
+                 filters: Optional[Dict[str, str]] = None, group_by: str = "",
+                 order_by: str = "", keyset: Sequence[Tuple[str, str, bool]] = (),
+                 record: Optional[type] = None):
+        """
+        初期化
+
+        Args:
+            name: 文の名前（通常は使用するAPI関数名）
+            select: SELECT 〜 FROM/JOIN 部分
+            where: 常に適用する条件式
+            filters: 任意の絞り込み条件（引数名 -> 条件式、プレースホルダは1つ）
+            group_by: GROUP BY 句の内容
+            order_by: ORDER BY 句の内容（keyset 指定時は不要）
+            keyset: 並び順のキー（SQL式, 結果の列名, 降順かどうか）
+            record: 結果の行の dataclass
+        """
+        if keyset and (order_by or group_by):
+            raise ValueError(f"Statement {name}: keyset cannot be combined with order_by or group_by")
+        self.name = name
+        self.select = " ".join(select.split())
+        self.where = tuple(where)
+        self.filters = dict(filters or {})
+        self.group_by = group_by
+        self.keyset = tuple(keyset)
+        self.record = record
+        self.order_by = order_by or ", ".join(
+            expression + (" DESC" if descending else "") for expression, _, descending in self.keyset
+        )
+        self._variants: Dict[Tuple, str] = {}
+
+    def text(self, active: Tuple[str, ...] = (), seek: str = "", limited: bool = False) -> str:
+        """
+        有効な絞り込み条件の組み合わせに対応するSQL文字列を取得（組み合わせごとに1度だけ構築）
+
+        Args:
+            active: 有効な絞り込み条件の引数名（filters の定義順）
+            seek: keyset ページングの位置の条件式
+            limited: 末尾に LIMIT ? を付けるかどうか
+
+        Returns:
+            str: SQL文字列
+        """
+        key = (active, seek, limited) if seek or limited else active
+        sql = self._variants.get(key)
+        if sql is None:
+            sql = self.select
+            conditions = list(self.where) + [self.filters[name] for name in active]
+            if seek:
+                conditions.append(seek)
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            if self.group_by:
+                sql += " GROUP BY " + self.group_by
+            if self.order_by:
+                sql += " ORDER BY " + self.order_by
+            if limited:
+                sql += " LIMIT ?"
+            self._variants[key] = sql
+        return sql
+
+    def bind(self, params: Sequence = (), **filters) -> Tuple[str, List]:
+        """
+        パラメータを割り当ててSQL文字列とバインド値を取得
+
+        Args:
+            params: where のプレースホルダに対応する値
+            **filters: 絞り込み条件の値（None の条件は適用しない）
+
+        Returns:
+            tuple: (SQL文字列, バインド値のリスト)
+        """
+        unknown = set(filters) - set(self.filters)
+        if unknown:
+            raise KeyError(f"Unknown filters for statement {self.name}: {sorted(unknown)}")
+        active = tuple(name for name in self.filters if filters.get(name) is not None)
+        return self.text(active), list(params) + [filters[name] for name in active]
+
+    def bind_page(self, params: Sequence = (), seek: str = "", seek_values: Sequence = (),
+                  limit: int = 1, **filters) -> Tuple[str, List]:
+        """
+        keyset ページングの位置の条件と LIMIT を加えてSQL文字列とバインド値を取得
+
+        Args:
+            params: where のプレースホルダに対応する値
+            seek: 位置の条件式（空の場合は先頭から）
+            seek_values: seek のプレースホルダに対応する値
+            limit: 取得する最大行数
+            **filters: 絞り込み条件の値（None の条件は適用しない）
+
+        Returns:
+            tuple: (SQL文字列, バインド値のリスト)
+        """
+        unknown = set(filters) - set(self.filters)
+        if unknown:
+            raise KeyError(f"Unknown filters for statement {self.name}: {sorted(unknown)}")
+        active = tuple(name for name in self.filters if filters.get(name) is not None)
+        values = list(params) + [filters[name] for name in active] + list(seek_values) + [limit]
+        return self.text(active, seek, limited=True), values
+
+    @property
+    def variant_count(self) -> int:
+        """構築済みのSQL文字列の数"""
+        return len(self._variants)
+
+
+_statements: Dict[str, Statement] = {}
+_cache_stats_lock = threading.Lock()
+_cache_stats: Dict[str, Dict[str, int]] = {}
+
+
+def register(name: str, select: str, where: Sequence[str] = (),
+             filters: Optional[Dict[str, str]] = None, group_by: str = "",
+             order_by: str = "", keyset: Sequence[Tuple[str, str, bool]] = (),
+             record: Optional[type] = None) -> Statement:
+    """
+    SQL文をレジストリに登録
+
+    Args:
+        name: 文の名前
+        select, where, filters, group_by, order_by, keyset, record: Statement と同じ
+
+    Returns:
+        Statement: 登録した文
+    """
+    if name in _statements:
+        raise ValueError(f"Statement already registered: {name}")
+    statement = Statement(name, select, where, filters, group_by, order_by, keyset, record)
+    _statements[name] = statement
+    return statement
+
+
+def get_statement(name: str) -> Statement:
+    """
+    登録済みのSQL文を取得
+
+    Args:
+        name: 文の名前
+
+    Returns:
+        Statement: 登録済みの文
+    """
+    return _statements[name]
+
+
+def execute_query(conn: sqlite3.Connection, name: str, params: Sequence = (),
+                  **filters) -> sqlite3.Cursor:
+    """
+    登録済みのSQL文を実行
+
+    Args:
+        conn: 実行する接続
+        name: 文の名前
+        params: where のプレースホルダに対応する値
+        **filters: 絞り込み条件の値（None の条件は適用しない）
+
+    Returns:
+        sqlite3.Cursor: 実行後のカーソル
+    """
+    sql, values = _statements[name].bind(params, **filters)
+    _track_statement_cache(conn, name, sql)
+    return conn.execute(sql, values)
+
+
+# iter_* 関数が fetchmany で1回に取得する行数
+DEFAULT_FETCH_CHUNK_SIZE = 1000
+
+
+def iter_rows(cursor: sqlite3.Cursor, chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE,
+              row_format: str = "dict", record: Optional[type] = None) -> Iterator[Any]:
+    """
+    カーソルの結果を chunk_size 行ずつ取得し、row_format の形式で1行ずつ返す
+
+    保持するのは取得中の chunk_size 行だけなので、結果の行数によらずメモリ使用量は一定です。
+
+    Args:
+        cursor: 実行後のカーソル
+        chunk_size: fetchmany で1回に取得する行数
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record"）
+        record: "namedtuple" / "record" で使う dataclass
+
+    Yields:
+        1行分の値（デフォルトは dict）
+
+    Raises:
+        DWHValidationError: chunk_size が正でない場合、row_format が不正な場合
+    """
+    if chunk_size <= 0:
+        raise DWHValidationError(
+            f"chunk_size must be positive: {chunk_size}",
+            field_name="chunk_size",
+            field_value=chunk_size
+        )
+    convert = row_converter(cursor, row_format, record)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from convert(rows)
+
+
+def iter_query(conn: sqlite3.Connection, name: str, params: Sequence = (),
+               chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE, row_format: str = "dict",
+               **filters) -> Iterator[Any]:
+    """
+    登録済みのSQL文を実行し、結果を chunk_size 行ずつ取得して row_format の形式で1行ずつ返す
+
+    Args:
+        conn: 実行する接続
+        name: 文の名前
+        params: where のプレースホルダに対応する値
+        chunk_size: fetchmany で1回に取得する行数
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record"）
+        **filters: 絞り込み条件の値（None の条件は適用しない）
+
+    Yields:
+        1行分の値（デフォルトは dict）
+    """
+    cursor = execute_query(conn, name, params, **filters)
+    yield from iter_rows(cursor, chunk_size, row_format, _statements[name].record)
+
+
+class DWHPage(list):
+    """
+    keyset ページングの1ページ分の行
+
+    list として行（辞書）を保持し、next_after に次のページを取得するためのトークンを持ちます。
+    最後のページでは next_after は None です。
+    """
+
+    def __init__(self, rows: Iterable[Dict] = (), next_after: Optional[str] = None):
+        super().__init__(rows)
+        self.next_after = next_after
+
+    def __repr__(self) -> str:
+        return f"DWHPage({list.__repr__(self)}, next_after={self.next_after!r})"
+
+
+def _encode_after(statement: Statement, columns: List[str], row: Tuple) -> str:
+    """ページ最後の行（タプル）の並び順キーから after トークン（URL-safe base64 の JSON）を作成"""
+    keys = [row[columns.index(column)] for _, column, _ in statement.keyset]
+    data = json.dumps([statement.name, keys], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_after(statement: Statement, after: str) -> List:
+    """
+    after トークンを並び順キーの値に復元
+
+    Raises:
+        DWHValidationError: 形式が不正な場合や、別の一覧のトークンの場合
+    """
+    try:
+        data = base64.urlsafe_b64decode(after + "=" * (-len(after) % 4))
+        name, keys = json.loads(data.decode("utf-8"))
+    except (TypeError, ValueError) as e:
+        raise DWHValidationError(
+            f"Invalid after token: {e}",
+            field_name="after",
+            field_value=after
+        ) from e
+    valid = (
+        name == statement.name
+        and isinstance(keys, list)
+        and len(keys) == len(statement.keyset)
+        and keys[-1] is not None
+        and all(key is None or (isinstance(key, (int, float, str)) and not isinstance(key, bool))
+                for key in keys)
+    )
+    if not valid:
+        raise DWHValidationError(
+            f"after token does not belong to {statement.name}",
+            field_name="after",
+            field_value=after
+        )
+    return keys
+
+
+def _after_condition(keyset: Sequence[Tuple[str, str, bool]], keys: Sequence,
+                     start: int) -> Tuple[str, List]:
+    """
+    start 番目以降のキーについて、並び順で keys より後ろにある行の条件式を作成
+
+    SQLite では NULL は最小の値として並ぶため、昇順では先頭、降順では末尾になります。
+    """
+    disjuncts: List[str] = []
+    values: List = []
+    for index in range(start, len(keyset)):
+        expression, _, descending = keyset[index]
+        key = keys[index]
+        if key is None and descending:
+            continue
+        terms: List[str] = []
+        for prior in range(start, index):
+            if keys[prior] is None:
+                terms.append(f"{keyset[prior][0]} IS NULL")
+            else:
+                terms.append(f"{keyset[prior][0]} = ?")
+                values.append(keys[prior])
+        if key is None:
+            terms.append(f"{expression} IS NOT NULL")
+        elif descending and index < len(keyset) - 1:
+            terms.append(f"({expression} < ? OR {expression} IS NULL)")
+            values.append(key)
+        else:
+            terms.append(f"{expression} {'<' if descending else '>'} ?")
+            values.append(key)
+        disjuncts.append(" AND ".join(terms))
+    if not disjuncts:
+        return "0", []
+    return "(" + " OR ".join(f"({disjunct})" for disjunct in disjuncts) + ")", values
+
+
+def _seek_phases(statement: Statement, keys: Sequence) -> List[Tuple[str, List]]:
+    """
+    after トークンの位置から続きを取得する条件式を、順に実行するクエリごとに作成
+
+    先頭キーに範囲条件（>= / <=）を付けてインデックスで位置を探せるようにし、先頭キーの
+    NULL の行は別のクエリ（昇順では NULL の行の後、降順では NULL でない行の後）で取得します。
+    """
+    expression, _, descending = statement.keyset[0]
+    first = keys[0]
+    if len(statement.keyset) == 1:
+        return [(f"{expression} {'<' if descending else '>'} ?", [first])]
+    rest, rest_values = _after_condition(statement.keyset, keys, 1)
+    if first is None:
+        phases = [(f"{expression} IS NULL AND {rest}", rest_values)]
+        if not descending:
+            phases.append((f"{expression} IS NOT NULL", []))
+        return phases
+    bound, strict = ("<=", "<") if descending else (">=", ">")
+    phases = [(
+        f"{expression} {bound} ? AND ({expression} {strict} ? OR ({expression} = ? AND {rest}))",
+        [first, first, first] + rest_values,
+    )]
+    if descending:
+        phases.append((f"{expression} IS NULL", []))
+    return phases
+
+
+def fetch_list(conn: sqlite3.Connection, name: str, params: Sequence = (),
+               limit: Optional[int] = None, after: Optional[str] = None,
+               row_format: str = "dict", **filters) -> Union[List[Any], DWHColumns]:
+    """
+    登録済みの一覧用SQL文を実行し、全件または keyset ページングの1ページを取得
+
+    limit を指定すると、並び順キー（Statement.keyset）の位置から limit 件だけを取得します。
+    OFFSET と違って読み飛ばす行がないため、何ページ目でも1ページ目と同じコストで取得できます。
+
+    Args:
+        conn: 実行する接続
+        name: 文の名前（keyset を持つ文）
+        params: where のプレースホルダに対応する値
+        limit: 1ページの行数（None の場合は全件）
+        after: 前のページの next_after（None の場合は先頭ページ）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"）
+        **filters: 絞り込み条件の値（None の条件は適用しない）
+
+    Returns:
+        List[Any] or DWHColumns: limit 未指定時は全行のリスト、指定時は DWHPage（行はデフォルトで dict）。
+            row_format="columns" の場合は DWHColumns（limit 指定時は next_after を持つ）
+
+    Raises:
+        DWHValidationError: limit が正の整数でない場合、limit なしで after を指定した場合、
+            after トークンが不正な場合、row_format が不正な場合
+    """
+    validate_row_format(row_format)
+    statement = _statements[name]
+    if limit is None:
+        if after is not None:
+            raise DWHValidationError(
+                "after requires limit",
+                field_name="after",
+                field_value=after
+            )
+        cursor = execute_query(conn, name, params, **filters)
+        if row_format == "columns":
+            return fetch_columns(cursor)
+        return row_converter(cursor, row_format, statement.record)(cursor.fetchall())
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0:
+        raise DWHValidationError(
+            f"limit must be a positive integer: {limit!r}",
+            field_name="limit",
+            field_value=limit
+        )
+    if not statement.keyset:
+        raise ValueError(f"Statement {name} has no keyset")
+    phases = [("", [])] if after is None else _seek_phases(statement, _decode_after(statement, after))
+    rows: List[Tuple] = []
+    for seek, seek_values in phases:
+        sql, values = statement.bind_page(params, seek, seek_values, limit + 1 - len(rows), **filters)
+        _track_statement_cache(conn, name, sql)
+        cursor = conn.execute(sql, values)
+        cursor.row_factory = None
+        rows.extend(cursor.fetchall())
+        if len(rows) > limit:
+            break
+    columns = [column[0] for column in cursor.description]
+    next_after = None
+    if len(rows) > limit:
+        del rows[limit:]
+        next_after = _encode_after(statement, columns, rows[-1])
+    if row_format == "columns":
+        return build_columns(columns, [rows], next_after)
+    return DWHPage(row_converter(cursor, row_format, statement.record)(rows), next_after)
+
+
+def _track_statement_cache(conn: sqlite3.Connection, name: str, sql: str) -> None:
+    """
+    接続の文キャッシュに載っているかを、接続ごとのLRUで追跡して集計
+
+    sqlite3 の文キャッシュは SQL 文字列をキーにした LRU のため、同じ容量の LRU で近似します。
+    """
+    lru = getattr(conn, "_dwh_statement_lru", None)
+    if lru is None:
+        lru = conn._dwh_statement_lru = OrderedDict()
+    hit = sql in lru
+    if hit:
+        lru.move_to_end(sql)
+    else:
+        lru[sql] = None
+        if len(lru) > DEFAULT_STATEMENT_CACHE_SIZE:
+            lru.popitem(last=False)
+    with _cache_stats_lock:
+        stats = _cache_stats.get(name)
+        if stats is None:
+            stats = _cache_stats[name] = {"hits": 0, "misses": 0}
+        stats["hits" if hit else "misses"] += 1
+
+
+def get_statement_cache_stats() -> Dict:
+    """
+    文キャッシュのヒット・ミス数を取得
+
+    Returns:
+        dict: hits, misses, hit_ratio, cache_size, registered, variants,
+              statements（文の名前ごとの hits, misses, variants）
+    """
+    with _cache_stats_lock:
+        per_statement = {name: dict(stats) for name, stats in _cache_stats.items()}
+    hits = sum(stats["hits"] for stats in per_statement.values())
+    misses = sum(stats["misses"] for stats in per_statement.values())
+    for name, stats in per_statement.items():
+        stats["variants"] = _statements[name].variant_count
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": (hits / (hits + misses)) if hits + misses else 0.0,
+        "cache_size": DEFAULT_STATEMENT_CACHE_SIZE,
+        "registered": len(_statements),
+        "variants": sum(statement.variant_count for statement in _statements.values()),
+        "statements": per_statement,
+    }
+
+
+def reset_statement_cache_stats() -> None:
+    """文キャッシュのヒット・ミス数をリセット"""
+    with _cache_stats_lock:
+        _cache_stats.clear()
+
+
+# INSERT ... RETURNING が使えるか（SQLite 3.35.0 以降）
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# 存在確認・名前解決クエリ1回あたりの値の数（SQLiteのバインド変数上限より十分小さい値）
+LOOKUP_CHUNK_SIZE = 500
+
+
+def fetch_existing_ids(conn: sqlite3.Connection, table_name: str, id_column: str,
+                       ids: Iterable[int]) -> Set[int]:
+    """
+    指定したIDのうちテーブルに存在するものを、チャンク単位のIN句でまとめて取得
+
+    Args:
+        conn: データベース接続
+        table_name: テーブル名
+        id_column: 主キー列名
+        ids: 確認するID
+
+    Returns:
+        Set[int]: 存在するID
+    """
+    existing: Set[int] = set()
+    id_list = sorted(set(ids))
+    for offset in range(0, len(id_list), LOOKUP_CHUNK_SIZE):
+        chunk = id_list[offset:offset + LOOKUP_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor = conn.execute(
+            f"SELECT {id_column} FROM {table_name} WHERE {id_column} IN ({placeholders})",
+            chunk
+        )
+        existing.update(row[0] for row in cursor)
+    return existing
+
+
+def insert_many_returning_ids(conn: sqlite3.Connection, table_name: str, columns: Sequence[str],
+                              id_column: str, rows: Sequence[Sequence]) -> List[int]:
+    """
+    行をまとめて挿入し、各行に採番されたIDを行の順に取得
+
+    INSERT ... RETURNING が使える場合は LOOKUP_CHUNK_SIZE 個以内の値ずつ複数行の VALUES で挿入し、
+    使えない場合は executemany の後の last_insert_rowid() から逆算します。
+    1文の INSERT では VALUES の順に増加するIDが採番され、書き込みロックを保持したトランザクション内では
+    executemany の連続した INSERT の採番も連番になります。
+
+    Args:
+        conn: 書き込みトランザクション中の接続
+        table_name: テーブル名
+        columns: 挿入する列名
+        id_column: 採番される主キー列名
+        rows: 列の順に並んだ値の行
+
+    Returns:
+        List[int]: rows と同じ順のID
+
+    Raises:
+        sqlite3.Error: 挿入に失敗した場合
+    """
+    column_list = ", ".join(columns)
+    row_placeholders = f"({', '.join('?' * len(columns))})"
+    if not SUPPORTS_RETURNING:
+        conn.executemany(f"INSERT INTO {table_name} ({column_list}) VALUES {row_placeholders}", rows)
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+    ids: List[int] = []
+    rows_per_statement = max(1, LOOKUP_CHUNK_SIZE // len(columns))
+    for offset in range(0, len(rows), rows_per_statement):
+        chunk = rows[offset:offset + rows_per_statement]
+        cursor = conn.execute(
+            f"INSERT INTO {table_name} ({column_list}) VALUES {', '.join([row_placeholders] * len(chunk))} "
+            f"RETURNING {id_column}",
+            [value for row in chunk for value in row]
+        )
+        # RETURNING の行の順序は規定されないため、VALUES の順に増加するIDを並べ替えて対応付ける
+        ids.extend(sorted(row[0] for row in cursor))
+    return ids
+
+
+class DWHBatchResult(dict):
+    """
+    IDを指定した一括取得の結果
+
+    dict として ID -> 行を要求した順に保持し、missing に見つからなかったIDを要求した順に持ちます。
+    """
+
+    def __init__(self, rows: Iterable[Tuple[Any, Any]] = (), missing: Sequence = (),
+                 table_name: Optional[str] = None):
+        super().__init__(rows)
+        self.missing = list(missing)
+        self.table_name = table_name
+
+    def __repr__(self) -> str:
+        return f"DWHBatchResult({dict.__repr__(self)}, missing={self.missing!r})"
+
+    def raise_for_missing(self) -> None:
+        """
+        見つからなかったIDがあれば例外を送出
+
+        Raises:
+            DWHNotFoundError: 見つからなかったIDがある場合（record_id は最初のID）
+        """
+        if self.missing:
+            shown = ", ".join(str(record_id) for record_id in self.missing[:20])
+            more = f" (+{len(self.missing) - 20} more)" if len(self.missing) > 20 else ""
+            raise DWHNotFoundError(
+                f"{len(self.missing)} ID(s) not found in {self.table_name}: {shown}{more}",
+                table_name=self.table_name,
+                record_id=self.missing[0]
+            )
+
+
+def fetch_by_ids(conn: sqlite3.Connection, name: str, id_expression: str, table_name: str,
+                 ids: Iterable, row_format: str = "dict") -> DWHBatchResult:
+    """
+    登録済みの一括取得用SQL文を、チャンク単位の IN 句で任意件数のIDについて実行
+
+    結果の先頭列がIDである文を指定します。重複したIDは1回だけ取得します。
+    IN 句のSQL文字列はプレースホルダ数ごとに1度だけ構築して再利用します。
+
+    Args:
+        conn: 実行する接続
+        name: 一括取得用の文の名前（例: "get_videos"）
+        id_expression: IDのSQL式（例: "video_ID"）
+        table_name: IDのテーブル名（missing の報告に使用）
+        ids: 取得するID
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record"）
+
+    Returns:
+        DWHBatchResult: ID -> 行（要求した順）と missing
+
+    Raises:
+        DWHValidationError: row_format が不正な場合
+    """
+    validate_row_format(row_format)
+    if row_format == "columns":
+        raise DWHValidationError(
+            "row_format='columns' cannot be used for results keyed by ID",
+            field_name="row_format",
+            field_value=row_format
+        )
+    statement = _statements[name]
+    requested = list(dict.fromkeys(ids))
+    found: Dict[Any, Any] = {}
+    for offset in range(0, len(requested), LOOKUP_CHUNK_SIZE):
+        chunk = requested[offset:offset + LOOKUP_CHUNK_SIZE]
+        sql = statement.text(seek=f"{id_expression} IN ({', '.join('?' * len(chunk))})")
+        _track_statement_cache(conn, name, sql)
+        cursor = conn.execute(sql, chunk)
+        cursor.row_factory = None
+        rows = cursor.fetchall()
+        found.update(zip((row[0] for row in rows), row_converter(cursor, row_format, statement.record)(rows)))
+    return DWHBatchResult(
+        ((record_id, found[record_id]) for record_id in requested if record_id in found),
+        [record_id for record_id in requested if record_id not in found],
+        table_name
+    )
+
+
+def compile_path_template(template: str, columns: Dict[str, str]) -> Tuple[str, List[str]]:
+    """
+    {video_id} のような置換フィールドを含むパステンプレートを、SQLの文字列連結式に変換
+
+    固定部分はバインド値として渡すため、INSERT ... SELECT で行ごとのパスをSQL側で組み立てられます。
+
+    Args:
+        template: パステンプレート（例: "core_lib/{core_lib_version}/{video_id}"）
+        columns: 置換フィールド名 -> SQL列式
+
+    Returns:
+        tuple: (SQL式, バインド値のリスト)
+
+    Raises:
+        DWHValidationError: 未知の置換フィールドや書式指定を含む場合
+    """
+    parts: List[str] = []
+    values: List[str] = []
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError as e:
+        raise DWHValidationError(
+            f"Invalid path template: {template} ({e})",
+            field_name="output_dir_template",
+            field_value=template
+        ) from e
+    for literal, field, format_spec, conversion in parsed:
+        if literal:
+            parts.append("?")
+            values.append(literal)
+        if field is None:
+            continue
+        if field not in columns or format_spec or conversion:
+            placeholder = field + (f"!{conversion}" if conversion else "") + (f":{format_spec}" if format_spec else "")
+            raise DWHValidationError(
+                f"Unsupported field in path template: {{{placeholder}}}. "
+                f"Available: {', '.join('{' + name + '}' for name in columns)}",
+                field_name="output_dir_template",
+                field_value=template
+            )
+        parts.append(f"IFNULL(CAST({columns[field]} AS TEXT), '')")
+    if not parts:
+        return "''", []
+    return " || ".join(parts), values
+
+
+# =============== タスク・被験者 ===============
+
+register(
+    "get_task",
+    "SELECT task_ID, task_set, task_name, task_describe FROM task_table",
+    where=["task_ID = ?"],
+)
+register(
+    "list_tasks",
+    "SELECT task_ID, task_set, task_name, task_describe FROM task_table",
+    filters={"task_set": "task_set = ?"},
+    keyset=[("task_set", "task_set", False), ("task_ID", "task_ID", False)],
+    record=records.Task,
+)
+register(
+    "get_subject",
+    "SELECT subject_ID, subject_name FROM subject_table",
+    where=["subject_ID = ?"],
+)
+register(
+    "list_subjects",
+    "SELECT subject_ID, subject_name FROM subject_table",
+    keyset=[("subject_ID", "subject_ID", False)],
+    record=records.Subject,
+)
+
+# =============== ビデオ・タグ ===============
+
+register(
+    "get_video",
+    "SELECT video_ID, video_dir, subject_ID, video_date, video_length FROM video_table",
+    where=["video_ID = ?"],
+)
+register(
+    "get_videos",
+    "SELECT video_ID, video_dir, subject_ID, video_date, video_length FROM video_table",
+    record=records.Video,
+)
+register(
+    "list_videos",
+    """
+    SELECT v.video_ID, v.video_dir, v.subject_ID, v.video_date, v.video_length,
+           s.subject_name
+    FROM video_table v
+    JOIN subject_table s ON v.subject_ID = s.subject_ID
+    """,
+    filters={
+        "subject_id": "v.subject_ID = ?",
+        "date_from": "v.video_date >= ?",
+        "date_to": "v.video_date <= ?",
+    },
+    keyset=[("v.video_date", "video_date", True), ("v.video_ID", "video_ID", False)],
+    record=records.Video,
+)
+register(
+    "get_tag",
+    "SELECT tag_ID, video_ID, task_ID, start, end FROM tag_table",
+    where=["tag_ID = ?"],
+)
+register(
+    "get_tags",
+    "SELECT tag_ID, video_ID, task_ID, start, end FROM tag_table",
+    record=records.Tag,
+)
+register(
+    "list_tags",
+    """
+    SELECT t.tag_ID, t.video_ID, t.task_ID, t.start, t.end,
+           tk.task_name, tk.task_set, tk.task_describe,
+           v.video_dir, v.video_date, v.subject_ID
+    FROM tag_table t
+    JOIN video_table v ON t.video_ID = v.video_ID
+    JOIN task_table tk ON t.task_ID = tk.task_ID
+    """,
+    filters={
+        "video_id": "t.video_ID = ?",
+        "task_id": "t.task_ID = ?",
+    },
+    keyset=[("v.video_date", "video_date", False), ("t.start", "start", False), ("t.tag_ID", "tag_ID", False)],
+    record=records.Tag,
+)
+register(
+    "get_video_tags",
+    """
+    SELECT t.tag_ID, t.video_ID, t.task_ID, t.start, t.end,
+           tk.task_name, tk.task_set, tk.task_describe
+    FROM tag_table t
+    JOIN task_table tk ON t.task_ID = tk.task_ID
+    """,
+    where=["t.video_ID = ?"],
+    order_by="t.start",
+    record=records.Tag,
+)
+
+# =============== コアライブラリ・アルゴリズム ===============
+
+register(
+    "get_core_lib_version",
+    """
+    SELECT core_lib_ID, core_lib_version, core_lib_update_information,
+           core_lib_base_version_ID, core_lib_commit_hash
+    FROM core_lib_table
+    """,
+    where=["core_lib_ID = ?"],
+)
+register(
+    "list_core_lib_versions",
+    """
+    SELECT core_lib_ID, core_lib_version, core_lib_update_information,
+           core_lib_base_version_ID, core_lib_commit_hash
+    FROM core_lib_table
+    """,
+    keyset=[("core_lib_ID", "core_lib_ID", False)],
+    record=records.CoreLibVersion,
+)
+_CORE_LIB_OUTPUT_SELECT = """
+    SELECT co.core_lib_output_ID, co.core_lib_ID, co.video_ID, co.core_lib_output_dir,
+           cl.core_lib_version, cl.core_lib_commit_hash,
+           v.video_dir, v.video_date
+    FROM core_lib_output_table co
+    JOIN core_lib_table cl ON co.core_lib_ID = cl.core_lib_ID
+    JOIN video_table v ON co.video_ID = v.video_ID
+"""
+register(
+    "get_core_lib_output",
+    _CORE_LIB_OUTPUT_SELECT,
+    where=["co.core_lib_output_ID = ?"],
+)
+register(
+    "get_core_lib_outputs",
+    _CORE_LIB_OUTPUT_SELECT,
+    record=records.CoreLibOutput,
+)
+register(
+    "list_core_lib_outputs",
+    _CORE_LIB_OUTPUT_SELECT,
+    filters={
+        "core_lib_id": "co.core_lib_ID = ?",
+        "video_id": "co.video_ID = ?",
+    },
+    keyset=[
+        ("v.video_date", "video_date", False),
+        ("co.core_lib_ID", "core_lib_ID", False),
+        ("co.core_lib_output_ID", "core_lib_output_ID", False),
+    ],
+    record=records.CoreLibOutput,
+)
+register(
+    "get_algorithm_version",
+    """
+    SELECT algorithm_ID, algorithm_version, algorithm_update_information,
+           algorithm_base_version_ID, algorithm_commit_hash
+    FROM algorithm_table
+    """,
+    where=["algorithm_ID = ?"],
+)
+register(
+    "list_algorithm_versions",
+    """
+    SELECT algorithm_ID, algorithm_version, algorithm_update_information,
+           algorithm_base_version_ID, algorithm_commit_hash
+    FROM algorithm_table
+    """,
+    keyset=[("algorithm_ID", "algorithm_ID", False)],
+    record=records.AlgorithmVersion,
+)
+_ALGORITHM_OUTPUT_SELECT = """
+    SELECT ao.algorithm_output_ID, ao.algorithm_ID, ao.core_lib_output_ID, ao.algorithm_output_dir,
+           al.algorithm_version, al.algorithm_commit_hash,
+           co.core_lib_output_dir, cl.core_lib_version,
+           v.video_dir, v.video_date
+    FROM algorithm_output_table ao
+    JOIN algorithm_table al ON ao.algorithm_ID = al.algorithm_ID
+    JOIN core_lib_output_table co ON ao.core_lib_output_ID = co.core_lib_output_ID
+    JOIN core_lib_table cl ON co.core_lib_ID = cl.core_lib_ID
+    JOIN video_table v ON co.video_ID = v.video_ID
+"""
+register(
+    "get_algorithm_output",
+    _ALGORITHM_OUTPUT_SELECT,
+    where=["ao.algorithm_output_ID = ?"],
+)
+register(
+    "get_algorithm_outputs",
+    _ALGORITHM_OUTPUT_SELECT,
+    record=records.AlgorithmOutput,
+)
+register(
+    "list_algorithm_outputs",
+    _ALGORITHM_OUTPUT_SELECT,
+    filters={
+        "algorithm_id": "ao.algorithm_ID = ?",
+        "core_lib_output_id": "ao.core_lib_output_ID = ?",
+    },
+    keyset=[
+        ("v.video_date", "video_date", False),
+        ("ao.algorithm_ID", "algorithm_ID", False),
+        ("ao.algorithm_output_ID", "algorithm_output_ID", False),
+    ],
+    record=records.AlgorithmOutput,
+)
+
+# =============== 評価・課題分析 ===============
+
+_EVALUATION_RESULT_SELECT = """
+    SELECT evaluation_result_ID, version, algorithm_ID, true_positive, false_positive,
+           evaluation_result_dir, evaluation_timestamp
+    FROM evaluation_result_table
+"""
+register(
+    "get_evaluation_result",
+    _EVALUATION_RESULT_SELECT,
+    where=["evaluation_result_ID = ?"],
+)
+register(
+    "list_evaluation_results",
+    _EVALUATION_RESULT_SELECT,
+    filters={
+        "algorithm_id": "algorithm_ID = ?",
+        "version": "version = ?",
+    },
+    keyset=[("evaluation_result_ID", "evaluation_result_ID", True)],
+    record=records.EvaluationResult,
+)
+register(
+    "list_evaluation_data",
+    """
+    SELECT ed.evaluation_data_ID, ed.evaluation_result_ID, ed.algorithm_output_ID,
+           ed.correct_task_num, ed.total_task_num, ed.evaluation_data_path,
+           ao.algorithm_ID, ao.core_lib_output_ID
+    FROM evaluation_data_table ed
+    JOIN algorithm_output_table ao ON ed.algorithm_output_ID = ao.algorithm_output_ID
+    """,
+    where=["ed.evaluation_result_ID = ?"],
+    keyset=[("ed.evaluation_data_ID", "evaluation_data_ID", False)],
+    record=records.EvaluationData,
+)
+_ANALYSIS_RESULT_SELECT = """
+    SELECT analysis_result_ID, analysis_result_dir, analysis_timestamp, evaluation_result_ID
+    FROM analysis_result_table
+"""
+register(
+    "get_analysis_result",
+    _ANALYSIS_RESULT_SELECT,
+    where=["analysis_result_ID = ?"],
+)
+register(
+    "list_analysis_results",
+    _ANALYSIS_RESULT_SELECT,
+    filters={"evaluation_result_id": "evaluation_result_ID = ?"},
+    keyset=[("analysis_result_ID", "analysis_result_ID", True)],
+    record=records.AnalysisResult,
+)
+_PROBLEM_SELECT = """
+    SELECT problem_ID, problem_name, problem_description, problem_status, analysis_result_ID
+    FROM problem_table
+"""
+register(
+    "get_problem",
+    _PROBLEM_SELECT,
+    where=["problem_ID = ?"],
+)
+register(
+    "list_problems",
+    _PROBLEM_SELECT,
+    filters={"analysis_result_id": "analysis_result_ID = ?"},
+    keyset=[("problem_ID", "problem_ID", True)],
+    record=records.Problem,
+)
+register(
+    "list_analysis_data",
+    """
+    SELECT ad.analysis_data_ID, ad.evaluation_data_ID, ad.analysis_result_ID, ad.problem_ID,
+           ad.analysis_data_isproblem, ad.analysis_data_dir, ad.analysis_data_description
+    FROM analysis_data_table ad
+    """,
+    filters={
+        "analysis_result_id": "ad.analysis_result_ID = ?",
+        "evaluation_data_id": "ad.evaluation_data_ID = ?",
+    },
+    keyset=[("ad.analysis_data_ID", "analysis_data_ID", True)],
+    record=records.AnalysisData,
+)
+
+# =============== 検索・分析 ===============
+
+register(
+    "search_task_executions",
+    """
+    SELECT t.tag_ID,
+           tk.task_ID, tk.task_set, tk.task_name, tk.task_describe,
+           s.subject_ID, s.subject_name,
+           v.video_ID, v.video_dir, v.video_date, v.video_length,
+           t.start, t.end,
+           (t.end - t.start) as frame_count
+    FROM tag_table t
+    JOIN task_table tk ON t.task_ID = tk.task_ID
+    JOIN video_table v ON t.video_ID = v.video_ID
+    JOIN subject_table s ON v.subject_ID = s.subject_ID
+    """,
+    filters={
+        "task_set": "tk.task_set = ?",
+        "subject_id": "s.subject_ID = ?",
+        "date_from": "v.video_date >= ?",
+        "date_to": "v.video_date <= ?",
+    },
+    order_by="v.video_date, tk.task_set, tk.task_ID, t.start",
+    record=records.TaskExecution,
+)
+register(
+    "get_processing_pipeline_summary",
+    """
+    SELECT v.video_ID, v.video_dir, v.video_date,
+           s.subject_name,
+           co.core_lib_output_ID, cl.core_lib_version,
+           ao.algorithm_output_ID, al.algorithm_version,
+           COUNT(t.tag_ID) as tag_count
+    FROM video_table v
+    JOIN subject_table s ON v.subject_ID = s.subject_ID
+    LEFT JOIN core_lib_output_table co ON v.video_ID = co.video_ID
+    LEFT JOIN core_lib_table cl ON co.core_lib_ID = cl.core_lib_ID
+    LEFT JOIN algorithm_output_table ao ON co.core_lib_output_ID = ao.core_lib_output_ID
+    LEFT JOIN algorithm_table al ON ao.algorithm_ID = al.algorithm_ID
+    LEFT JOIN tag_table t ON v.video_ID = t.video_ID
+    """,
+    filters={"video_id": "v.video_ID = ?"},
+    group_by="v.video_ID, co.core_lib_output_ID, ao.algorithm_output_ID",
+    order_by="v.video_date, v.video_ID",
+)
@@ -0,0 +1,381 @@
+"""
+一覧・検索結果の行の表現
+
+一覧・検索関数の row_format で、結果の行を次の形式から選べます。
+
+- "dict": 列名 -> 値の辞書（デフォルト）
+- "tuple": 値のタプル（SELECT の列順）
+- "namedtuple": 結果の形ごとの namedtuple（TagRow, VideoRow, …）
+- "record": 結果の形ごとの __slots__ 付き dataclass（Tag, Video, …）
+- "columns": 列名 -> 列の値の DWHColumns（一覧・検索関数のみ。iter_* では使用不可）
+
+dict 以外の形式はカーソルから取得したタプルをそのまま使う（"tuple"）か、1回のコンストラクタ呼び出しで
+変換するため、行ごとの辞書を作るよりメモリ使用量・変換コストとも小さくなります。
+
+"columns" はカーソルから chunk 単位で取得したタプルを列ごとに直接 array.array へ追加します。
+整数だけの列は array("q")、実数や NULL を含む数値の列は array("d")（NULL は NaN）、それ以外の列は list になります。
+NumPy がインストールされている場合は、それぞれ int64 / float64 / object の ndarray に変換します。
+"""
+
+import collections
+import dataclasses
+import functools
+import itertools
+import math
+import sqlite3
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from .exceptions import DWHValidationError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ROW_FORMATS = ("dict", "tuple", "namedtuple", "record", "columns")
+
+# row_format="columns" で fetchmany により1回に取得する行数
+COLUMN_FETCH_CHUNK_SIZE = 10000
+
+
+@dataclass(slots=True)
+class Task:
+    """タスク（list_tasks）"""
+    task_ID: int
+    task_set: Optional[int]
+    task_name: Optional[str]
+    task_describe: Optional[str]
+
+
+@dataclass(slots=True)
+class Subject:
+    """被験者（list_subjects）"""
+    subject_ID: int
+    subject_name: Optional[str]
+
+
+@dataclass(slots=True)
+class Video:
+    """ビデオ（list_videos。get_videos では subject_name は None）"""
+    video_ID: int
+    video_dir: Optional[str]
+    subject_ID: Optional[int]
+    video_date: Optional[str]
+    video_length: Optional[int]
+    subject_name: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Tag:
+    """タグ（list_tags。get_video_tags ではビデオの列、get_tags ではタスク・ビデオの列は None）"""
+    tag_ID: int
+    video_ID: Optional[int]
+    task_ID: Optional[int]
+    start: Optional[int]
+    end: Optional[int]
+    task_name: Optional[str] = None
+    task_set: Optional[int] = None
+    task_describe: Optional[str] = None
+    video_dir: Optional[str] = None
+    video_date: Optional[str] = None
+    subject_ID: Optional[int] = None
+
+
+@dataclass(slots=True)
+class CoreLibVersion:
+    """コアライブラリバージョン（list_core_lib_versions）"""
+    core_lib_ID: int
+    core_lib_version: Optional[str]
+    core_lib_update_information: Optional[str]
+    core_lib_base_version_ID: Optional[int]
+    core_lib_commit_hash: Optional[str]
+
+
+@dataclass(slots=True)
+class CoreLibOutput:
+    """コアライブラリ出力（list_core_lib_outputs）"""
+    core_lib_output_ID: int
+    core_lib_ID: Optional[int]
+    video_ID: Optional[int]
+    core_lib_output_dir: Optional[str]
+    core_lib_version: Optional[str]
+    core_lib_commit_hash: Optional[str]
+    video_dir: Optional[str]
+    video_date: Optional[str]
+
+
+@dataclass(slots=True)
+class AlgorithmVersion:
+    """アルゴリズムバージョン（list_algorithm_versions）"""
+    algorithm_ID: int
+    algorithm_version: Optional[str]
+    algorithm_update_information: Optional[str]
+    algorithm_base_version_ID: Optional[int]
+    algorithm_commit_hash: Optional[str]
+
+
+@dataclass(slots=True)
+class AlgorithmOutput:
+    """アルゴリズム出力（list_algorithm_outputs）"""
+    algorithm_output_ID: int
+    algorithm_ID: Optional[int]
+    core_lib_output_ID: Optional[int]
+    algorithm_output_dir: Optional[str]
+    algorithm_version: Optional[str]
+    algorithm_commit_hash: Optional[str]
+    core_lib_output_dir: Optional[str]
+    core_lib_version: Optional[str]
+    video_dir: Optional[str]
+    video_date: Optional[str]
+
+
+@dataclass(slots=True)
+class EvaluationResult:
+    """評価結果（list_evaluation_results）"""
+    evaluation_result_ID: int
+    version: Optional[str]
+    algorithm_ID: Optional[int]
+    true_positive: Optional[float]
+    false_positive: Optional[float]
+    evaluation_result_dir: Optional[str]
+    evaluation_timestamp: Optional[str]
+
+
+@dataclass(slots=True)
+class EvaluationData:
+    """個別評価データ（list_evaluation_data）"""
+    evaluation_data_ID: int
+    evaluation_result_ID: Optional[int]
+    algorithm_output_ID: Optional[int]
+    correct_task_num: Optional[int]
+    total_task_num: Optional[int]
+    evaluation_data_path: Optional[str]
+    algorithm_ID: Optional[int]
+    core_lib_output_ID: Optional[int]
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    """課題分析結果（list_analysis_results）"""
+    analysis_result_ID: int
+    analysis_result_dir: Optional[str]
+    analysis_timestamp: Optional[str]
+    evaluation_result_ID: Optional[int]
+
+
+@dataclass(slots=True)
+class Problem:
+    """課題（list_problems）"""
+    problem_ID: int
+    problem_name: Optional[str]
+    problem_description: Optional[str]
+    problem_status: Optional[str]
+    analysis_result_ID: Optional[int]
+
+
+@dataclass(slots=True)
+class AnalysisData:
+    """課題分析データ（list_analysis_data）"""
+    analysis_data_ID: int
+    evaluation_data_ID: Optional[int]
+    analysis_result_ID: Optional[int]
+    problem_ID: Optional[int]
+    analysis_data_isproblem: Optional[int]
+    analysis_data_dir: Optional[str]
+    analysis_data_description: Optional[str]
+
+
+@dataclass(slots=True)
+class TaskExecution:
+    """タスク実行（search_task_executions）"""
+    tag_ID: int
+    task_ID: Optional[int]
+    task_set: Optional[int]
+    task_name: Optional[str]
+    task_describe: Optional[str]
+    subject_ID: Optional[int]
+    subject_name: Optional[str]
+    video_ID: Optional[int]
+    video_dir: Optional[str]
+    video_date: Optional[str]
+    video_length: Optional[int]
+    start: Optional[int]
+    end: Optional[int]
+    frame_count: Optional[int]
+
+
+@functools.lru_cache(maxsize=None)
+def namedtuple_type(record: type) -> type:
+    """
+    record の dataclass と同じフィールド・デフォルト値を持つ namedtuple 型（名前は <record>Row）を取得
+
+    Args:
+        record: records の dataclass
+
+    Returns:
+        type: namedtuple 型
+    """
+    fields = dataclasses.fields(record)
+    defaults = [field.default for field in fields if field.default is not dataclasses.MISSING]
+    return collections.namedtuple(f"{record.__name__}Row", [field.name for field in fields],
+                                  defaults=defaults)
+
+
+def validate_row_format(row_format: str) -> None:
+    """
+    行の形式名を検証
+
+    Raises:
+        DWHValidationError: ROW_FORMATS にない形式の場合
+    """
+    if row_format not in ROW_FORMATS:
+        raise DWHValidationError(
+            f"Unknown row_format: {row_format!r}. Expected one of {', '.join(ROW_FORMATS)}",
+            field_name="row_format",
+            field_value=row_format
+        )
+
+
+def row_converter(cursor: sqlite3.Cursor, row_format: str = "dict",
+                  record: Optional[type] = None) -> Callable[[List[Tuple]], List]:
+    """
+    実行後のカーソルをタプルで取得するように切り替え、取得した行のリストを row_format に変換する関数を作成
+
+    Args:
+        cursor: 実行後のカーソル
+        row_format: 行の形式（ROW_FORMATS のいずれか）
+        record: "namedtuple" / "record" で使う dataclass（列はそのフィールドの先頭と一致すること）
+
+    Returns:
+        Callable: タプルのリストを変換したリストを返す関数
+
+    Raises:
+        DWHValidationError: row_format が不正な場合
+    """
+    validate_row_format(row_format)
+    if row_format == "columns":
+        raise DWHValidationError(
+            "row_format='columns' cannot be used for row iteration",
+            field_name="row_format",
+            field_value=row_format
+        )
+    cursor.row_factory = None
+    names = [column[0] for column in cursor.description or ()]
+    if row_format == "dict":
+        return lambda rows: [dict(zip(names, row)) for row in rows]
+    if row_format == "tuple":
+        return list
+    fields = [field.name for field in dataclasses.fields(record)] if record is not None else []
+    if names != fields[:len(names)]:
+        raise ValueError(f"Columns {names} do not match record {getattr(record, '__name__', None)}")
+    row_type = namedtuple_type(record) if row_format == "namedtuple" else record
+    return lambda rows: list(itertools.starmap(row_type, rows))
+
+
+class DWHColumns(dict):
+    """
+    列形式の結果（row_format="columns"）
+
+    dict として列名 -> 列の値（array.array / list、NumPy がある場合は ndarray）を保持し、
+    row_count に行数、next_after に keyset ページングの次のページのトークン（最後のページや未指定時は None）を持ちます。
+    """
+
+    def __init__(self, columns: Iterable[Tuple[str, Any]] = (), row_count: int = 0,
+                 next_after: Optional[str] = None):
+        super().__init__(columns)
+        self.row_count = row_count
+        self.next_after = next_after
+
+    def __repr__(self) -> str:
+        return f"DWHColumns({dict.__repr__(self)}, row_count={self.row_count}, next_after={self.next_after!r})"
+
+
+class _ColumnBuilder:
+    """1列分の値を型に応じた array.array（整数 "q" → 実数 "d" → list の順に広げる）に追加"""
+
+    __slots__ = ("values",)
+
+    def __init__(self):
+        self.values: Any = array("q")
+
+    def extend(self, chunk: Sequence) -> None:
+        # array.fromlist は失敗時に配列を変更しない
+        values = self.values
+        if isinstance(values, list):
+            values.extend(chunk)
+            return
+        try:
+            if values.typecode == "q":
+                values.fromlist(list(chunk))
+            else:
+                values.fromlist([math.nan if value is None else value for value in chunk])
+            return
+        except (TypeError, OverflowError):
+            pass
+        if values.typecode == "q" and all(value is None or isinstance(value, (int, float)) for value in chunk):
+            self.values = array("d", values)
+            try:
+                self.values.fromlist([math.nan if value is None else value for value in chunk])
+                return
+            except OverflowError:
+                pass
+        # 数値以外を含む列は list に戻す（"d" の NaN は NULL から変換したものなので None に戻す）
+        if self.values.typecode == "d":
+            self.values = [None if math.isnan(value) else value for value in self.values]
+        else:
+            self.values = list(self.values)
+        self.values.extend(chunk)
+
+    def result(self) -> Any:
+        values = self.values
+        if numpy is None:
+            return values
+        if isinstance(values, list):
+            column = numpy.empty(len(values), dtype=object)
+            column[:] = values
+            return column
+        return numpy.frombuffer(values, dtype=numpy.int64 if values.typecode == "q" else numpy.float64)
+
+
+def build_columns(names: Sequence[str], chunks: Iterable[Sequence[Tuple]],
+                  next_after: Optional[str] = None) -> DWHColumns:
+    """
+    タプルの行のチャンクから列形式の結果を作成（行ごとの辞書やオブジェクトは作らない）
+
+    Args:
+        names: 列名（SELECT の列順）
+        chunks: タプルの行のリストを順に返すイテラブル
+        next_after: keyset ページングの次のページのトークン
+
+    Returns:
+        DWHColumns: 列名 -> 列の値
+    """
+    builders = [_ColumnBuilder() for _ in names]
+    row_count = 0
+    for rows in chunks:
+        row_count += len(rows)
+        for builder, values in zip(builders, zip(*rows)):
+            builder.extend(values)
+    return DWHColumns(
+        ((name, builder.result()) for name, builder in zip(names, builders)),
+        row_count,
+        next_after
+    )
+
+
+def fetch_columns(cursor: sqlite3.Cursor, chunk_size: int = COLUMN_FETCH_CHUNK_SIZE) -> DWHColumns:
+    """
+    実行後のカーソルの結果を chunk_size 行ずつタプルで取得し、列形式の結果を作成
+
+    Args:
+        cursor: 実行後のカーソル
+        chunk_size: fetchmany で1回に取得する行数
+
+    Returns:
+        DWHColumns: 列名 -> 列の値
+    """
+    cursor.row_factory = None
+    names = [column[0] for column in cursor.description or ()]
+    return build_columns(names, iter(lambda: cursor.fetchmany(chunk_size), []))
@@ -3,18 +3,43 @@
 """
 
 import sqlite3
-from typing import List, Dict, Optional
-from .exceptions import DWHNotFoundError, DWHConstraintError
-from .connection import get_connection
+from typing import Any, Iterable, List, Dict, Optional, Set, Union
+from .exceptions import DWHNotFoundError, DWHConstraintError, DWHValidationError
+from .connection import DWHSession, ensure_session, get_connection
+from .queries import LOOKUP_CHUNK_SIZE, execute_query, fetch_list, insert_many_returning_ids
+from .records import DWHColumns
+from .validation import SchemaValidator
 
 
-def create_subject(subject_name: str, db_path: str = "database.db") -> int:
+# idx_subject_name を確認済みのデータベース（プロセス内で db_path ごとに1回だけ確認する）
+_subject_index_checked: Set[str] = set()
+
+
+def _ensure_subject_name_index(conn: sqlite3.Connection, db_path: str) -> None:
+    """
+    idx_subject_name が無い既存のデータベースに、初回の書き込み時にインデックスを作成する
+
+    Args:
+        conn: 書き込み用のデータベース接続
+        db_path: データベースファイルのパス
+    """
+    if db_path in _subject_index_checked:
+        return
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_subject_name ON {SchemaValidator.EXPECTED_INDEXES['idx_subject_name']}"
+    )
+    _subject_index_checked.add(db_path)
+
+
+def create_subject(subject_name: str, db_path: str = "database.db",
+                   session: Optional[DWHSession] = None) -> int:
     """
     新しい被験者を登録
     
     Args:
         subject_name: 被験者名
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         subject_ID: 作成された被験者のID
@@ -22,8 +47,9 @@ def create_subject(subject_name: str, db_path: str = "database.db") -> int:
     Raises:
         DWHConstraintError: データベース制約違反
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
+            _ensure_subject_name_index(conn, session.db_path if session is not None else db_path)
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO subject_table (subject_name) VALUES (?)",
@@ -34,13 +60,15 @@ def create_subject(subject_name: str, db_path: str = "database.db") -> int:
             raise DWHConstraintError(f"Failed to create subject: {e}", table_name="subject_table") from e
 
 
-def get_subject(subject_id: int, db_path: str = "database.db") -> Dict:
+def get_subject(subject_id: int, db_path: str = "database.db",
+                session: Optional[DWHSession] = None) -> Dict:
     """
     被験者IDで被験者情報を取得
     
     Args:
         subject_id: 被験者ID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: 被験者情報（subject_ID, subject_name）
@@ -48,12 +76,8 @@ def get_subject(subject_id: int, db_path: str = "database.db") -> Dict:
     Raises:
         DWHNotFoundError: 被験者が見つからない場合
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT subject_ID, subject_name FROM subject_table WHERE subject_ID = ?",
-            (subject_id,)
-        )
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_subject", (subject_id,))
         
         row = cursor.fetchone()
         if row is None:
@@ -66,26 +90,29 @@ def get_subject(subject_id: int, db_path: str = "database.db") -> Dict:
         return dict(row)
 
 
-def list_subjects(db_path: str = "database.db") -> List[Dict]:
+def list_subjects(db_path: str = "database.db", session: Optional[DWHSession] = None, *,
+                  limit: Optional[int] = None, after: Optional[str] = None,
+                  row_format: str = "dict") -> Union[List[Any], DWHColumns]:
     """
     被験者一覧を取得
     
     Args:
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        limit: 1ページの行数（指定時は keyset ページングで DWHPage を返す）
+        after: 前のページの next_after（続きのページを取得する場合）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"。records を参照）
     
     Returns:
-        List[dict]: 被験者情報のリスト
+        List[Any] or DWHColumns: 被験者情報のリスト（limit 指定時は DWHPage）。
+            row_format に応じて dict / tuple / namedtuple / record の行、"columns" の場合は DWHColumns
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT subject_ID, subject_name FROM subject_table ORDER BY subject_ID"
-        )
-        
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_subjects", limit=limit, after=after, row_format=row_format)
 
 
-def update_subject(subject_id: int, subject_name: str, db_path: str = "database.db") -> None:
+def update_subject(subject_id: int, subject_name: str, db_path: str = "database.db",
+                   session: Optional[DWHSession] = None) -> None:
     """
     被験者情報を更新
     
@@ -93,70 +120,150 @@ def update_subject(subject_id: int, subject_name: str, db_path: str = "database.
         subject_id: 被験者ID
         subject_name: 被験者名
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Raises:
         DWHNotFoundError: 被験者が見つからない場合
         DWHConstraintError: データベース制約違反
     """
-    # まず被験者の存在確認
-    get_subject(subject_id, db_path)
+    with ensure_session(db_path, session) as session:
+        # まず被験者の存在確認
+        get_subject(subject_id, db_path, session)
     
-    with get_connection(db_path) as conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE subject_table SET subject_name = ? WHERE subject_ID = ?",
-                (subject_name, subject_id)
-            )
-        except sqlite3.Error as e:
-            raise DWHConstraintError(f"Failed to update subject: {e}", table_name="subject_table") from e
+        with get_connection(db_path, session) as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "UPDATE subject_table SET subject_name = ? WHERE subject_ID = ?",
+                    (subject_name, subject_id)
+                )
+            except sqlite3.Error as e:
+                raise DWHConstraintError(f"Failed to update subject: {e}", table_name="subject_table") from e
 
 
-def delete_subject(subject_id: int, db_path: str = "database.db") -> None:
+def delete_subject(subject_id: int, db_path: str = "database.db",
+                   session: Optional[DWHSession] = None) -> None:
     """
     被験者を削除
     
     Args:
         subject_id: 被験者ID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Raises:
         DWHNotFoundError: 被験者が見つからない場合
         DWHConstraintError: 外部キー制約違反（ビデオが存在する場合）
     """
-    # まず被験者の存在確認
-    get_subject(subject_id, db_path)
+    with ensure_session(db_path, session) as session:
+        # まず被験者の存在確認
+        get_subject(subject_id, db_path, session)
     
-    with get_connection(db_path) as conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM subject_table WHERE subject_ID = ?", (subject_id,))
+        with get_connection(db_path, session) as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM subject_table WHERE subject_ID = ?", (subject_id,))
             
-            if cursor.rowcount == 0:
-                raise DWHNotFoundError(
-                    f"Subject not found: subject_ID={subject_id}",
-                    table_name="subject_table",
-                    record_id=subject_id
+                if cursor.rowcount == 0:
+                    raise DWHNotFoundError(
+                        f"Subject not found: subject_ID={subject_id}",
+                        table_name="subject_table",
+                        record_id=subject_id
+                    )
+            except sqlite3.IntegrityError as e:
+                raise DWHConstraintError(
+                    f"Cannot delete subject: referenced by other records. {e}",
+                    table_name="subject_table"
+                ) from e
+
+
+def _resolve_subject_names(conn: sqlite3.Connection, names: Set[str]) -> Dict[str, int]:
+    """
+    被験者名を被験者IDにまとめて解決（同名が複数ある場合は find_subject_by_name と同じく最小のID）
+    """
+    resolved: Dict[str, int] = {}
+    name_list = sorted(names)
+    for offset in range(0, len(name_list), LOOKUP_CHUNK_SIZE):
+        chunk = name_list[offset:offset + LOOKUP_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor = conn.execute(
+            f"""
+            SELECT subject_name, MIN(subject_ID) FROM subject_table
+            WHERE subject_name IN ({placeholders})
+            GROUP BY subject_name
+            """,
+            chunk
+        )
+        resolved.update((row[0], row[1]) for row in cursor)
+    return resolved
+
+
+def get_or_create_subjects(subject_names: Iterable[str], db_path: str = "database.db",
+                           session: Optional[DWHSession] = None) -> Dict[str, int]:
+    """
+    被験者名のリストをまとめて被験者IDに解決し、存在しない被験者は一括で登録
+
+    既存の被験者をまとめて検索し、見つからなかった名前だけを insert_many_returning_ids でまとめて登録します。
+    検索と登録は同じ書き込みトランザクションで行うため、並行して呼び出しても同じ名前が重複して登録されません。
+    同名の被験者が複数ある場合は最小のIDを返します。
+
+    Args:
+        subject_names: 被験者名のリスト（重複可）
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+
+    Returns:
+        dict: 被験者名 → 被験者ID（入力の全ての名前を入力順に含む）
+
+    Raises:
+        DWHValidationError: 被験者名が文字列でない場合
+        DWHConstraintError: データベース制約違反
+    """
+    names = list(dict.fromkeys(subject_names))
+    for name in names:
+        if not isinstance(name, str):
+            raise DWHValidationError(
+                f"subject_name must be a string: {name!r}",
+                field_name="subject_name",
+                field_value=name
+            )
+    if not names:
+        return {}
+
+    with get_connection(db_path, session) as conn:
+        try:
+            _ensure_subject_name_index(conn, session.db_path if session is not None else db_path)
+        except sqlite3.Error as e:
+            raise DWHConstraintError(f"Failed to create subjects: {e}", table_name="subject_table") from e
+        resolved = _resolve_subject_names(conn, set(names))
+        missing = [name for name in names if name not in resolved]
+        if missing:
+            try:
+                new_ids = insert_many_returning_ids(
+                    conn, "subject_table", ("subject_name",), "subject_ID",
+                    [(name,) for name in missing]
                 )
-        except sqlite3.IntegrityError as e:
-            raise DWHConstraintError(
-                f"Cannot delete subject: referenced by other records. {e}",
-                table_name="subject_table"
-            ) from e
+            except sqlite3.Error as e:
+                raise DWHConstraintError(f"Failed to create subjects: {e}", table_name="subject_table") from e
+            resolved.update(zip(missing, new_ids))
+
+    return {name: resolved[name] for name in names}
 
 
-def find_subject_by_name(subject_name: str, db_path: str = "database.db") -> Optional[Dict]:
+def find_subject_by_name(subject_name: str, db_path: str = "database.db",
+                         session: Optional[DWHSession] = None) -> Optional[Dict]:
     """
     被験者名で被験者情報を検索
     
     Args:
         subject_name: 被験者名
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict or None: 被験者情報（見つからない場合はNone）
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute(
             "SELECT subject_ID, subject_name FROM subject_table WHERE subject_name = ?",
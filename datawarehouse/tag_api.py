@@ -3,13 +3,16 @@
 """
 
 import sqlite3
-from typing import List, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
 from .exceptions import DWHNotFoundError, DWHConstraintError, DWHValidationError
-from .connection import get_connection
+from .connection import DWHSession, ensure_session, get_connection
+from .queries import (DEFAULT_FETCH_CHUNK_SIZE, DWHBatchResult, execute_query, fetch_by_ids, fetch_existing_ids,
+                      fetch_list, insert_many_returning_ids, iter_query)
+from .records import DWHColumns
 
 
 def create_tag(video_id: int, task_id: int, start: int, end: int, 
-               db_path: str = "database.db") -> int:
+               db_path: str = "database.db", session: Optional[DWHSession] = None) -> int:
     """
     新しいタグを登録
     
@@ -19,6 +22,7 @@ def create_tag(video_id: int, task_id: int, start: int, end: int,
         start: 開始フレーム
         end: 終了フレーム
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         tag_ID: 作成されたタグのID
@@ -42,7 +46,7 @@ def create_tag(video_id: int, task_id: int, start: int, end: int,
             field_value=start
         )
     
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -66,13 +70,140 @@ def create_tag(video_id: int, task_id: int, start: int, end: int,
             raise DWHConstraintError(f"Failed to create tag: {e}", table_name="tag_table") from e
 
 
-def get_tag(tag_id: int, db_path: str = "database.db") -> Dict:
+_TAG_FIELDS = ("video_id", "task_id", "start", "end")
+
+
+def _parse_tag_row(row: Union[Mapping[str, Any], Sequence[Any]]) -> Tuple[int, int, int, int]:
+    """
+    一括登録の1行を (video_id, task_id, start, end) に変換して区間を検証
+
+    Raises:
+        DWHValidationError: 行の形式・型・フレーム区間が不正な場合
+    """
+    if isinstance(row, Mapping):
+        missing = [field for field in _TAG_FIELDS if field not in row]
+        if missing:
+            raise DWHValidationError(
+                f"Missing tag fields: {', '.join(missing)}",
+                field_name="/".join(missing),
+            )
+        values = tuple(row[field] for field in _TAG_FIELDS)
+    else:
+        values = tuple(row)
+        if len(values) != len(_TAG_FIELDS):
+            raise DWHValidationError(
+                f"Tag row must have 4 values (video_id, task_id, start, end): {row!r}",
+                field_name="row",
+                field_value=row
+            )
+
+    for field, value in zip(_TAG_FIELDS, values):
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise DWHValidationError(
+                f"{field} must be an integer: {value!r}",
+                field_name=field,
+                field_value=value
+            )
+
+    video_id, task_id, start, end = values
+    if start >= end:
+        raise DWHValidationError(
+            f"Start frame must be less than end frame: start={start}, end={end}",
+            field_name="start/end",
+            field_value=f"{start}/{end}"
+        )
+    if start < 0:
+        raise DWHValidationError(
+            f"Start frame must be non-negative: {start}",
+            field_name="start",
+            field_value=start
+        )
+    return video_id, task_id, start, end
+
+
+def create_tags_bulk(rows: Iterable[Union[Mapping[str, Any], Sequence[Any]]],
+                     db_path: str = "database.db",
+                     session: Optional[DWHSession] = None) -> Dict:
+    """
+    複数のタグを1トランザクションで一括登録
+
+    全行のフレーム区間を先に検証し、参照先のビデオ・タスクの存在をまとめて確認したうえで、
+    問題のない行だけを executemany で登録します。不正な行はバッチ全体を中断せず failures に報告します。
+
+    Args:
+        rows: タグの行。video_id, task_id, start, end をキーに持つ辞書、
+              または (video_id, task_id, start, end) の並び
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+
+    Returns:
+        dict: 登録結果
+            - tag_ids: 入力順のタグIDのリスト（登録できなかった行は None）
+            - inserted: 登録した件数
+            - failures: 登録できなかった行のリスト（index: 入力中の位置, error: DWHValidationError
+              または DWHConstraintError）
+
+    Raises:
+        DWHConstraintError: 一括挿入そのものが失敗した場合（バッチ全体をロールバック）
+    """
+    rows = list(rows)
+    tag_ids: List[Optional[int]] = [None] * len(rows)
+    failures: List[Dict] = []
+    parsed: List[Tuple[int, Tuple[int, int, int, int]]] = []
+
+    for index, row in enumerate(rows):
+        try:
+            parsed.append((index, _parse_tag_row(row)))
+        except DWHValidationError as e:
+            failures.append({"index": index, "error": e})
+
+    if not parsed:
+        return {"tag_ids": tag_ids, "inserted": 0, "failures": failures}
+
+    with get_connection(db_path, session) as conn:
+        video_ids = fetch_existing_ids(conn, "video_table", "video_ID",
+                                       {values[0] for _, values in parsed})
+        task_ids = fetch_existing_ids(conn, "task_table", "task_ID",
+                                      {values[1] for _, values in parsed})
+
+        valid: List[Tuple[int, Tuple[int, int, int, int]]] = []
+        for index, values in parsed:
+            video_id, task_id = values[0], values[1]
+            if video_id in video_ids and task_id in task_ids:
+                valid.append((index, values))
+                continue
+            failures.append({
+                "index": index,
+                "error": DWHConstraintError(
+                    f"Video or task not found: video_ID={video_id}, task_ID={task_id}",
+                    table_name="tag_table",
+                    constraint_name="FK_video_task"
+                ),
+            })
+        failures.sort(key=lambda failure: failure["index"])
+
+        if valid:
+            try:
+                new_ids = insert_many_returning_ids(conn, "tag_table", ("video_ID", "task_ID", "start", "end"),
+                                                    "tag_ID", [values for _, values in valid])
+            except sqlite3.Error as e:
+                raise DWHConstraintError(f"Failed to create tags: {e}", table_name="tag_table") from e
+
+            for (index, _), tag_id in zip(valid, new_ids):
+                tag_ids[index] = tag_id
+
+    return {"tag_ids": tag_ids, "inserted": len(valid), "failures": failures}
+
+
+def get_tag(tag_id: int, db_path: str = "database.db",
+            session: Optional[DWHSession] = None) -> Dict:
     """
     タグIDでタグ情報を取得
     
     Args:
         tag_id: タグID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: タグ情報（tag_ID, video_ID, task_ID, start, end）
@@ -80,16 +211,8 @@ def get_tag(tag_id: int, db_path: str = "database.db") -> Dict:
     Raises:
         DWHNotFoundError: タグが見つからない場合
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT tag_ID, video_ID, task_ID, start, end
-            FROM tag_table
-            WHERE tag_ID = ?
-            """,
-            (tag_id,)
-        )
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_tag", (tag_id,))
         
         row = cursor.fetchone()
         if row is None:
@@ -102,46 +225,57 @@ def get_tag(tag_id: int, db_path: str = "database.db") -> Dict:
         return dict(row)
 
 
-def get_video_tags(video_id: int, db_path: str = "database.db") -> List[Dict]:
+def get_tags(tag_ids: Iterable[int], db_path: str = "database.db",
+             session: Optional[DWHSession] = None, *, row_format: str = "dict") -> DWHBatchResult:
+    """
+    複数のタグIDでタグ情報をまとめて取得
+    
+    Args:
+        tag_ids: タグIDのリスト
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record"。records を参照）
+    
+    Returns:
+        DWHBatchResult: タグID -> タグ情報（要求した順。見つからなかったIDは missing）
+    """
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_by_ids(conn, "get_tags", "tag_ID", "tag_table", tag_ids, row_format)
+
+
+def get_video_tags(video_id: int, db_path: str = "database.db",
+                   session: Optional[DWHSession] = None, *, row_format: str = "dict") -> Union[List[Any], DWHColumns]:
     """
     ビデオのタグ一覧を取得
     
     Args:
         video_id: ビデオID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"。records を参照）
     
     Returns:
-        List[dict]: タグ情報のリスト（tag_ID, task_ID, start, end, task_name）
+        List[Any] or DWHColumns: タグ情報のリスト（tag_ID, video_ID, task_ID, start, end, task_name, task_set, task_describe）。
+            row_format に応じて dict / tuple / namedtuple / record の行、"columns" の場合は DWHColumns
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT t.tag_ID, t.video_ID, t.task_ID, t.start, t.end,
-                   tk.task_name, tk.task_set, tk.task_describe
-            FROM tag_table t
-            JOIN task_table tk ON t.task_ID = tk.task_ID
-            WHERE t.video_ID = ?
-            ORDER BY t.start
-            """,
-            (video_id,)
-        )
-        
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "get_video_tags", (video_id,), row_format=row_format)
 
 
-def get_task_tags(task_id: int, db_path: str = "database.db") -> List[Dict]:
+def get_task_tags(task_id: int, db_path: str = "database.db",
+                  session: Optional[DWHSession] = None) -> List[Dict]:
     """
     タスクのタグ一覧を取得
     
     Args:
         task_id: タスクID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         List[dict]: タグ情報のリスト（tag_ID, video_ID, start, end, video_dir）
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session, read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -159,7 +293,9 @@ def get_task_tags(task_id: int, db_path: str = "database.db") -> List[Dict]:
 
 
 def list_tags(video_id: Optional[int] = None, task_id: Optional[int] = None,
-              db_path: str = "database.db") -> List[Dict]:
+              db_path: str = "database.db", session: Optional[DWHSession] = None, *,
+              limit: Optional[int] = None, after: Optional[str] = None,
+              row_format: str = "dict") -> Union[List[Any], DWHColumns]:
     """
     タグ一覧を取得
     
@@ -167,47 +303,47 @@ def list_tags(video_id: Optional[int] = None, task_id: Optional[int] = None,
         video_id: ビデオID（指定時はそのビデオのみ）
         task_id: タスクID（指定時はそのタスクのみ）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        limit: 1ページの行数（指定時は keyset ページングで DWHPage を返す）
+        after: 前のページの next_after（続きのページを取得する場合）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"。records を参照）
     
     Returns:
-        List[dict]: タグ情報のリスト
+        List[Any] or DWHColumns: タグ情報のリスト（limit 指定時は DWHPage）。
+            row_format に応じて dict / tuple / namedtuple / record の行、"columns" の場合は DWHColumns
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        
-        # 条件の構築
-        conditions = []
-        params = []
-        
-        if video_id is not None:
-            conditions.append("t.video_ID = ?")
-            params.append(video_id)
-        
-        if task_id is not None:
-            conditions.append("t.task_ID = ?")
-            params.append(task_id)
-        
-        # SQL構築
-        sql = """
-            SELECT t.tag_ID, t.video_ID, t.task_ID, t.start, t.end,
-                   v.video_dir, v.video_date, v.subject_ID,
-                   tk.task_name, tk.task_set, tk.task_describe
-            FROM tag_table t
-            JOIN video_table v ON t.video_ID = v.video_ID
-            JOIN task_table tk ON t.task_ID = tk.task_ID
-        """
-        
-        if conditions:
-            sql += " WHERE " + " AND ".join(conditions)
-        
-        sql += " ORDER BY v.video_date, t.start"
-        
-        cursor.execute(sql, params)
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_tags", limit=limit, after=after, row_format=row_format, video_id=video_id, task_id=task_id)
+
+
+def iter_tags(video_id: Optional[int] = None, task_id: Optional[int] = None,
+              chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE, db_path: str = "database.db",
+              session: Optional[DWHSession] = None, *, row_format: str = "dict") -> Iterator[Any]:
+    """
+    タグ一覧を1行ずつ返すジェネレータ（list_tags のストリーミング版）
+
+    接続は最後まで読み終えたとき、または close() されたときに返却されます。途中で読むのをやめる場合は
+    contextlib.closing() で囲むか close() を呼んでください。
+
+    Args:
+        video_id: ビデオID（指定時はそのビデオのみ）
+        task_id: タスクID（指定時はそのタスクのみ）
+        chunk_size: fetchmany で1回に取得する行数
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record"。records を参照）
+
+    Yields:
+        Any: タグ情報（row_format に応じて dict / tuple / TagRow / Tag）
+    """
+    with get_connection(db_path, session, read_only=True) as conn:
+        yield from iter_query(conn, "list_tags", chunk_size=chunk_size, row_format=row_format,
+                              video_id=video_id, task_id=task_id)
 
 
 def update_tag(tag_id: int, video_id: Optional[int] = None, task_id: Optional[int] = None,
                start: Optional[int] = None, end: Optional[int] = None,
-               db_path: str = "database.db") -> None:
+               db_path: str = "database.db", session: Optional[DWHSession] = None) -> None:
     """
     タグ情報を更新
     
@@ -218,104 +354,110 @@ def update_tag(tag_id: int, video_id: Optional[int] = None, task_id: Optional[in
         start: 開始フレーム（更新する場合）
         end: 終了フレーム（更新する場合）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Raises:
         DWHNotFoundError: タグが見つからない場合
         DWHValidationError: フレーム区間が不正な場合
         DWHConstraintError: データベース制約違反
     """
-    # まずタグの存在確認と現在の値を取得
-    current_tag = get_tag(tag_id, db_path)
-    
-    # 更新後の値を確定
-    new_start = start if start is not None else current_tag['start']
-    new_end = end if end is not None else current_tag['end']
-    
-    # フレーム区間の検証
-    if new_start >= new_end:
-        raise DWHValidationError(
-            f"Start frame must be less than end frame: start={new_start}, end={new_end}",
-            field_name="start/end",
-            field_value=f"{new_start}/{new_end}"
-        )
-    
-    if new_start < 0:
-        raise DWHValidationError(
-            f"Start frame must be non-negative: {new_start}",
-            field_name="start",
-            field_value=new_start
-        )
-    
-    # 更新対象のフィールドを特定
-    updates = []
-    params = []
-    
-    if video_id is not None:
-        updates.append("video_ID = ?")
-        params.append(video_id)
-    
-    if task_id is not None:
-        updates.append("task_ID = ?")
-        params.append(task_id)
+    with ensure_session(db_path, session) as session:
+        # まずタグの存在確認と現在の値を取得
+        current_tag = get_tag(tag_id, db_path, session)
+    
+        # 更新後の値を確定
+        new_start = start if start is not None else current_tag['start']
+        new_end = end if end is not None else current_tag['end']
+    
+        # フレーム区間の検証
+        if new_start >= new_end:
+            raise DWHValidationError(
+                f"Start frame must be less than end frame: start={new_start}, end={new_end}",
+                field_name="start/end",
+                field_value=f"{new_start}/{new_end}"
+            )
     
-    if start is not None:
-        updates.append("start = ?")
-        params.append(start)
+        if new_start < 0:
+            raise DWHValidationError(
+                f"Start frame must be non-negative: {new_start}",
+                field_name="start",
+                field_value=new_start
+            )
     
-    if end is not None:
-        updates.append("end = ?")
-        params.append(end)
+        # 更新対象のフィールドを特定
+        updates = []
+        params = []
     
-    if not updates:
-        return  # 更新対象なし
+        if video_id is not None:
+            updates.append("video_ID = ?")
+            params.append(video_id)
     
-    params.append(tag_id)
+        if task_id is not None:
+            updates.append("task_ID = ?")
+            params.append(task_id)
     
-    with get_connection(db_path) as conn:
-        try:
-            cursor = conn.cursor()
-            sql = f"UPDATE tag_table SET {', '.join(updates)} WHERE tag_ID = ?"
-            cursor.execute(sql, params)
-        except sqlite3.IntegrityError as e:
-            if "FOREIGN KEY constraint failed" in str(e):
-                raise DWHConstraintError(
-                    f"Video or task not found: video_ID={video_id}, task_ID={task_id}",
-                    table_name="tag_table",
-                    constraint_name="FK_video_task"
-                ) from e
-            else:
+        if start is not None:
+            updates.append("start = ?")
+            params.append(start)
+    
+        if end is not None:
+            updates.append("end = ?")
+            params.append(end)
+    
+        if not updates:
+            return  # 更新対象なし
+    
+        params.append(tag_id)
+    
+        with get_connection(db_path, session) as conn:
+            try:
+                cursor = conn.cursor()
+                sql = f"UPDATE tag_table SET {', '.join(updates)} WHERE tag_ID = ?"
+                cursor.execute(sql, params)
+            except sqlite3.IntegrityError as e:
+                if "FOREIGN KEY constraint failed" in str(e):
+                    raise DWHConstraintError(
+                        f"Video or task not found: video_ID={video_id}, task_ID={task_id}",
+                        table_name="tag_table",
+                        constraint_name="FK_video_task"
+                    ) from e
+                else:
+                    raise DWHConstraintError(f"Failed to update tag: {e}", table_name="tag_table") from e
+            except sqlite3.Error as e:
                 raise DWHConstraintError(f"Failed to update tag: {e}", table_name="tag_table") from e
-        except sqlite3.Error as e:
-            raise DWHConstraintError(f"Failed to update tag: {e}", table_name="tag_table") from e
 
 
-def delete_tag(tag_id: int, db_path: str = "database.db") -> None:
+def delete_tag(tag_id: int, db_path: str = "database.db",
+               session: Optional[DWHSession] = None) -> None:
     """
     タグを削除
     
     Args:
         tag_id: タグID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Raises:
         DWHNotFoundError: タグが見つからない場合
     """
-    # まずタグの存在確認
-    get_tag(tag_id, db_path)
+    with ensure_session(db_path, session) as session:
+        # まずタグの存在確認
+        get_tag(tag_id, db_path, session)
     
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM tag_table WHERE tag_ID = ?", (tag_id,))
+        with get_connection(db_path, session) as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM tag_table WHERE tag_ID = ?", (tag_id,))
         
-        if cursor.rowcount == 0:
-            raise DWHNotFoundError(
-                f"Tag not found: tag_ID={tag_id}",
-                table_name="tag_table",
-                record_id=tag_id
-            )
+            if cursor.rowcount == 0:
+                raise DWHNotFoundError(
+                    f"Tag not found: tag_ID={tag_id}",
+                    table_name="tag_table",
+                    record_id=tag_id
+                )
 
 
-def get_tag_duration(tag_id: int, fps: float = 30.0, db_path: str = "database.db") -> float:
+def get_tag_duration(tag_id: int, fps: float = 30.0, db_path: str = "database.db",
+                     session: Optional[DWHSession] = None) -> float:
     """
     タグの時間長を計算
     
@@ -323,6 +465,7 @@ def get_tag_duration(tag_id: int, fps: float = 30.0, db_path: str = "database.db
         tag_id: タグID
         fps: フレームレート（デフォルト: 30.0）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         float: タグの時間長（秒）
@@ -330,6 +473,6 @@ def get_tag_duration(tag_id: int, fps: float = 30.0, db_path: str = "database.db
     Raises:
         DWHNotFoundError: タグが見つからない場合
     """
-    tag = get_tag(tag_id, db_path)
+    tag = get_tag(tag_id, db_path, session)
     frame_count = tag['end'] - tag['start']
     return frame_count / fps
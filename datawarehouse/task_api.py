@@ -3,12 +3,15 @@
 """
 
 import sqlite3
-from typing import List, Dict, Optional
-from .exceptions import DWHNotFoundError, DWHConstraintError
-from .connection import get_connection
+from typing import Any, Iterable, List, Dict, Optional, Sequence, Set, Tuple, Union
+from .exceptions import DWHNotFoundError, DWHConstraintError, DWHValidationError
+from .connection import DWHSession, ensure_session, get_connection
+from .queries import LOOKUP_CHUNK_SIZE, execute_query, fetch_list, insert_many_returning_ids
+from .records import DWHColumns
 
 
-def create_task(task_set: int, task_name: str, task_describe: str, db_path: str = "database.db") -> int:
+def create_task(task_set: int, task_name: str, task_describe: str, db_path: str = "database.db",
+                session: Optional[DWHSession] = None) -> int:
     """
     新しいタスクを登録
     
@@ -17,6 +20,7 @@ def create_task(task_set: int, task_name: str, task_describe: str, db_path: str
         task_name: タスク名
         task_describe: タスクの説明
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         task_ID: 作成されたタスクのID
@@ -24,7 +28,7 @@ def create_task(task_set: int, task_name: str, task_describe: str, db_path: str
     Raises:
         DWHConstraintError: データベース制約違反
     """
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -39,13 +43,15 @@ def create_task(task_set: int, task_name: str, task_describe: str, db_path: str
             raise DWHConstraintError(f"Failed to create task: {e}", table_name="task_table") from e
 
 
-def get_task(task_id: int, db_path: str = "database.db") -> Dict:
+def get_task(task_id: int, db_path: str = "database.db",
+             session: Optional[DWHSession] = None) -> Dict:
     """
     タスクIDでタスク情報を取得
     
     Args:
         task_id: タスクID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: タスク情報（task_ID, task_set, task_name, task_describe）
@@ -53,16 +59,8 @@ def get_task(task_id: int, db_path: str = "database.db") -> Dict:
     Raises:
         DWHNotFoundError: タスクが見つからない場合
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT task_ID, task_set, task_name, task_describe
-            FROM task_table
-            WHERE task_ID = ?
-            """,
-            (task_id,)
-        )
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_task", (task_id,))
         
         row = cursor.fetchone()
         if row is None:
@@ -75,45 +73,31 @@ def get_task(task_id: int, db_path: str = "database.db") -> Dict:
         return dict(row)
 
 
-def list_tasks(task_set: Optional[int] = None, db_path: str = "database.db") -> List[Dict]:
+def list_tasks(task_set: Optional[int] = None, db_path: str = "database.db",
+               session: Optional[DWHSession] = None, *, limit: Optional[int] = None,
+               after: Optional[str] = None, row_format: str = "dict") -> Union[List[Any], DWHColumns]:
     """
     タスク一覧を取得
     
     Args:
         task_set: タスクセット番号（指定時はそのセットのみ）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        limit: 1ページの行数（指定時は keyset ページングで DWHPage を返す）
+        after: 前のページの next_after（続きのページを取得する場合）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"。records を参照）
     
     Returns:
-        List[dict]: タスク情報のリスト
+        List[Any] or DWHColumns: タスク情報のリスト（limit 指定時は DWHPage）。
+            row_format に応じて dict / tuple / namedtuple / record の行、"columns" の場合は DWHColumns
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        
-        if task_set is not None:
-            cursor.execute(
-                """
-                SELECT task_ID, task_set, task_name, task_describe
-                FROM task_table
-                WHERE task_set = ?
-                ORDER BY task_ID
-                """,
-                (task_set,)
-            )
-        else:
-            cursor.execute(
-                """
-                SELECT task_ID, task_set, task_name, task_describe
-                FROM task_table
-                ORDER BY task_set, task_ID
-                """
-            )
-        
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_tasks", limit=limit, after=after, row_format=row_format, task_set=task_set)
 
 
 def update_task(task_id: int, task_set: Optional[int] = None, 
                 task_name: Optional[str] = None, task_describe: Optional[str] = None,
-                db_path: str = "database.db") -> None:
+                db_path: str = "database.db", session: Optional[DWHSession] = None) -> None:
     """
     タスク情報を更新
     
@@ -123,72 +107,162 @@ def update_task(task_id: int, task_set: Optional[int] = None,
         task_name: タスク名（更新する場合）
         task_describe: タスクの説明（更新する場合）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Raises:
         DWHNotFoundError: タスクが見つからない場合
         DWHConstraintError: データベース制約違反
     """
-    # まずタスクの存在確認
-    get_task(task_id, db_path)
+    with ensure_session(db_path, session) as session:
+        # まずタスクの存在確認
+        get_task(task_id, db_path, session)
     
-    # 更新対象のフィールドを特定
-    updates = []
-    params = []
+        # 更新対象のフィールドを特定
+        updates = []
+        params = []
     
-    if task_set is not None:
-        updates.append("task_set = ?")
-        params.append(task_set)
+        if task_set is not None:
+            updates.append("task_set = ?")
+            params.append(task_set)
     
-    if task_name is not None:
-        updates.append("task_name = ?")
-        params.append(task_name)
+        if task_name is not None:
+            updates.append("task_name = ?")
+            params.append(task_name)
     
-    if task_describe is not None:
-        updates.append("task_describe = ?")
-        params.append(task_describe)
+        if task_describe is not None:
+            updates.append("task_describe = ?")
+            params.append(task_describe)
     
-    if not updates:
-        return  # 更新対象なし
+        if not updates:
+            return  # 更新対象なし
     
-    params.append(task_id)
+        params.append(task_id)
     
-    with get_connection(db_path) as conn:
-        try:
-            cursor = conn.cursor()
-            sql = f"UPDATE task_table SET {', '.join(updates)} WHERE task_ID = ?"
-            cursor.execute(sql, params)
-        except sqlite3.Error as e:
-            raise DWHConstraintError(f"Failed to update task: {e}", table_name="task_table") from e
+        with get_connection(db_path, session) as conn:
+            try:
+                cursor = conn.cursor()
+                sql = f"UPDATE task_table SET {', '.join(updates)} WHERE task_ID = ?"
+                cursor.execute(sql, params)
+            except sqlite3.Error as e:
+                raise DWHConstraintError(f"Failed to update task: {e}", table_name="task_table") from e
 
 
-def delete_task(task_id: int, db_path: str = "database.db") -> None:
+def delete_task(task_id: int, db_path: str = "database.db",
+                session: Optional[DWHSession] = None) -> None:
     """
     タスクを削除
     
     Args:
         task_id: タスクID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Raises:
         DWHNotFoundError: タスクが見つからない場合
         DWHConstraintError: 外部キー制約違反（タグが存在する場合）
     """
-    # まずタスクの存在確認
-    get_task(task_id, db_path)
+    with ensure_session(db_path, session) as session:
+        # まずタスクの存在確認
+        get_task(task_id, db_path, session)
     
-    with get_connection(db_path) as conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM task_table WHERE task_ID = ?", (task_id,))
+        with get_connection(db_path, session) as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM task_table WHERE task_ID = ?", (task_id,))
             
-            if cursor.rowcount == 0:
-                raise DWHNotFoundError(
-                    f"Task not found: task_ID={task_id}",
-                    table_name="task_table",
-                    record_id=task_id
+                if cursor.rowcount == 0:
+                    raise DWHNotFoundError(
+                        f"Task not found: task_ID={task_id}",
+                        table_name="task_table",
+                        record_id=task_id
+                    )
+            except sqlite3.IntegrityError as e:
+                raise DWHConstraintError(
+                    f"Cannot delete task: referenced by other records. {e}",
+                    table_name="task_table"
+                ) from e
+
+
+def _resolve_task_keys(conn: sqlite3.Connection, keys: Set[Tuple[int, str]]) -> Dict[Tuple[int, str], int]:
+    """
+    (タスクセット番号, タスク名) をタスクIDにまとめて解決（同じ組が複数ある場合は最小のID）
+    """
+    resolved: Dict[Tuple[int, str], int] = {}
+    key_list = sorted(keys)
+    # 1組あたり2つのパラメータを使うため、チャンクの組数は半分にする
+    chunk_size = LOOKUP_CHUNK_SIZE // 2
+    for offset in range(0, len(key_list), chunk_size):
+        chunk = key_list[offset:offset + chunk_size]
+        placeholders = ", ".join("(?, ?)" for _ in chunk)
+        cursor = conn.execute(
+            f"""
+            SELECT task_set, task_name, MIN(task_ID) FROM task_table
+            WHERE (task_set, task_name) IN (VALUES {placeholders})
+            GROUP BY task_set, task_name
+            """,
+            [value for key in chunk for value in key]
+        )
+        resolved.update(((row[0], row[1]), row[2]) for row in cursor)
+    return resolved
+
+
+def get_or_create_tasks(tasks: Iterable[Sequence], db_path: str = "database.db",
+                        session: Optional[DWHSession] = None) -> Dict[Tuple[int, str], int]:
+    """
+    タスクのリストをまとめてタスクIDに解決し、存在しないタスクは一括で登録
+
+    (タスクセット番号, タスク名) が一致する既存のタスクをまとめて検索し、見つからなかったものだけを
+    insert_many_returning_ids でまとめて登録します（タスクの説明は新規登録時にのみ使用）。
+    検索と登録は同じ書き込みトランザクションで行うため、並行して呼び出しても同じタスクが重複して登録されません。
+
+    Args:
+        tasks: (task_set, task_name, task_describe) のリスト（重複可。同じ組は最初の説明を使用）
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+
+    Returns:
+        dict: (task_set, task_name) → タスクID（入力の全ての組を入力順に含む）
+
+    Raises:
+        DWHValidationError: 要素の形式が不正な場合
+        DWHConstraintError: データベース制約違反
+    """
+    describes: Dict[Tuple[int, str], Optional[str]] = {}
+    for task in tasks:
+        if len(task) != 3:
+            raise DWHValidationError(
+                f"Task must be (task_set, task_name, task_describe): {task!r}",
+                field_name="task",
+                field_value=task
+            )
+        task_set, task_name, task_describe = task
+        if isinstance(task_set, bool) or not isinstance(task_set, int):
+            raise DWHValidationError(
+                f"task_set must be an integer: {task_set!r}",
+                field_name="task_set",
+                field_value=task_set
+            )
+        if not isinstance(task_name, str):
+            raise DWHValidationError(
+                f"task_name must be a string: {task_name!r}",
+                field_name="task_name",
+                field_value=task_name
+            )
+        describes.setdefault((task_set, task_name), task_describe)
+    if not describes:
+        return {}
+
+    with get_connection(db_path, session) as conn:
+        resolved = _resolve_task_keys(conn, set(describes))
+        missing = [key for key in describes if key not in resolved]
+        if missing:
+            try:
+                new_ids = insert_many_returning_ids(
+                    conn, "task_table", ("task_set", "task_name", "task_describe"), "task_ID",
+                    [(task_set, task_name, describes[(task_set, task_name)]) for task_set, task_name in missing]
                 )
-        except sqlite3.IntegrityError as e:
-            raise DWHConstraintError(
-                f"Cannot delete task: referenced by other records. {e}",
-                table_name="task_table"
-            ) from e
+            except sqlite3.Error as e:
+                raise DWHConstraintError(f"Failed to create tasks: {e}", table_name="task_table") from e
+            resolved.update(zip(missing, new_ids))
+
+    return {key: resolved[key] for key in describes}
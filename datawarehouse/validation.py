@@ -8,7 +8,7 @@ DataWareHouse データベーススキーマ検証モジュール
 import sqlite3
 from typing import Dict, List, Tuple, Optional
 from pathlib import Path
-from .connection import get_connection
+from .connection import DWHSession, get_connection
 from .exceptions import DWHError, DWHValidationError
 
 
@@ -178,7 +178,11 @@ class SchemaValidator:
     # 推奨インデックス
     EXPECTED_INDEXES = {
         'idx_core_lib_version': 'core_lib_table(core_lib_version)',
-        'idx_algorithm_version': 'algorithm_table(algorithm_version)'
+        'idx_algorithm_version': 'algorithm_table(algorithm_version)',
+        'idx_core_lib_output_core_lib_video': 'core_lib_output_table(core_lib_ID, video_ID)',
+        'idx_algorithm_output_algorithm_core_lib_output': 'algorithm_output_table(algorithm_ID, core_lib_output_ID)',
+        'idx_subject_name': 'subject_table(subject_name)',
+        'idx_video_date': 'video_table(video_date DESC, video_ID)'
     }
 
     def __init__(self, db_path: str):
@@ -209,7 +213,7 @@ class SchemaValidator:
                 }
         """
         try:
-            with get_connection(self.db_path) as conn:
+            with get_connection(self.db_path, read_only=True) as conn:
                 return self._validate_schema_internal(conn)
         except Exception as e:
             raise DWHError(f"スキーマ検証中にエラーが発生しました: {e}")
@@ -553,3 +557,37 @@ def check_database_compatibility(db_path: str) -> bool:
         return result['is_valid']
     except Exception:
         return False
+
+
+def create_missing_indexes(db_path: str, session: Optional[DWHSession] = None) -> List[str]:
+    """
+    推奨インデックスのうち存在しないものを作成する
+
+    スキーマに後から追加された推奨インデックス（idx_subject_name など）は新規作成したデータベースにしか
+    存在しないため、既存のデータベースには CREATE INDEX IF NOT EXISTS で追加します。何度実行しても結果は同じです。
+    対象のテーブルが存在しないインデックスは作成しません。
+
+    Args:
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+
+    Returns:
+        List[str]: 新たに作成したインデックス名のリスト
+
+    Raises:
+        DWHError: インデックスの作成に失敗した場合
+    """
+    validator = SchemaValidator(db_path)
+    try:
+        with get_connection(db_path, session) as conn:
+            existing_tables = set(validator._get_existing_tables(conn))
+            existing_indexes = set(validator._get_existing_indexes(conn))
+            created = []
+            for index_name, index_def in SchemaValidator.EXPECTED_INDEXES.items():
+                if index_name in existing_indexes or index_def.split('(')[0] not in existing_tables:
+                    continue
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {index_def}")
+                created.append(index_name)
+            return created
+    except sqlite3.Error as e:
+        raise DWHError(f"インデックスの作成中にエラーが発生しました: {e}") from e
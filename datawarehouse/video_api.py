@@ -2,15 +2,25 @@
 ビデオ管理API
 """
 
+import csv
 import sqlite3
-from typing import List, Dict, Optional
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union
 from datetime import datetime
 from .exceptions import DWHNotFoundError, DWHConstraintError, DWHValidationError
-from .connection import get_connection
+from .connection import DWHSession, ensure_session, get_connection
+from .queries import (DEFAULT_FETCH_CHUNK_SIZE, DWHBatchResult, execute_query, fetch_by_ids, fetch_existing_ids,
+                      fetch_list, insert_many_returning_ids, iter_query)
+from .records import DWHColumns
+from .subject_api import _resolve_subject_names
+
+# create_videos_bulk の1トランザクションあたりの行数
+DEFAULT_BULK_CHUNK_SIZE = 1000
 
 
 def create_video(video_dir: str, subject_id: int, video_date: str, video_length: int, 
-                 db_path: str = "database.db") -> int:
+                 db_path: str = "database.db", session: Optional[DWHSession] = None) -> int:
     """
     新しいビデオを登録
     
@@ -20,6 +30,7 @@ def create_video(video_dir: str, subject_id: int, video_date: str, video_length:
         video_date: 取得日（YYYY-MM-DD）
         video_length: ビデオの長さ（秒）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         video_ID: 作成されたビデオのID
@@ -46,7 +57,7 @@ def create_video(video_dir: str, subject_id: int, video_date: str, video_length:
             field_value=video_length
         )
     
-    with get_connection(db_path) as conn:
+    with get_connection(db_path, session) as conn:
         try:
             cursor = conn.cursor()
             cursor.execute(
@@ -70,13 +81,266 @@ def create_video(video_dir: str, subject_id: int, video_date: str, video_length:
             raise DWHConstraintError(f"Failed to create video: {e}", table_name="video_table") from e
 
 
-def get_video(video_id: int, db_path: str = "database.db") -> Dict:
+def _read_video_manifest(manifest_path: Union[str, Path]) -> List[Dict[str, str]]:
+    """
+    CSVマニフェスト（ヘッダ: video_dir, subject_id または subject_name, video_date, video_length）を読み込む
+
+    Raises:
+        DWHValidationError: ファイルが存在しない、または必須列が足りない場合
+    """
+    path = Path(manifest_path)
+    if not path.is_file():
+        raise DWHValidationError(
+            f"Manifest file not found: {path}",
+            field_name="manifest",
+            field_value=str(path)
+        )
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        columns = set(reader.fieldnames or ())
+        missing = {"video_dir", "video_date", "video_length"} - columns
+        if missing or not columns & {"subject_id", "subject_name"}:
+            raise DWHValidationError(
+                "Manifest must have columns video_dir, subject_id or subject_name, "
+                f"video_date, video_length: {path}",
+                field_name="manifest",
+                field_value=sorted(columns)
+            )
+        return list(reader)
+
+
+def _parse_video_row(row: Union[Mapping[str, Any], Sequence[Any]]
+                     ) -> Tuple[str, Union[int, str], str, int]:
+    """
+    一括登録の1行を (video_dir, 被験者IDまたは被験者名, video_date, video_length) に変換
+
+    被験者は int なら被験者ID、str なら被験者名として扱います（辞書・CSVでは subject_id 列が優先）。
+
+    Raises:
+        DWHValidationError: 行の形式・型・ビデオ長さが不正な場合
+    """
+    if isinstance(row, Mapping):
+        subject_id = row.get("subject_id")
+        if subject_id not in (None, ""):
+            try:
+                subject: Union[int, str] = int(subject_id)
+            except (TypeError, ValueError):
+                raise DWHValidationError(
+                    f"subject_id must be an integer: {subject_id!r}",
+                    field_name="subject_id",
+                    field_value=subject_id
+                )
+        elif row.get("subject_name") not in (None, ""):
+            subject = str(row["subject_name"])
+        else:
+            raise DWHValidationError(
+                "subject_id or subject_name is required",
+                field_name="subject_id/subject_name"
+            )
+        values = (row.get("video_dir"), subject, row.get("video_date"), row.get("video_length"))
+    else:
+        values = tuple(row)
+        if len(values) != 4:
+            raise DWHValidationError(
+                f"Video row must have 4 values (video_dir, subject, video_date, video_length): {row!r}",
+                field_name="row",
+                field_value=row
+            )
+
+    video_dir, subject, video_date, video_length = values
+    if not isinstance(video_dir, str) or not video_dir:
+        raise DWHValidationError(
+            f"video_dir must be a non-empty string: {video_dir!r}",
+            field_name="video_dir",
+            field_value=video_dir
+        )
+    if isinstance(subject, bool) or not isinstance(subject, (int, str)):
+        raise DWHValidationError(
+            f"Subject must be an ID or a name: {subject!r}",
+            field_name="subject",
+            field_value=subject
+        )
+    if not isinstance(video_date, str):
+        raise DWHValidationError(
+            f"Invalid date format: {video_date}. Expected format: YYYY-MM-DD",
+            field_name="video_date",
+            field_value=video_date
+        )
+    try:
+        video_length = int(video_length)
+    except (TypeError, ValueError):
+        raise DWHValidationError(
+            f"video_length must be an integer: {video_length!r}",
+            field_name="video_length",
+            field_value=video_length
+        )
+    if video_length <= 0:
+        raise DWHValidationError(
+            f"Video length must be positive: {video_length}",
+            field_name="video_length",
+            field_value=video_length
+        )
+    return video_dir, subject, video_date, video_length
+
+
+def _find_invalid_dates(video_dates: Iterable[str]) -> Set[str]:
+    """重複を除いた日付文字列をまとめて検証し、YYYY-MM-DD として不正なものを返す"""
+    invalid = set()
+    for video_date in set(video_dates):
+        try:
+            datetime.strptime(video_date, "%Y-%m-%d")
+        except ValueError:
+            invalid.add(video_date)
+    return invalid
+
+
+def _check_video_subjects(conn: sqlite3.Connection,
+                          chunk: List[Tuple[int, Tuple[str, Union[int, str], str, int]]],
+                          failures: List[Dict]) -> List[Tuple[int, Tuple[str, int, str, int]]]:
+    """
+    チャンクの行の被験者IDの存在確認と被験者名の解決をまとめて行い、被験者をIDに置き換えた行を返す
+
+    被験者が見つからない行は failures に追加します。
+    """
+    existing_ids = fetch_existing_ids(conn, "subject_table", "subject_ID",
+                                      {values[1] for _, values in chunk if isinstance(values[1], int)})
+    resolved_names = _resolve_subject_names(conn, {values[1] for _, values in chunk if isinstance(values[1], str)})
+
+    valid: List[Tuple[int, Tuple[str, int, str, int]]] = []
+    for index, (video_dir, subject, video_date, video_length) in chunk:
+        if isinstance(subject, str) and subject not in resolved_names:
+            failures.append({"index": index, "error": DWHConstraintError(
+                f"Subject not found: subject_name={subject}",
+                table_name="video_table",
+                constraint_name="FK_subject_ID"
+            )})
+        elif isinstance(subject, int) and subject not in existing_ids:
+            failures.append({"index": index, "error": DWHConstraintError(
+                f"Subject not found: subject_ID={subject}",
+                table_name="video_table",
+                constraint_name="FK_subject_ID"
+            )})
+        else:
+            subject_id = resolved_names[subject] if isinstance(subject, str) else subject
+            valid.append((index, (video_dir, subject_id, video_date, video_length)))
+    return valid
+
+
+def create_videos_bulk(rows: Union[str, Path, Iterable[Union[Mapping[str, Any], Sequence[Any]]]],
+                       chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+                       db_path: str = "database.db",
+                       session: Optional[DWHSession] = None) -> Dict:
+    """
+    複数のビデオを一括登録
+
+    全行の形式・日付・ビデオ長さを先に検証し、chunk_size 行ごとの書き込みトランザクションで
+    被験者名から被験者IDへの解決と被験者IDの存在確認をまとめて行ってから、問題のない行を挿入します。
+    確認と挿入は同じトランザクション内で行うため、途中で被験者が削除・変更されても影響を受けません。
+    不正な行はバッチ全体を中断せず failures に報告します。
+
+    Args:
+        rows: ビデオの行、またはCSVマニフェストのパス。行は video_dir, subject_id または subject_name,
+              video_date, video_length をキーに持つ辞書、または (video_dir, 被験者IDまたは被験者名,
+              video_date, video_length) の並び。CSVマニフェストは同じ列名のヘッダを持つこと
+        chunk_size: 1トランザクションあたりの行数
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時は全チャンクをその接続・トランザクションで実行）
+
+    Returns:
+        dict: 登録結果
+            - video_ids: 入力順のビデオIDのリスト（登録できなかった行は None）
+            - inserted: 登録した件数
+            - failures: 登録できなかった行のリスト（index: 入力中の位置, error: DWHValidationError
+              または DWHConstraintError）
+            - chunks: 実行したトランザクション数
+            - elapsed_sec: 所要時間（秒）
+            - rows_per_sec: 登録件数 / 所要時間
+
+    Raises:
+        DWHValidationError: chunk_size が不正、またはCSVマニフェストを読み込めない場合
+    """
+    if chunk_size <= 0:
+        raise DWHValidationError(
+            f"chunk_size must be positive: {chunk_size}",
+            field_name="chunk_size",
+            field_value=chunk_size
+        )
+
+    started = time.perf_counter()
+    if isinstance(rows, (str, Path)):
+        rows = _read_video_manifest(rows)
+    else:
+        rows = list(rows)
+
+    video_ids: List[Optional[int]] = [None] * len(rows)
+    failures: List[Dict] = []
+    parsed: List[Tuple[int, Tuple[str, Union[int, str], str, int]]] = []
+    for index, row in enumerate(rows):
+        try:
+            parsed.append((index, _parse_video_row(row)))
+        except DWHValidationError as e:
+            failures.append({"index": index, "error": e})
+
+    invalid_dates = _find_invalid_dates(values[2] for _, values in parsed)
+    pending: List[Tuple[int, Tuple[str, Union[int, str], str, int]]] = []
+    for index, values in parsed:
+        video_date = values[2]
+        if video_date in invalid_dates:
+            failures.append({"index": index, "error": DWHValidationError(
+                f"Invalid date format: {video_date}. Expected format: YYYY-MM-DD",
+                field_name="video_date",
+                field_value=video_date
+            )})
+        else:
+            pending.append((index, values))
+
+    inserted = 0
+    chunks = 0
+    for offset in range(0, len(pending), chunk_size):
+        valid: List[Tuple[int, Tuple[str, int, str, int]]] = []
+        try:
+            with get_connection(db_path, session) as conn:
+                valid = _check_video_subjects(conn, pending[offset:offset + chunk_size], failures)
+                if not valid:
+                    continue
+                try:
+                    new_ids = insert_many_returning_ids(
+                        conn, "video_table", ("video_dir", "subject_ID", "video_date", "video_length"),
+                        "video_ID", [values for _, values in valid]
+                    )
+                except sqlite3.Error as e:
+                    raise DWHConstraintError(f"Failed to create videos: {e}", table_name="video_table") from e
+        except DWHConstraintError as e:
+            # 失敗したチャンクの挿入対象の行だけを報告し、後続のチャンクは続行する
+            failures.extend({"index": index, "error": e} for index, _ in valid)
+            continue
+        finally:
+            chunks += 1
+        for (index, _), video_id in zip(valid, new_ids):
+            video_ids[index] = video_id
+        inserted += len(valid)
+
+    failures.sort(key=lambda failure: failure["index"])
+    elapsed = time.perf_counter() - started
+    return {
+        "video_ids": video_ids,
+        "inserted": inserted,
+        "failures": failures,
+        "chunks": chunks,
+        "elapsed_sec": elapsed,
+        "rows_per_sec": (inserted / elapsed) if elapsed > 0 else 0.0,
+    }
+
+
+def get_video(video_id: int, db_path: str = "database.db",
+              session: Optional[DWHSession] = None) -> Dict:
     """
     ビデオIDでビデオ情報を取得
     
     Args:
         video_id: ビデオID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         dict: ビデオ情報（video_ID, video_dir, subject_ID, video_date, video_length）
@@ -84,16 +348,8 @@ def get_video(video_id: int, db_path: str = "database.db") -> Dict:
     Raises:
         DWHNotFoundError: ビデオが見つからない場合
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT video_ID, video_dir, subject_ID, video_date, video_length
-            FROM video_table
-            WHERE video_ID = ?
-            """,
-            (video_id,)
-        )
+    with get_connection(db_path, session, read_only=True) as conn:
+        cursor = execute_query(conn, "get_video", (video_id,))
         
         row = cursor.fetchone()
         if row is None:
@@ -106,8 +362,28 @@ def get_video(video_id: int, db_path: str = "database.db") -> Dict:
         return dict(row)
 
 
+def get_videos(video_ids: Iterable[int], db_path: str = "database.db",
+               session: Optional[DWHSession] = None, *, row_format: str = "dict") -> DWHBatchResult:
+    """
+    複数のビデオIDでビデオ情報をまとめて取得
+    
+    Args:
+        video_ids: ビデオIDのリスト
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record"。records を参照）
+    
+    Returns:
+        DWHBatchResult: ビデオID -> ビデオ情報（要求した順。見つからなかったIDは missing）
+    """
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_by_ids(conn, "get_videos", "video_ID", "video_table", video_ids, row_format)
+
+
 def list_videos(subject_id: Optional[int] = None, date_from: Optional[str] = None,
-                date_to: Optional[str] = None, db_path: str = "database.db") -> List[Dict]:
+                date_to: Optional[str] = None, db_path: str = "database.db",
+                session: Optional[DWHSession] = None, *, limit: Optional[int] = None,
+                after: Optional[str] = None, row_format: str = "dict") -> Union[List[Any], DWHColumns]:
     """
     ビデオ一覧を取得
     
@@ -116,63 +392,67 @@ def list_videos(subject_id: Optional[int] = None, date_from: Optional[str] = Non
         date_from: 開始日（YYYY-MM-DD）
         date_to: 終了日（YYYY-MM-DD）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        limit: 1ページの行数（指定時は keyset ページングで DWHPage を返す）
+        after: 前のページの next_after（続きのページを取得する場合）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record" / "columns"。records を参照）
     
     Returns:
-        List[dict]: ビデオ情報のリスト
+        List[Any] or DWHColumns: ビデオ情報のリスト（limit 指定時は DWHPage）。
+            row_format に応じて dict / tuple / namedtuple / record の行、"columns" の場合は DWHColumns
     """
-    with get_connection(db_path) as conn:
-        cursor = conn.cursor()
-        
-        # 条件の構築
-        conditions = []
-        params = []
-        
-        if subject_id is not None:
-            conditions.append("subject_ID = ?")
-            params.append(subject_id)
-        
-        if date_from is not None:
-            conditions.append("video_date >= ?")
-            params.append(date_from)
-        
-        if date_to is not None:
-            conditions.append("video_date <= ?")
-            params.append(date_to)
-        
-        # SQL構築
-        sql = """
-            SELECT v.video_ID, v.video_dir, v.subject_ID, v.video_date, v.video_length,
-                   s.subject_name
-            FROM video_table v
-            JOIN subject_table s ON v.subject_ID = s.subject_ID
-        """
-        
-        if conditions:
-            sql += " WHERE " + " AND ".join(conditions)
-        
-        sql += " ORDER BY v.video_date DESC, v.video_ID"
-        
-        cursor.execute(sql, params)
-        return [dict(row) for row in cursor.fetchall()]
+    with get_connection(db_path, session, read_only=True) as conn:
+        return fetch_list(conn, "list_videos", limit=limit, after=after, row_format=row_format, subject_id=subject_id,
+                          date_from=date_from, date_to=date_to)
+
+
+def iter_videos(subject_id: Optional[int] = None, date_from: Optional[str] = None,
+                date_to: Optional[str] = None, chunk_size: int = DEFAULT_FETCH_CHUNK_SIZE,
+                db_path: str = "database.db", session: Optional[DWHSession] = None, *,
+                row_format: str = "dict") -> Iterator[Any]:
+    """
+    ビデオ一覧を1行ずつ返すジェネレータ（list_videos のストリーミング版）
+
+    接続は最後まで読み終えたとき、または close() されたときに返却されます。途中で読むのをやめる場合は
+    contextlib.closing() で囲むか close() を呼んでください。
+
+    Args:
+        subject_id: 被験者ID（指定時はその被験者のみ）
+        date_from: 開始日（YYYY-MM-DD）
+        date_to: 終了日（YYYY-MM-DD）
+        chunk_size: fetchmany で1回に取得する行数
+        db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
+        row_format: 行の形式（"dict" / "tuple" / "namedtuple" / "record"。records を参照）
+
+    Yields:
+        Any: ビデオ情報（row_format に応じて dict / tuple / VideoRow / Video）
+    """
+    with get_connection(db_path, session, read_only=True) as conn:
+        yield from iter_query(conn, "list_videos", chunk_size=chunk_size, row_format=row_format,
+                              subject_id=subject_id, date_from=date_from, date_to=date_to)
 
 
-def get_videos_by_subject(subject_id: int, db_path: str = "database.db") -> List[Dict]:
+def get_videos_by_subject(subject_id: int, db_path: str = "database.db",
+                          session: Optional[DWHSession] = None) -> List[Dict]:
     """
     被験者IDでビデオ一覧を取得
     
     Args:
         subject_id: 被験者ID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Returns:
         List[dict]: ビデオ情報のリスト
     """
-    return list_videos(subject_id=subject_id, db_path=db_path)
+    return list_videos(subject_id=subject_id, db_path=db_path, session=session)
 
 
 def update_video(video_id: int, video_dir: Optional[str] = None, 
                  subject_id: Optional[int] = None, video_date: Optional[str] = None,
-                 video_length: Optional[int] = None, db_path: str = "database.db") -> None:
+                 video_length: Optional[int] = None, db_path: str = "database.db",
+                 session: Optional[DWHSession] = None) -> None:
     """
     ビデオ情報を更新
     
@@ -183,105 +463,110 @@ def update_video(video_id: int, video_dir: Optional[str] = None,
         video_date: 取得日（更新する場合）
         video_length: ビデオの長さ（更新する場合）
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Raises:
         DWHNotFoundError: ビデオが見つからない場合
         DWHValidationError: 入力値が不正な場合
         DWHConstraintError: データベース制約違反
     """
-    # まずビデオの存在確認
-    get_video(video_id, db_path)
+    with ensure_session(db_path, session) as session:
+        # まずビデオの存在確認
+        get_video(video_id, db_path, session)
     
-    # 日付形式の検証
-    if video_date is not None:
-        try:
-            datetime.strptime(video_date, "%Y-%m-%d")
-        except ValueError:
+        # 日付形式の検証
+        if video_date is not None:
+            try:
+                datetime.strptime(video_date, "%Y-%m-%d")
+            except ValueError:
+                raise DWHValidationError(
+                    f"Invalid date format: {video_date}. Expected format: YYYY-MM-DD",
+                    field_name="video_date",
+                    field_value=video_date
+                )
+    
+        # ビデオ長さの検証
+        if video_length is not None and video_length <= 0:
             raise DWHValidationError(
-                f"Invalid date format: {video_date}. Expected format: YYYY-MM-DD",
-                field_name="video_date",
-                field_value=video_date
+                f"Video length must be positive: {video_length}",
+                field_name="video_length",
+                field_value=video_length
             )
     
-    # ビデオ長さの検証
-    if video_length is not None and video_length <= 0:
-        raise DWHValidationError(
-            f"Video length must be positive: {video_length}",
-            field_name="video_length",
-            field_value=video_length
-        )
-    
-    # 更新対象のフィールドを特定
-    updates = []
-    params = []
+        # 更新対象のフィールドを特定
+        updates = []
+        params = []
     
-    if video_dir is not None:
-        updates.append("video_dir = ?")
-        params.append(video_dir)
+        if video_dir is not None:
+            updates.append("video_dir = ?")
+            params.append(video_dir)
     
-    if subject_id is not None:
-        updates.append("subject_ID = ?")
-        params.append(subject_id)
+        if subject_id is not None:
+            updates.append("subject_ID = ?")
+            params.append(subject_id)
     
-    if video_date is not None:
-        updates.append("video_date = ?")
-        params.append(video_date)
+        if video_date is not None:
+            updates.append("video_date = ?")
+            params.append(video_date)
     
-    if video_length is not None:
-        updates.append("video_length = ?")
-        params.append(video_length)
+        if video_length is not None:
+            updates.append("video_length = ?")
+            params.append(video_length)
     
-    if not updates:
-        return  # 更新対象なし
+        if not updates:
+            return  # 更新対象なし
     
-    params.append(video_id)
+        params.append(video_id)
     
-    with get_connection(db_path) as conn:
-        try:
-            cursor = conn.cursor()
-            sql = f"UPDATE video_table SET {', '.join(updates)} WHERE video_ID = ?"
-            cursor.execute(sql, params)
-        except sqlite3.IntegrityError as e:
-            if "FOREIGN KEY constraint failed" in str(e):
-                raise DWHConstraintError(
-                    f"Subject not found: subject_ID={subject_id}",
-                    table_name="video_table",
-                    constraint_name="FK_subject_ID"
-                ) from e
-            else:
+        with get_connection(db_path, session) as conn:
+            try:
+                cursor = conn.cursor()
+                sql = f"UPDATE video_table SET {', '.join(updates)} WHERE video_ID = ?"
+                cursor.execute(sql, params)
+            except sqlite3.IntegrityError as e:
+                if "FOREIGN KEY constraint failed" in str(e):
+                    raise DWHConstraintError(
+                        f"Subject not found: subject_ID={subject_id}",
+                        table_name="video_table",
+                        constraint_name="FK_subject_ID"
+                    ) from e
+                else:
+                    raise DWHConstraintError(f"Failed to update video: {e}", table_name="video_table") from e
+            except sqlite3.Error as e:
                 raise DWHConstraintError(f"Failed to update video: {e}", table_name="video_table") from e
-        except sqlite3.Error as e:
-            raise DWHConstraintError(f"Failed to update video: {e}", table_name="video_table") from e
 
 
-def delete_video(video_id: int, db_path: str = "database.db") -> None:
+def delete_video(video_id: int, db_path: str = "database.db",
+                 session: Optional[DWHSession] = None) -> None:
     """
     ビデオを削除
     
     Args:
         video_id: ビデオID
         db_path: データベースファイルのパス
+        session: 共有セッション（指定時はその接続・トランザクションで実行）
     
     Raises:
         DWHNotFoundError: ビデオが見つからない場合
         DWHConstraintError: 外部キー制約違反（タグや出力が存在する場合）
     """
-    # まずビデオの存在確認
-    get_video(video_id, db_path)
+    with ensure_session(db_path, session) as session:
+        # まずビデオの存在確認
+        get_video(video_id, db_path, session)
     
-    with get_connection(db_path) as conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM video_table WHERE video_ID = ?", (video_id,))
+        with get_connection(db_path, session) as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM video_table WHERE video_ID = ?", (video_id,))
             
-            if cursor.rowcount == 0:
-                raise DWHNotFoundError(
-                    f"Video not found: video_ID={video_id}",
-                    table_name="video_table",
-                    record_id=video_id
-                )
-        except sqlite3.IntegrityError as e:
-            raise DWHConstraintError(
-                f"Cannot delete video: referenced by other records. {e}",
-                table_name="video_table"
-            ) from e
+                if cursor.rowcount == 0:
+                    raise DWHNotFoundError(
+                        f"Video not found: video_ID={video_id}",
+                        table_name="video_table",
+                        record_id=video_id
+                    )
+            except sqlite3.IntegrityError as e:
+                raise DWHConstraintError(
+                    f"Cannot delete video: referenced by other records. {e}",
+                    table_name="video_table"
+                ) from e
@@ -104,6 +104,10 @@ CREATE TABLE IF NOT EXISTS evaluation_data_table (
 -- 推奨インデックス
 CREATE INDEX IF NOT EXISTS idx_core_lib_version ON core_lib_table(core_lib_version);
 CREATE INDEX IF NOT EXISTS idx_algorithm_version ON algorithm_table(algorithm_version);
+CREATE INDEX IF NOT EXISTS idx_core_lib_output_core_lib_video ON core_lib_output_table(core_lib_ID, video_ID);
+CREATE INDEX IF NOT EXISTS idx_algorithm_output_algorithm_core_lib_output ON algorithm_output_table(algorithm_ID, core_lib_output_ID);
+CREATE INDEX IF NOT EXISTS idx_subject_name ON subject_table(subject_name);
+CREATE INDEX IF NOT EXISTS idx_video_date ON video_table(video_date DESC, video_ID);
 
 
 